@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# *****************************************************************************
+#   Benchmark of the archive formats of tweetStore: each format, plain and
+#   compressed, is written from the same tweets held in memory and read back,
+#   and the size and the best save and load times are printed as a table.
+#
+#   Simplest usage: python benchArchive.py INPUT-FILENAME
+#
+#   options:
+#       -h | --help    Print help information
+#       -f | --format  Archive extension to time, e.g. .jsonl.gz (may be
+#                      repeated; default all of them)
+#       -r | --repeat  Number of timed runs, of which the best is kept (default 3)
+#       --compact      Write .json archives compactly, a tweet per line
+#       --tmpdir       Directory for the archives written
+#
+#   Keith Eric Grant (keg@ramblemuse.com)
+#   18 Oct 2026
+#
+# *****************************************************************************
+
+import sys
+import os
+import argparse
+import shutil
+import tempfile
+import time
+import jsonBackend
+import tweetStore
+
+
+myName  = 'benchArchive.py'
+version = '1.0.0'
+
+# Formats timed by default
+plainFormats = ('.json', '.jsonl', '.ijsonl', '.pickle')
+compressedFormats = ('.gz', '.bz2', '.xz')
+
+
+def defaultFormats() :
+    """Every format, plain and with each compression that's installed"""
+    found = []
+    for ext in plainFormats :
+        found.append(ext)
+        for comp in compressedFormats :
+            if comp == '.xz' and tweetStore.lzma is None :
+                continue
+            found.append(ext + comp)
+    return found
+
+
+def timeFormat(tweets, filename, repeat, compact) :
+    """Size of an archive of the tweets, and the best times to save and to
+    load it"""
+    save = load = None
+    for _ in range(repeat) :
+        start = time.time()
+        tweetStore.writeTweets(filename, tweets, compact=compact)
+        elapsed = time.time() - start
+        save = elapsed if save is None else min(save, elapsed)
+
+        start = time.time()
+        for _ in tweetStore.readTweets(filename) :
+            pass
+        elapsed = time.time() - start
+        load = elapsed if load is None else min(load, elapsed)
+    return os.path.getsize(filename), save, load
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+
+    parser = argparse.ArgumentParser(
+        prog=myName,
+        description='Time saving and loading each archive format',
+        version=version)
+    parser.add_argument('inpfile', action='store', help='Input tweet filename')
+    parser.add_argument('--format', '-f', action='append', dest='formats', default=[], help='Archive extension to time')
+    parser.add_argument('--repeat', '-r', action='store', type=int, default=3, help='Number of timed runs')
+    parser.add_argument('--compact', action='store_true', default=False, help='Write .json archives compactly')
+    parser.add_argument('--tmpdir', action='store', help='Directory for the archives written')
+    args = parser.parse_args(argv[1:])
+
+    formats = args.formats if args.formats else defaultFormats()
+    try :
+        for ext in formats :
+            tweetStore.formatOf('x' + ext)
+        tweets = list(tweetStore.readTweets(args.inpfile))
+    except ValueError as err :
+        print 'Unknown extension {}'.format(err)
+        return 1
+
+    print '{} tweets, JSON by {}, pickle protocol {}'.format(len(tweets),
+        jsonBackend.current.name, tweetStore.pickleProtocol)
+    print '{:<14} {:>10} {:>7} {:>9} {:>9}'.format('Format', 'MB', 'Ratio', 'Save s', 'Load s')
+
+    workdir = tempfile.mkdtemp(prefix='bencharchive', dir=args.tmpdir)
+    try :
+        base = None
+        for ext in formats :
+            size, save, load = timeFormat(tweets, os.path.join(workdir, 'tweets' + ext),
+                args.repeat, args.compact)
+            base = base if base else size
+            print '{:<14} {:>10.1f} {:>7.2f} {:>9.2f} {:>9.2f}'.format(ext, size / 1e6,
+                float(size) / base, save, load)
+    finally :
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# *****************************************************************************
+#   Micro-benchmark of the rendering of tweet text in writeHTML.py, timing
+#   the entity-index renderer (tweetText) against the regular expression
+#   path it replaced (regexText) on the same tweets.
+#
+#   The tweets come from an archive file if one is given, otherwise from a
+#   synthetic capture made by synthTweets.py, with the URLs, mentions,
+#   hashtags, escaped characters and retweets of real ones.
+#
+#   The tweets are timed a chunk at a time and the best time of each chunk
+#   is kept, so that a burst of load on the machine spoils one chunk of one
+#   run rather than a whole run.
+#
+#   Simplest usage: python benchRender.py [INPUT-FILENAME]
+#
+#   options:
+#       -h | --help    Print help information
+#       -n | --count   Number of synthetic tweets (default 10000)
+#       -r | --repeat  Number of timed runs, of which the best of each chunk
+#                      is kept (default 10)
+#
+#   Keith Eric Grant (keg@ramblemuse.com)
+#   18 Oct 2026
+#
+# *****************************************************************************
+
+import sys
+import argparse
+import time
+import tweetStore
+import synthTweets
+import writeHTML
+
+
+myName  = 'benchRender.py'
+version = '1.1.0'
+
+
+def fallback (tweet) :
+    """True if tweetText renders a tweet with the regular expression"""
+    tweet = tweet.get('retweeted_status', tweet)
+    try :
+        return writeHTML.entityText(tweet['text'], tweet['entities']) is None
+    except (KeyError, TypeError, ValueError) :
+        return True
+
+
+def timeRenderers (renderers, tweets, repeat, chunk=250) :
+    """Time of each renderer on every tweet, as the sum over chunks of tweets
+    of the best time of several runs on each chunk. The renderers take turns
+    on each chunk so that both see the same machine load, each running it
+    twice in a row so that neither finds it warmed by the other."""
+    chunks = [tweets[x:x+chunk] for x in range(0, len(tweets), chunk)]
+    best = [[None] * len(chunks) for _ in renderers]
+    for _ in range((repeat + 1) // 2) :
+        for number, part in enumerate(chunks) :
+            for ix, render in enumerate(renderers) :
+                for _ in range(2) :
+                    start = time.time()
+                    for tweet in part :
+                        render(tweet)
+                    elapsed = time.time() - start
+                    if best[ix][number] is None or elapsed < best[ix][number] :
+                        best[ix][number] = elapsed
+    return [sum(x) for x in best]
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+
+    parser = argparse.ArgumentParser(
+        prog=myName,
+        description='Time the rendering of tweet text',
+        version=version)
+    parser.add_argument('inpfile', action='store', nargs='?', help='Input tweet filename')
+    parser.add_argument('--count', '-n', action='store', type=int, default=10000, help='Number of synthetic tweets')
+    parser.add_argument('--repeat', '-r', action='store', type=int, default=10, help='Number of timed runs')
+    args = parser.parse_args(argv[1:])
+
+    if args.inpfile :
+        tweets = list(tweetStore.readTweets(args.inpfile))
+    else :
+        tweets = list(synthTweets.synthTweets(args.count))
+
+    fallbacks = sum([1 for x in tweets if fallback(x)])
+
+    regex, entity = timeRenderers([writeHTML.regexText, writeHTML.tweetText],
+        tweets, args.repeat)
+
+    print '{} tweets, {} rendered by the regular expression fallback'.format(len(tweets), fallbacks)
+    print 'regexText:  {:8.2f} us/tweet'.format(1e6 * regex / len(tweets))
+    print 'tweetText:  {:8.2f} us/tweet'.format(1e6 * entity / len(tweets))
+    print 'speedup:    {:8.2f}x'.format(regex / entity if entity else 0)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
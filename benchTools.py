@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+# *****************************************************************************
+#   Benchmark suite for the tools, run on synthetic captures made by
+#   synthTweets.py at one or more sizes. Each phase of the tools is timed
+#   on its own, streaming from a JSON Lines capture as the tools do:
+#
+#       load    read every tweet (tweetStore.readTweets)
+#       sort    sort into ascending ID order (tweetSort.sortTweets)
+#       dedupe  drop the repeats from two overlapping captures read one
+#               after the other (tweetStore.dedupe)
+#       merge   merge the two overlapping captures by ID, dropping repeats
+#               (tweetSort.mergeSorted and dedupeAdjacent)
+#       filter  apply a filter expression (tweetFilter.compileFilter)
+#       csv     write the CSV summary (writeCSV.csvRow)
+#       html    stream the HTML page (writeHTML.writePage)
+#       render  build the page in an in-memory htmlWrapper document and
+#               write it out, as writeHTML did before streaming
+#
+#   Every phase runs in a process of its own, so the peak memory it reports
+#   is its own and not left over from an earlier phase. Each phase is timed
+#   --repeat times, in rounds over the phases so that a slow spell of the
+#   machine is shared out among them, and the best wall time is the one
+#   reported and compared, with the median beside it to show the spread.
+#   The wall and CPU seconds and the peak memory of each phase are printed
+#   as a table for each size and can be saved as JSON, along with the git
+#   revision, so that the runs of two revisions can be compared with
+#   --compare.
+#
+#   The captures are kept in the work directory, if one is given, and made
+#   again only when missing.
+#
+#   Simplest usage: python benchTools.py
+#
+#   options:
+#       -h | --help    Print help information
+#       -n | --scale   Number of tweets in a capture (may be repeated;
+#                      default 1000, 10000 and 100000)
+#       -p | --phase   Phase to time (may be repeated; default all of them)
+#       -r | --repeat  Times to time each phase, keeping the best (default 3)
+#       --seed         Random seed of the captures (default 1)
+#       --workdir      Directory to keep the captures in (default a
+#                      temporary one, removed afterwards)
+#       --json         File to save the results in, as JSON
+#       --label        Label saved with the results (default the revision)
+#       --compare      Results saved earlier to compare these with
+#       --threshold    Slowdown, as a fraction, beyond which a phase counts
+#                      as a regression (default 0.10); any makes the exit
+#                      status 1
+#       --runsize      Tweets per sorted run for the sort phase
+#
+#   Keith Eric Grant (keg@ramblemuse.com)
+#   18 Oct 2026
+#       Time each phase --repeat times and report the best, so that one
+#       slow run isn't taken for a regression.
+#
+# *****************************************************************************
+
+import sys
+import os
+import argparse
+import codecs
+import itertools
+import json
+import multiprocessing
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+import jsonBackend
+import synthTweets
+import tweetFilter
+import tweetSort
+import tweetStore
+import writeCSV
+import writeHTML
+import htmlWrapper
+
+try :
+    import resource
+except ImportError :
+    resource = None
+
+
+myName  = 'benchTools.py'
+version = '1.0.1'
+
+defaultScales = [1000, 10000, 100000]
+
+defaultRepeat = 3
+
+# Share of the event held by each of the two overlapping captures
+overlapFirst = 0.55
+overlapLast  = 0.45
+
+filterExpression = 'not retweet and lang:en and retweets>=1'
+
+
+def captureNames(workdir, count, seed) :
+    """The whole capture and the two overlapping ones for a size"""
+    stem = os.path.join(workdir, 'synth-{}-{}'.format(count, seed))
+    return stem + '.jsonl', stem + '-a.jsonl', stem + '-b.jsonl'
+
+
+def makeCaptures(workdir, count, seed) :
+    """Write the captures for a size that aren't in the work directory"""
+    whole, first, last = captureNames(workdir, count, seed)
+    ranges = [(whole, 0, count), (first, 0, int(count * overlapFirst)),
+              (last, int(count * overlapLast), count)]
+    for filename, low, high in ranges :
+        if not os.path.exists(filename) :
+            partial = filename[:-len('.jsonl')] + '.part.jsonl'
+            tweetStore.writeTweets(partial, synthTweets.synthTweets(count, seed, low, high))
+            os.rename(partial, filename)
+
+
+def peakMB() :
+    """Peak resident memory of this process in MB, or None if unknown"""
+    if resource is None :
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux gives kilobytes, OS X bytes
+    return peak / (1024.0 * 1024.0) if sys.platform == 'darwin' else peak / 1024.0
+
+
+class nullWriter(object) :
+    """Output that only counts the characters written to it"""
+
+    def __init__(self) :
+        self.size = 0
+
+    def write(self, text) :
+        self.size += len(text)
+
+
+# The phases, each taking the capture names, a scratch directory and the
+# settings, and returning the number of tweets it handled
+
+def loadPhase(names, scratch, settings) :
+    return sum(1 for _ in tweetStore.readTweets(names[0]))
+
+
+def sortPhase(names, scratch, settings) :
+    tweets = tweetSort.sortTweets(tweetStore.readTweets(names[0]), False,
+        settings.get('runsize'), scratch)
+    return sum(1 for _ in tweets)
+
+
+def dedupePhase(names, scratch, settings) :
+    tweets = itertools.chain(tweetStore.readTweets(names[1]), tweetStore.readTweets(names[2]))
+    return sum(1 for _ in tweetStore.dedupe(tweets))
+
+
+def mergePhase(names, scratch, settings) :
+    streams = [tweetSort.ordered(tweetStore.readTweets(x), name=x) for x in names[1:]]
+    return sum(1 for _ in tweetSort.dedupeAdjacent(tweetSort.mergeSorted(streams)))
+
+
+def filterPhase(names, scratch, settings) :
+    keep = tweetFilter.compileFilter(filterExpression)
+    return sum(1 for x in tweetStore.readTweets(names[0]) if keep(x))
+
+
+def csvPhase(names, scratch, settings) :
+    count = 0
+    with codecs.open(os.path.join(scratch, 'tweets.csv'), mode='w', encoding='utf-8') as out :
+        out.write(writeCSV.csvHeader)
+        for tweet in tweetStore.readTweets(names[0]) :
+            out.write(writeCSV.csvRow(tweet))
+            count += 1
+    return count
+
+
+def htmlPhase(names, scratch, settings) :
+    with codecs.open(os.path.join(scratch, 'tweets.html'), mode='w', encoding='utf-8') as out :
+        return writeHTML.writePage(out, tweetStore.readTweets(names[0]))
+
+
+def renderPhase(names, scratch, settings) :
+    count = [0]
+
+    def fill (doc_tweets) :
+        for tweet in tweetStore.readTweets(names[0]) :
+            writeHTML.addTweet(doc_tweets, tweet)
+            count[0] += 1
+
+    doc = writeHTML.pageDocument(fill, htmlWrapper.document())
+    doc.write(nullWriter())
+    return count[0]
+
+
+phases = [('load', loadPhase), ('sort', sortPhase), ('dedupe', dedupePhase),
+          ('merge', mergePhase), ('filter', filterPhase), ('csv', csvPhase),
+          ('html', htmlPhase), ('render', renderPhase)]
+phaseNames = [x[0] for x in phases]
+
+
+def _runPhase(phase, names, scratch, settings, conn) :
+    """Body of the process timing one phase, sending back its result"""
+    try :
+        base = peakMB()
+        begin = os.times()
+        start = time.time()
+        tweets = dict(phases)[phase](names, scratch, settings)
+        wall = time.time() - start
+        end = os.times()
+        conn.send({'tweets' : tweets, 'wall' : wall,
+                   'cpu' : (end[0] - begin[0]) + (end[1] - begin[1]),
+                   'base_mb' : base, 'peak_mb' : peakMB()})
+    except Exception as err :
+        conn.send({'error' : '{}: {}'.format(type(err).__name__, err)})
+    finally :
+        conn.close()
+
+
+def timePhase(phase, names, workdir, settings) :
+    """Time one phase in a process of its own. A phase whose process dies
+    is reported as an error rather than ending the run."""
+    scratch = tempfile.mkdtemp(prefix='benchtools', dir=workdir)
+    recv, send = multiprocessing.Pipe(False)
+    try :
+        child = multiprocessing.Process(target=_runPhase,
+            args=(phase, names, scratch, settings, send))
+        child.start()
+        send.close()
+        try :
+            result = recv.recv()
+        except EOFError :
+            result = None
+        child.join()
+        if result is None :
+            result = {'error' : 'process ended with status {}'.format(child.exitcode)}
+        return result
+    finally :
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def bestOf(runs) :
+    """One result from the runs of a phase: the run with the best wall
+    time, with the median wall time of them all and the highest peak"""
+    failed = [x for x in runs if 'error' in x]
+    if failed :
+        return failed[0]
+    walls = sorted(x['wall'] for x in runs)
+    middle = len(walls) // 2
+    median = walls[middle] if len(walls) % 2 else (walls[middle - 1] + walls[middle]) / 2.0
+    peaks = [x['peak_mb'] for x in runs if x['peak_mb'] is not None]
+    best = min(runs, key=lambda x : x['wall'])
+    return dict(best, median=median, walls=[x['wall'] for x in runs],
+                peak_mb=max(peaks) if peaks else None)
+
+
+def _makeCaptures(workdir, count, seed) :
+    """Make the captures in a process of their own, so the memory used in
+    making them isn't counted in the peaks of the phases"""
+    child = multiprocessing.Process(target=makeCaptures, args=(workdir, count, seed))
+    child.start()
+    child.join()
+    if child.exitcode :
+        raise IOError('Making the captures of {} tweets failed'.format(count))
+
+
+def revision() :
+    """The git revision of the tools, marked + if they have changes, or None"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    try :
+        with open(os.devnull, 'w') as null :
+            rev = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=here, stderr=null).strip()
+            changed = subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'],
+                cwd=here, stderr=null).strip()
+    except (OSError, subprocess.CalledProcessError) :
+        return None
+    return rev + ('+' if changed else '')
+
+
+def printTable(count, results) :
+    print
+    print '{} tweets'.format(count)
+    print '{:<8} {:>8} {:>9} {:>9} {:>9} {:>10} {:>9}'.format('Phase', 'Tweets', 'Best s',
+        'Median s', 'CPU s', 'us/tweet', 'Peak MB')
+    for phase, result in results :
+        if 'error' in result :
+            print '{:<8} {}'.format(phase, result['error'])
+            continue
+        peak = result['peak_mb']
+        print '{:<8} {:>8} {:>9.2f} {:>9.2f} {:>9.2f} {:>10.1f} {:>9}'.format(phase, result['tweets'],
+            result['wall'], result['median'], result['cpu'], 1e6 * result['wall'] / count,
+            '{:.1f}'.format(peak) if peak is not None else '-')
+
+
+def compareRuns(old, new, threshold) :
+    """Print the changes in the best time and the memory of each phase
+    timed in both runs. Returns the number of phases slower by more than the
+    threshold."""
+    before = dict(((x['scale'], x['phase']), x) for x in old['results'] if 'error' not in x)
+    print
+    print 'Compared with {}'.format(old.get('label') or old.get('revision'))
+    print '{:>8} {:<8} {:>9} {:>9} {:>8} {:>9}'.format('Tweets', 'Phase', 'Was s', 'Now s',
+        'Change', 'Peak MB')
+    slower = 0
+    for result in new['results'] :
+        key = (result['scale'], result['phase'])
+        if key not in before or 'error' in result :
+            continue
+        was = before[key]
+        change = (result['wall'] - was['wall']) / was['wall'] if was['wall'] else 0.0
+        flag = ''
+        if change > threshold :
+            flag = '  slower'
+            slower += 1
+        peak = '-'
+        if result['peak_mb'] is not None and was['peak_mb'] is not None :
+            peak = '{:+.1f}'.format(result['peak_mb'] - was['peak_mb'])
+        print '{:>8} {:<8} {:>9.2f} {:>9.2f} {:>+7.0f}% {:>9}{}'.format(key[0], key[1],
+            was['wall'], result['wall'], 100 * change, peak, flag)
+    return slower
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+
+    parser = argparse.ArgumentParser(
+        prog=myName,
+        description='Time each phase of the tools on synthetic captures',
+        version=version)
+    parser.add_argument('--scale', '-n', action='append', type=int, dest='scales', default=[], help='Number of tweets in a capture')
+    parser.add_argument('--phase', '-p', action='append', dest='phases', default=[], choices=phaseNames, help='Phase to time')
+    parser.add_argument('--repeat', '-r', action='store', type=int, default=defaultRepeat, help='Times to time each phase, keeping the best')
+    parser.add_argument('--seed', action='store', type=int, default=1, help='Random seed of the captures')
+    parser.add_argument('--workdir', action='store', help='Directory to keep the captures in')
+    parser.add_argument('--json', action='store', dest='jsonfile', help='File to save the results in')
+    parser.add_argument('--label', action='store', help='Label saved with the results')
+    parser.add_argument('--compare', action='store', help='Results saved earlier to compare with')
+    parser.add_argument('--threshold', action='store', type=float, default=0.10, help='Slowdown counted as a regression')
+    parser.add_argument('--runsize', action='store', type=int, help='Tweets per sorted run')
+    args = parser.parse_args(argv[1:])
+
+    scales = args.scales if args.scales else defaultScales
+    if args.repeat < 1 :
+        print '--repeat must be at least 1'
+        return 1
+    chosen = [x for x in phaseNames if x in args.phases] if args.phases else phaseNames
+
+    old = None
+    if args.compare :
+        try :
+            with open(args.compare) as inp :
+                old = json.load(inp)
+        except (IOError, ValueError) as err :
+            print 'Can\'t read {}: {}'.format(args.compare, err)
+            return 1
+
+    rev = revision()
+    run = {'tool' : myName, 'version' : version, 'label' : args.label or rev,
+           'revision' : rev, 'python' : platform.python_version(),
+           'platform' : platform.platform(), 'json' : jsonBackend.current.name,
+           'seed' : args.seed, 'repeat' : args.repeat, 'created' : time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+           'results' : []}
+    print 'Revision {}, Python {}, JSON by {}'.format(rev, run['python'], run['json'])
+
+    settings = {'runsize' : args.runsize}
+    workdir = args.workdir if args.workdir else tempfile.mkdtemp(prefix='benchtools')
+    try :
+        if not os.path.isdir(workdir) :
+            os.makedirs(workdir)
+        for count in scales :
+            _makeCaptures(workdir, count, args.seed)
+            names = captureNames(workdir, count, args.seed)
+            runs = dict((x, []) for x in chosen)
+            for _ in range(args.repeat) :
+                for phase in chosen :
+                    runs[phase].append(timePhase(phase, names, workdir, settings))
+            results = [(x, bestOf(runs[x])) for x in chosen]
+            for phase, result in results :
+                run['results'].append(dict(result, scale=count, phase=phase))
+            printTable(count, results)
+    except (IOError, OSError) as err :
+        print err
+        return 1
+    finally :
+        if not args.workdir :
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.jsonfile :
+        with open(args.jsonfile, 'w') as out :
+            json.dump(run, out, indent=2, sort_keys=True)
+            out.write('\n')
+
+    if old and compareRuns(old, run, args.threshold) :
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+# ******************************************************************************
+#   An append-only journal of hashtag searches, used by getConfHashtag.py so
+#   that a long capture survives a crash. Each page of search results is
+#   written to the journal and synced to disk as soon as it arrives, along
+#   with the max_id/since_id cursor that fetched it.
+#
+#   The journal is a JSON Lines file of records:
+#
+#       {"type": "start", "session": N, "hashtag": ..., "since_id": ...}
+#       {"type": "page", "session": N, "max_id": ..., "since_id": ..., "statuses": [...]}
+#       {"type": "end", "session": N, "count": ..., "max_id": ...}
+#       {"type": "folded", "session": N, "hashtag": ..., "count": ...,
+#        "max_id": ..., "into": FILENAME}
+#
+#   Sessions are numbered in the order they start. The "hashtag" is the
+#   search query, so a search for several hashtags keeps one session per
+#   packed query, and their records may interleave when one is resumed. A
+#   capture's start record is written with its first page, so a search that
+#   finds nothing leaves nothing in the journal.
+#
+#   A capture that has a start record but no end record was interrupted and
+#   can be resumed from the oldest tweet it holds. Finished captures of a
+#   query give the highest archived ID to use as the lower limit of the next
+#   one, and together hold every tweet captured for it. A partial last line
+#   left by a crash is discarded when the journal opens.
+#
+#   Once the tweets of finished captures are written to an output archive,
+#   fold rewrites the journal without their records and with a folded record
+#   naming the archive instead, so the journal doesn't grow into a second
+#   copy of it. The folded records keep the highest archived ID, and tell a
+#   rerun which archives hold the tweets of the captures folded away.
+#
+#   18 Oct 2026
+#
+# ******************************************************************************
+
+import os
+import simplejson as json
+
+
+class session(object) :
+    """Summary of one capture recorded in the journal"""
+
+    def __init__(self, number, hashtag, since_id, offset=None) :
+        self.number   = number
+        self.hashtag  = hashtag
+        self.since_id = since_id
+        self.offset   = offset
+        self.pages    = 0
+        self.count    = 0
+        self.minID    = None
+        self.maxID    = None
+        self.complete = False
+
+    def cursor(self) :
+        """The max_id for the next search page of this capture"""
+        return self.minID - 1 if self.minID is not None else None
+
+    def addPage(self, statuses) :
+        ids = [x['id'] for x in statuses]
+        self.pages += 1
+        self.count += len(ids)
+        if ids :
+            lo, hi = min(ids), max(ids)
+            self.minID = lo if self.minID is None else min(self.minID, lo)
+            self.maxID = max(self.maxID, hi)
+
+
+class journal(object) :
+    """Append-only capture journal. Opening it scans any existing records to
+    find interrupted captures and the highest ID of the finished ones."""
+
+    def __init__(self, filename) :
+        self.filename = filename
+        self._load()
+
+    def _load(self) :
+        filename = self.filename
+        self.current  = None
+        self.sessions = 0
+        self.open     = {}
+        self.archived = {}
+        self.finished = {}
+        self.folded   = {}
+
+        good = 0
+        if os.path.exists(filename) :
+            with open(filename, 'rb') as inp :
+                for line in inp :
+                    if not line.endswith('\n') :
+                        break
+                    try :
+                        record = json.loads(line)
+                    except ValueError :
+                        break
+                    self._replay(record, good)
+                    good += len(line)
+
+            # Drop anything after the last complete record
+            if good < os.path.getsize(filename) :
+                with open(filename, 'r+b') as out :
+                    out.truncate(good)
+
+        self.out = open(filename, 'ab')
+
+    def _replay(self, record, offset) :
+        kind = record['type']
+        if kind == 'start' :
+            self.sessions = max(self.sessions, record['session'] + 1)
+            self.open[record['hashtag']] = session(record['session'],
+                record['hashtag'], record['since_id'], offset)
+            return
+        if kind == 'folded' :
+            self.sessions = max(self.sessions, record['session'] + 1)
+            hashtag = record['hashtag']
+            self.archived[hashtag] = max(self.archived.get(hashtag), record['max_id'])
+            self.folded.setdefault(hashtag, []).append(record)
+            return
+        for capture in self.open.values() :
+            if capture.number == record['session'] :
+                if kind == 'page' :
+                    capture.addPage(record['statuses'])
+                elif kind == 'end' :
+                    self._close(capture)
+                return
+
+    def _close(self, capture) :
+        capture.complete = True
+        if self.open.get(capture.hashtag) is capture :
+            del self.open[capture.hashtag]
+        self.archived[capture.hashtag] = max(self.archived.get(capture.hashtag), capture.maxID)
+        self.finished.setdefault(capture.hashtag, []).append(capture)
+
+    def _append(self, record) :
+        self.out.write(json.dumps(record, separators=(',', ':')))
+        self.out.write('\n')
+        self.out.flush()
+        os.fsync(self.out.fileno())
+
+    def pending(self, hashtag) :
+        """Return the interrupted capture of a hashtag, if there is one"""
+        return self.open.get(hashtag)
+
+    def archivedMax(self, hashtag) :
+        """Highest tweet ID from the finished captures of a hashtag"""
+        return self.archived.get(hashtag)
+
+    def captures(self, hashtag) :
+        """The finished captures of a hashtag, oldest first"""
+        return list(self.finished.get(hashtag, []))
+
+    def foldedInto(self, hashtag) :
+        """The archives holding the tweets of a hashtag's folded captures"""
+        names = []
+        for record in self.folded.get(hashtag, []) :
+            if record['into'] not in names :
+                names.append(record['into'])
+        return names
+
+    def fold(self, captures, filename, hashtags=()) :
+        """Rewrite the journal without the records of finished captures whose
+        tweets are now in the archive filename, leaving a folded record for
+        each hashtag they were of. Earlier folded records into the same
+        archive are merged into it, as are those of hashtags, whose tweets
+        the archive holds as well. Abandoned captures are dropped along the
+        way."""
+        captures = [x for x in captures if x.complete]
+        hashtags = set(hashtags)
+        dropped  = set(x.number for x in captures)
+        kept     = set(x.number for x in self.open.values())
+        kept    |= set(x.number for done in self.finished.values() for x in done) - dropped
+        folded   = {}
+
+        def add(hashtag, number, count, maxID) :
+            record = folded.setdefault(hashtag, {'type' : 'folded', 'session' : number,
+                'hashtag' : hashtag, 'count' : 0, 'max_id' : None, 'into' : filename})
+            record['session'] = max(record['session'], number)
+            record['count'] += count
+            record['max_id'] = max(record['max_id'], maxID)
+
+        for capture in captures :
+            add(capture.hashtag, capture.number, capture.count, capture.maxID)
+        merged = set()
+        for hashtag, records in self.folded.items() :
+            for record in records :
+                if hashtag in hashtags or (hashtag in folded and record['into'] == filename) :
+                    add(hashtag, record['session'], record['count'], record['max_id'])
+                    merged.add(record['session'])
+        if not folded :
+            return
+
+        # The journal is written afresh beside the old one and renamed over
+        # it, so a crash leaves one or the other whole.
+        self.out.close()
+        partial = self.filename + '.partial'
+        with open(self.filename, 'rb') as inp :
+            with open(partial, 'wb') as out :
+                for line in inp :
+                    record = json.loads(line)
+                    if record['type'] == 'folded' :
+                        if record['session'] in merged :
+                            continue
+                    elif record['session'] not in kept :
+                        continue
+                    out.write(line)
+                for record in sorted(folded.values(), key=lambda x: x['session']) :
+                    out.write(json.dumps(record, separators=(',', ':')))
+                    out.write('\n')
+                out.flush()
+                os.fsync(out.fileno())
+        os.rename(partial, self.filename)
+        self._load()
+
+    def resume(self, capture) :
+        """Continue recording an interrupted capture"""
+        self.current = capture
+        return capture
+
+    def begin(self, hashtag, since_id) :
+        """Start recording a new capture, abandoning any interrupted one of
+        the same hashtag. The start record waits for the first page, so a
+        capture that finds nothing leaves no records, unless it abandons an
+        interrupted one."""
+        abandons = hashtag in self.open
+        self.current = session(None, hashtag, since_id)
+        self.open[hashtag] = self.current
+        if abandons :
+            self._start()
+        return self.current
+
+    def _start(self) :
+        self.out.seek(0, os.SEEK_END)
+        self.current.number = self.sessions
+        self.current.offset = self.out.tell()
+        self.sessions += 1
+        self._append({'type' : 'start', 'session' : self.current.number,
+            'hashtag' : self.current.hashtag, 'since_id' : self.current.since_id})
+
+    def addPage(self, max_id, since_id, statuses) :
+        """Record a page of search results before they're used"""
+        if self.current.offset is None :
+            self._start()
+        self._append({'type' : 'page', 'session' : self.current.number,
+            'max_id' : max_id, 'since_id' : since_id, 'statuses' : statuses})
+        self.current.addPage(statuses)
+
+    def finish(self) :
+        """Mark the current capture as complete. One that recorded nothing
+        is just dropped."""
+        capture = self.current
+        if capture.offset is None :
+            if self.open.get(capture.hashtag) is capture :
+                del self.open[capture.hashtag]
+            return
+        self._append({'type' : 'end', 'session' : capture.number,
+            'count' : capture.count, 'max_id' : capture.maxID})
+        self._close(capture)
+
+    def tweets(self, capture=None) :
+        """Generate the tweets of a capture, by default the current one,
+        from the journal"""
+        capture = capture if capture else self.current
+        if capture.offset is None :
+            return
+        self.out.flush()
+        with open(self.filename, 'rb') as inp :
+            inp.seek(capture.offset)
+            for line in inp :
+                record = json.loads(line)
+                if record.get('session') != capture.number :
+                    continue
+                if record['type'] == 'page' :
+                    for tweet in record['statuses'] :
+                        yield tweet
+                elif record['type'] == 'end' :
+                    break
+
+    def close(self) :
+        self.out.close()
@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+# *****************************************************************************
+#   This routine summarizes who contributed to a conversation and how the
+#   contributors connect. For each user it counts original tweets, retweets
+#   given and received, quotes given and received, replies, mentions
+#   received and favorites received, and it builds a weighted, directed
+#   graph with an edge from each poster to every user they mention, retweet
+#   or quote.
+#
+#   Users are numbered as they're first seen, and each edge is noted as one
+#   packed integer (source, target and kind) in a flat array while the
+#   archive streams past. At the end the edges are counting-sorted by source
+#   into a second flat array, and each user's edges sorted and run-length
+#   counted into compressed adjacency arrays: the targets, kinds and weights
+#   of every edge in source order, and the offset of each user's first edge.
+#   That keeps a few bytes per edge rather than Python objects, so graphs of
+#   millions of edges fit in memory.
+#
+#   The graph can be written as an edge list or GraphML for NetworkX, e.g.
+#
+#       networkx.read_edgelist('edges.txt', create_using=networkx.MultiDiGraph(),
+#           data=(('weight', int), ('kind', str)))
+#       networkx.read_graphml('graph.graphml')
+#
+#   and the top users by weighted in-degree, out-degree and PageRank are
+#   printed.
+#
+#   Simplest usage: python contributorGraph.py INPUT-FILENAME
+#
+#   options:
+#       -h | --help      Print help information
+#       -c | --csv       CSV-FILENAME of the contributions of each user
+#       -e | --edges     EDGE-LIST-FILENAME
+#       -g | --graphml   GRAPHML-FILENAME
+#       -k | --top       Number of users in each top list (default 10)
+#       --user, --since, --until, --tz, --match, --limit, --sorted, --columns
+#                        Select tweets by poster, time, text or count
+#       --profile, --cprofile
+#                        Save the time and memory of each phase as JSON, or
+#                        cProfile statistics (see tweetProfile.py)
+#
+#   Keith Eric Grant (keg@ramblemuse.com)
+#   18 Oct 2026
+#
+# *****************************************************************************
+
+import sys
+import argparse
+import array
+import codecs
+import cgi
+import heapq
+import tweetStore
+import tweetArchive
+import tweetProfile
+
+
+myName  = 'contributorGraph.py'
+version = '1.0.1'
+
+# Kinds of edge, in the low bits of each packed edge
+edgeKinds = ('mention', 'retweet', 'quote')
+MENTION, RETWEET, QUOTE = range(len(edgeKinds))
+kindBits = 2
+userBits = 31
+
+# Per-user contribution counts, in CSV column order
+statNames = ('originals', 'retweets', 'retweeted', 'quotes', 'quoted',
+             'replies', 'mentioned', 'favorited')
+
+
+def _edgeArray() :
+    """A flat array for packed edges, or a list where longs are too short"""
+    codes = array.array('L')
+    return codes if codes.itemsize * 8 >= 2 * userBits + kindBits else []
+
+
+class contributorGraph(object) :
+    """Contribution counts and the mention/retweet/quote graph of a stream
+    of tweets. Call add for each tweet and then finish, which builds the
+    adjacency arrays."""
+
+    def __init__(self) :
+        self.ids     = {}                  # User number by lowercase screen name
+        self.names   = []                  # Screen name of each user
+        self.stats   = dict((x, array.array('l')) for x in statNames)
+        self.codes   = _edgeArray()
+        self.tweets  = 0
+        self.offsets = None
+
+    def user(self, name) :
+        """Number of a user, adding them if they're new"""
+        key = name.lower()
+        id = self.ids.get(key)
+        if id is None :
+            id = self.ids[key] = len(self.names)
+            self.names.append(name)
+            for counts in self.stats.itervalues() :
+                counts.append(0)
+        return id
+
+    def _edge(self, source, target, kind) :
+        self.codes.append((((source << userBits) | target) << kindBits) | kind)
+
+    def add(self, tweet) :
+        self.tweets += 1
+        stats = self.stats
+        poster = self.user(tweet['user']['screen_name'])
+
+        if 'retweeted_status' in tweet :
+            # The entities of a retweet are those of the original, so only
+            # the retweet itself is an edge.
+            original = self.user(tweet['retweeted_status']['user']['screen_name'])
+            stats['retweets'][poster] += 1
+            stats['retweeted'][original] += 1
+            self._edge(poster, original, RETWEET)
+            return
+
+        stats['originals'][poster] += 1
+        stats['favorited'][poster] += tweet.get('favorite_count') or 0
+        if tweet.get('in_reply_to_status_id') is not None :
+            stats['replies'][poster] += 1
+        if 'quoted_status' in tweet :
+            quoted = self.user(tweet['quoted_status']['user']['screen_name'])
+            stats['quotes'][poster] += 1
+            stats['quoted'][quoted] += 1
+            self._edge(poster, quoted, QUOTE)
+        for mention in tweet.get('entities', {}).get('user_mentions', ()) :
+            target = self.user(mention['screen_name'])
+            stats['mentioned'][target] += 1
+            self._edge(poster, target, MENTION)
+
+    def finish(self) :
+        """Sort and count the packed edges into compressed adjacency arrays:
+        the edges of user u are targets, kinds and weights from offsets[u]
+        to offsets[u+1]"""
+
+        users = len(self.names)
+        codes = self.codes
+        self.codes = None
+        sourceShift = kindBits + userBits
+
+        # Counting sort by source into a second flat array of the same
+        # kind (repeating a slice of one edge makes one of the same length),
+        # so that only one user's edges at a time become Python longs.
+        starts = array.array('l', [0] * (users + 1))
+        for code in codes :
+            starts[(code >> sourceShift) + 1] += 1
+        for ix in xrange(users) :
+            starts[ix + 1] += starts[ix]
+        place = array.array('l', starts)
+        bySource = codes[:1] * len(codes)
+        for code in codes :
+            source = code >> sourceShift
+            bySource[place[source]] = code
+            place[source] += 1
+        del codes, place
+
+        self.offsets = array.array('l', [0] * (users + 1))
+        self.targets = array.array('l')
+        self.kinds   = array.array('b')
+        self.weights = array.array('l')
+
+        userMask = (1 << userBits) - 1
+        kindMask = (1 << kindBits) - 1
+        for source in xrange(users) :
+            last = None
+            for code in sorted(bySource[starts[source]:starts[source + 1]]) :
+                if code == last :
+                    self.weights[-1] += 1
+                    continue
+                last = code
+                self.offsets[source + 1] += 1
+                self.targets.append((code >> kindBits) & userMask)
+                self.kinds.append(code & kindMask)
+                self.weights.append(1)
+        del bySource
+
+        for ix in xrange(users) :
+            self.offsets[ix + 1] += self.offsets[ix]
+
+    def edges(self) :
+        """Generate (source, target, kind, weight) for every edge"""
+        offsets, targets, kinds, weights = self.offsets, self.targets, self.kinds, self.weights
+        for source in xrange(len(self.names)) :
+            for ix in xrange(offsets[source], offsets[source + 1]) :
+                yield source, targets[ix], kinds[ix], weights[ix]
+
+    def degrees(self) :
+        """Weighted out-degree and in-degree of every user"""
+        outs = array.array('l', [0] * len(self.names))
+        ins  = array.array('l', [0] * len(self.names))
+        for source, target, kind, weight in self.edges() :
+            outs[source] += weight
+            ins[target] += weight
+        return outs, ins
+
+    def pagerank(self, damping=0.85, iterations=30, tolerance=1e-8) :
+        """Weighted PageRank of every user by power iteration over the
+        adjacency arrays. Users without edges out share their rank with
+        everyone."""
+
+        users = len(self.names)
+        if not users :
+            return []
+        outs = self.degrees()[0]
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        rank = [1.0 / users] * users
+        for _ in range(iterations) :
+            spread = [0.0] * users
+            dangling = 0.0
+            for source in xrange(users) :
+                if outs[source] == 0 :
+                    dangling += rank[source]
+                    continue
+                share = rank[source] / outs[source]
+                for ix in xrange(offsets[source], offsets[source + 1]) :
+                    spread[targets[ix]] += share * weights[ix]
+            base = (1.0 - damping + damping * dangling) / users
+            new = [base + damping * x for x in spread]
+            change = sum(abs(x - y) for x, y in zip(new, rank))
+            rank = new
+            if change < tolerance :
+                break
+        return rank
+
+
+def topUsers(values, top) :
+    """Numbers of the users with the highest values, highest first"""
+    return heapq.nlargest(top, xrange(len(values)), key=values.__getitem__)
+
+
+def writeContributions(filename, graph) :
+    with codecs.open(filename, mode='w', encoding='utf-8') as out :
+        out.write(u'Screen Name,' + u','.join(x.capitalize() for x in statNames) + u'\n')
+        for user, name in enumerate(graph.names) :
+            out.write(name + u',' + u','.join(unicode(graph.stats[x][user]) for x in statNames) + u'\n')
+
+
+def writeEdgeList(filename, graph) :
+    """Edges as lines of "source target weight kind" """
+    names = graph.names
+    with codecs.open(filename, mode='w', encoding='utf-8') as out :
+        for source, target, kind, weight in graph.edges() :
+            out.write(u'{} {} {} {}\n'.format(names[source], names[target], weight, edgeKinds[kind]))
+
+
+def writeGraphML(filename, graph) :
+    """GraphML with the contribution counts on the nodes and the kind and
+    weight of each edge"""
+    names = graph.names
+    with codecs.open(filename, mode='w', encoding='utf-8') as out :
+        out.write(u'<?xml version="1.0" encoding="UTF-8"?>\n'
+                  u'<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+        for stat in statNames :
+            out.write(u'  <key id="{0}" for="node" attr.name="{0}" attr.type="int"/>\n'.format(stat))
+        out.write(u'  <key id="weight" for="edge" attr.name="weight" attr.type="int"/>\n'
+                  u'  <key id="kind" for="edge" attr.name="kind" attr.type="string"/>\n'
+                  u'  <graph edgedefault="directed">\n')
+        for user, name in enumerate(names) :
+            out.write(u'    <node id="{}">'.format(cgi.escape(name, True)))
+            out.write(u''.join(u'<data key="{}">{}</data>'.format(x, graph.stats[x][user]) for x in statNames))
+            out.write(u'</node>\n')
+        for source, target, kind, weight in graph.edges() :
+            out.write(u'    <edge source="{}" target="{}"><data key="weight">{}</data>'
+                u'<data key="kind">{}</data></edge>\n'.format(cgi.escape(names[source], True),
+                cgi.escape(names[target], True), weight, edgeKinds[kind]))
+        out.write(u'  </graph>\n</graphml>\n')
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+
+    parser = argparse.ArgumentParser(
+        prog=myName,
+        description='Count contributions and build the mention/retweet/quote graph',
+        version=version)
+    parser.add_argument('inpfile', action='store', help='Input tweet filename (.json, .jsonl, .pickle or .db)')
+    parser.add_argument('--csv', '-c', action='store', dest='csv', help='CSV output file of the contributions of each user')
+    parser.add_argument('--edges', '-e', action='store', dest='edges', help='Edge list output file')
+    parser.add_argument('--graphml', '-g', action='store', dest='graphml', help='GraphML output file')
+    parser.add_argument('--top', '-k', action='store', type=int, default=10, help='Number of users in each top list')
+    tweetArchive.addQueryArguments(parser)
+    tweetProfile.addProfileArguments(parser)
+    args = parser.parse_args(argv[1:])
+    tweetProfile.start(myName, args)
+
+    try :
+        query = tweetArchive.queryArguments(args)
+    except ValueError as err :
+        print err
+        return 1
+
+    try :
+        tweets = tweetStore.selectTweets(args.inpfile, **query)
+    except ValueError as err :
+        print 'Unknown extension {}'.format(err)
+        return 1
+
+    graph = contributorGraph()
+    add = tweetProfile.current.function('transform', graph.add)
+    for tweet in tweets :
+        add(tweet)
+    with tweetProfile.current.phase('transform') :
+        graph.finish()
+    print '{}: {} tweets, {} users, {} edges ({} distinct)'.format(args.inpfile,
+        graph.tweets, len(graph.names), sum(graph.weights), len(graph.weights))
+
+    names = graph.names
+    outs, ins = graph.degrees()
+    lists = [('Originals', graph.stats['originals']),
+             ('Retweeted', graph.stats['retweeted']),
+             ('Mentioned', graph.stats['mentioned']),
+             ('Weighted in-degree', ins),
+             ('Weighted out-degree', outs)]
+    for title, values in lists :
+        print '\n{}'.format(title)
+        for user in topUsers(values, args.top) :
+            print u'{:8d}  {}'.format(values[user], names[user]).encode('utf-8')
+    with tweetProfile.current.phase('transform') :
+        rank = graph.pagerank()
+    print '\nPageRank'
+    for user in topUsers(rank, args.top) :
+        print u'{:8.5f}  {}'.format(rank[user], names[user]).encode('utf-8')
+
+    if args.csv :
+        with tweetProfile.current.phase('write') :
+            writeContributions(args.csv, graph)
+        print '\nWrote the contributions of {} users to {}'.format(len(names), args.csv)
+    if args.edges :
+        with tweetProfile.current.phase('write') :
+            writeEdgeList(args.edges, graph)
+        print 'Wrote {} edges to {}'.format(len(graph.weights), args.edges)
+    if args.graphml :
+        with tweetProfile.current.phase('write') :
+            writeGraphML(args.graphml, graph)
+        print 'Wrote the graph to {}'.format(args.graphml)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
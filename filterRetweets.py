@@ -5,6 +5,16 @@
 #   tweets captured by getConfHashtag.py The output is a filtered JSON or
 #   pickle file or both (default)
 #
+#   With --where, the tweets kept are instead those matching a filter
+#   expression (see tweetFilter.py), e.g.
+#
+#       --where "not retweet and lang:en and not users:blocked.txt"
+#
+#   and with --route, one pass over the input writes the tweets matching
+#   each of several expressions to their own files, e.g.
+#
+#       --route retweets.jsonl retweet --route originals.jsonl "not retweet"
+#
 #   Simplest usage: python filterRetweets.py INPUT-FILENAME
 #
 #   options:
@@ -15,18 +25,49 @@
 #       -a | --ascend Use ascending order if sort  is selected
 #       --nojson      No JSON output (default is output)
 #       --nopickle    No pickle file output (default is output)
+#       --compact     Write the JSON array compactly, a tweet per line
+#       --protocol    Pickle protocol (default the highest)
+#       --user, --since, --until, --tz, --match, --limit, --sorted, --columns
+#                     Select tweets by poster, time, text or count
+#       --profile, --cprofile
+#                     Save the time and memory of each phase as JSON, or
+#                     cProfile statistics (see tweetProfile.py)
+#       -w | --where  FILTER-EXPRESSION
+#                     Keep the tweets matching this instead of non-retweets
+#       -r | --route  FILENAME FILTER-EXPRESSION
+#                     Write the kept tweets matching the expression to the
+#                     file (may be repeated). Retweets are then kept unless
+#                     --where says otherwise, and the pickle and JSON files
+#                     are only written if named.
 #
 #   Keith Eric Grant (keg@ramblemuse.com)
+#   18 Oct 2026
+#       --profile saves the time and memory of each phase of the filter.
+#       Select with a filter expression (--where) compiled to one predicate
+#       that tries its cheapest tests first, and fan the tweets out to
+#       several files by expression (--route) in the same pass.
+#       --tz gives the zone of --since and --until (and of the times in
+#       filter expressions), and --sorted finds them by binary search in an
+#       input already in ID order.
+#       --columns selects and sorts a .jsonl input from its columnar
+#       sidecar, reading only the tweets selected.
+#       Added --compact JSON and --protocol; pickles now default to the
+#       highest protocol, and archives may be compressed by extension
+#       (.gz, .bz2 or .xz after the format's).
+#       Stream tweets through tweetStore. Also accepts .jsonl files.
+#       Select tweets with the query options. An SQLite (.db) archive
+#       answers the query, retweets included, from its indexes.
 #   10 Mar 2015
 #
 # *****************************************************************************
 
 import sys
-import os
 import argparse
-import simplejson as json
-import codecs
-import pickle
+import itertools
+import tweetStore
+import tweetArchive
+import tweetProfile
+import tweetFilter
 
 
 myName  = 'filtertweets'
@@ -46,51 +87,93 @@ def main(argv=None):
     parser.add_argument('--json',   '-j', action='store', dest='json', help='JSON output file name')
     parser.add_argument('--nojson',   action='store_true', default=False, help='No JSON output')
     parser.add_argument('--nopickle', action='store_true', default=False, help='No pickle output')
+    parser.add_argument('--compact', action='store_true', default=False, help='Write the JSON array compactly, a tweet per line')
+    parser.add_argument('--protocol', action='store', type=int, help='Pickle protocol (default: the highest)')
     parser.add_argument('--sort', '-s', action='store_true', dest='sort', default=False, help='Sort by decreasing ID')
     parser.add_argument('--ascend', '-a', action='store_true', dest='ascend', default=False, help='Use ascending sort')
+    parser.add_argument('--where', '-w', action='store', dest='where', help='Keep tweets matching this filter expression')
+    parser.add_argument('--route', '-r', action='append', nargs=2, dest='routes', default=[],
+        metavar=('FILENAME', 'FILTER'), help='Write kept tweets matching FILTER to FILENAME')
+    tweetArchive.addQueryArguments(parser)
+    tweetProfile.addProfileArguments(parser)
     args = parser.parse_args(argv[1:])
+    tweetProfile.start(myName, args)
 
     inpfile = args.inpfile
     sortem  = args.sort
 
     pickleFilename = args.pickle if args.pickle else 'noretweets.pickle'
     jsonFilename   = args.json if args.json else 'noretweets.json'
-    outputJSON     = not args.nojson
-    outputPickle   = not args.nopickle
+    outputJSON     = not args.nojson and (args.json or not args.routes)
+    outputPickle   = not args.nopickle and (args.pickle or not args.routes)
     descSort       = not args.ascend
 
-    # Load tweets from the input file, whether JSON or pickle.
-    ext = os.path.splitext(inpfile)[1].lower()
-    if ext == '.json' :
-        with codecs.open(inpfile, 'rb', 'utf-8') as inp :
-            tweets = json.load(inp)
-    elif ext == '.pickle' :
-        with open(inpfile, 'rb') as inp :
-            tweets = pickle.load(inp)
-    else :
-        print 'Unknown extension {}'.format(ext)
+    try :
+        query = tweetArchive.queryArguments(args)
+        keep = tweetFilter.compileFilter(args.where, args.tz) if args.where else None
+        routes = [([x], tweetFilter.compileFilter(y, args.tz)) for x, y in args.routes]
+    except ValueError as err :
+        print err
         return 1
 
-    print '{}: {} tweets'.format(inpfile, len(tweets))
-
-    # If this is a Twitter retweet, there's a status field
-    tweets = [x for x in tweets if not 'retweeted_status' in x]
-
-    print '{} tweets without retweets'.format(len(tweets))
+    # Stream the selected tweets from the input file, whether JSON, JSON
+    # Lines, pickle or an SQLite archive, which returns them already sorted.
+    # If this is a Twitter retweet, there's a status field, which an archive
+    # keeps as an indexed flag, as does the columnar sidecar of a JSON
+    # Lines file with --columns. A filter expression is applied as the
+    # tweets stream, ahead of any sorting and the limit.
+    limit = query.pop('limit')
+    ordered = query.pop('ordered')
+    columns = query.pop('columns')
+    if keep is None and not routes :
+        query['retweets'] = False
+    try :
+        indexed = tweetStore.formatOf(inpfile) == 'sqlite'
+        selected = indexed or (columns and tweetStore.hasColumns(inpfile))
+        if selected :
+            tweets = tweetStore.selectTweets(inpfile, descSort, sortem,
+                limit=None if keep else limit, columns=columns, **query)
+            if keep :
+                tweets = itertools.islice(itertools.ifilter(keep, tweets), limit)
+        else :
+            if ordered :
+                inp = tweetStore.readRange(inpfile, query['since'], query['until'])
+            else :
+                inp = tweetStore.readTweets(inpfile)
+            inp = tweetStore.counter(inp)
+            tweets = itertools.ifilter(keep, inp) if keep else inp
+            tweets = tweetStore.selectStream(tweets, descSort, sortem, limit, **query)
+    except ValueError as err :
+        print 'Unknown extension {}'.format(err)
+        return 1
 
-    if sortem :
+    if sortem and not indexed :
         print 'Sorting tweets'
-        tweets.sort(key=lambda x: x['id'], reverse=descSort)
 
+    outputs = []
     if outputPickle :
         print 'Writing pickle file {}'.format(pickleFilename)
-        with open(pickleFilename, 'wb') as out :
-            pickle.dump(tweets,out)
-
+        outputs.append(pickleFilename)
     if outputJSON :
         print 'Writing JSON file {}'.format(jsonFilename)
-        with codecs.open(jsonFilename, 'wb', 'utf-8') as out :
-            json.dump(tweets, out, indent=4, encoding='utf-8')
+        outputs.append(jsonFilename)
+    for filenames, _ in routes :
+        print 'Writing {}'.format(filenames[0])
+    shown = len(routes)
+    if outputs :
+        routes.insert(0, (outputs, lambda x: True))
+    total, counts = tweetFilter.routeTweets(routes, tweets, args.protocol, args.compact)
+
+    if not selected :
+        print '{}: {} tweets'.format(inpfile, inp.count)
+    if keep :
+        print '{} tweets matching {}'.format(total, args.where)
+    elif shown :
+        print '{} tweets routed'.format(total)
+    else :
+        print '{} tweets without retweets'.format(total)
+    for (filenames, _), count in zip(routes, counts)[len(routes) - shown:] :
+        print '{} tweets to {}'.format(count, filenames[0])
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+# ******************************************************************************
+#   A persistent cache of rendered HTML fragments, used by writeHTML.py so
+#   that rebuilding the page for a capture only renders the tweets that are
+#   new or have changed since the last build.
+#
+#   Fragments are kept in an SQLite file keyed by tweet ID, each with a hash
+#   of the tweet content it was rendered from. A fragment is used only if
+#   the hash still matches, and the whole cache is emptied when the renderer
+#   version it was built with changes. Each build is numbered, fragments note
+#   the last build that used them, and when the cache holds more than its
+#   limit the least recently used are evicted as it closes.
+#
+#   18 Oct 2026
+#
+# ******************************************************************************
+
+import hashlib
+import sqlite3
+import simplejson as json
+
+
+# Fragments kept by default
+defaultLimit = 500000
+
+schema = '''
+CREATE TABLE IF NOT EXISTS meta (
+    name  TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS fragments (
+    id    INTEGER PRIMARY KEY,
+    hash  TEXT,
+    used  INTEGER,
+    html  TEXT
+);
+CREATE INDEX IF NOT EXISTS fragments_used ON fragments (used);
+'''
+
+
+def contentHash(fields) :
+    """Hash of the JSON-serializable fields a fragment was rendered from"""
+    text = json.dumps(fields, separators=(',', ':'))
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class fragmentCache(object) :
+    """Rendered fragments for one renderer version. get and put are batched
+    into the database; close writes them, evicts down to limit fragments
+    and commits."""
+
+    def __init__(self, filename, version, limit=None) :
+        self.filename = filename
+        self.limit    = limit if limit else defaultLimit
+        self.hits     = 0
+        self.misses   = 0
+        self.evicted  = 0
+        self.used     = []
+        self.added    = []
+
+        self.db = sqlite3.connect(filename)
+        self.db.executescript(schema)
+        if self._meta('version') != unicode(version) :
+            self.db.execute('DELETE FROM fragments')
+            self._setMeta('version', version)
+        self.build = int(self._meta('build') or 0) + 1
+        self._setMeta('build', self.build)
+        self.db.commit()
+
+    def _meta(self, name) :
+        row = self.db.execute('SELECT value FROM meta WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else None
+
+    def _setMeta(self, name, value) :
+        self.db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (name, unicode(value)))
+
+    def get(self, id, hash) :
+        """Return the fragment for a tweet if it was rendered from content
+        with this hash, or None"""
+        row = self.db.execute('SELECT hash, html FROM fragments WHERE id = ?', (id,)).fetchone()
+        if row and row[0] == hash :
+            self.hits += 1
+            self.used.append((self.build, id))
+            if len(self.used) >= 1000 :
+                self._flush()
+            return row[1]
+        self.misses += 1
+        return None
+
+    def put(self, id, hash, html) :
+        self.added.append((id, hash, self.build, html))
+        if len(self.added) >= 1000 :
+            self._flush()
+
+    def fetch(self, id, hash, render) :
+        """Return the cached fragment for a tweet, calling render() to make
+        and store it on a miss"""
+        html = self.get(id, hash)
+        if html is None :
+            html = render()
+            self.put(id, hash, html)
+        return html
+
+    def _flush(self) :
+        if self.used :
+            self.db.executemany('UPDATE fragments SET used = ? WHERE id = ?', self.used)
+            self.used = []
+        if self.added :
+            self.db.executemany('INSERT OR REPLACE INTO fragments VALUES (?, ?, ?, ?)', self.added)
+            self.added = []
+
+    def hitRate(self) :
+        lookups = self.hits + self.misses
+        return float(self.hits) / lookups if lookups else 0.0
+
+    def report(self) :
+        return 'Fragment cache: {} hits, {} rendered ({:.1%} hit rate), {} evicted'.format(
+            self.hits, self.misses, self.hitRate(), self.evicted)
+
+    def close(self) :
+        if self.db is None :
+            return
+        self._flush()
+        count = self.db.execute('SELECT COUNT(*) FROM fragments').fetchone()[0]
+        if count > self.limit :
+            self.evicted = count - self.limit
+            self.db.execute('DELETE FROM fragments WHERE id IN (SELECT id FROM '
+                'fragments ORDER BY used LIMIT ?)', (self.evicted,))
+        self.db.commit()
+        self.db.close()
+        self.db = None
+
+    def __enter__(self) :
+        return self
+
+    def __exit__(self, *exc) :
+        self.close()
+        return False
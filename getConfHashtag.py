@@ -14,30 +14,99 @@
 #   This routine imports SixOhSix's Python interface to the Twitter API
 #   See https://github.com/sixohsix/twitter
 #
-#   Minumum input usage: python getConfHashtag.py #hashtag
+#   Minumum input usage: python getConfHashtag.py #hashtag [#hashtag ...]
 #
 #   options:
 #       -h | --help   Print help information
 #       -p | --pickle PICKLE-FILENAME
-#       -c | --csv    CSV-FILENAME
+#       -c | --csv    CSV-FILENAME (watch mode)
 #       -j | --json   JSON-FILENAME
-#       -l | --lower  Set lower limit on tweet ID's
+#       -l | --lower  Set lower limit on tweet ID's (default from the journal)
+#       --start       TIME (only tweets at or after this time, as a lower ID)
+#       --tz          Time zone of --start (default UTC)
 #       -n | --notice COUNT (default progress notice every 100 tweets)
 #       -s | --sort   Sort the tweets in descending tweet ID
 #       -a | --ascend Use ascending order if sort  is selected
 #       --nojson      No JSON output (default is output)
 #       --nopickle    No pickle file output (default is output)
+#       --compact     Write JSON arrays compactly, a tweet per line
+#       --protocol    Pickle protocol (default the highest)
 #       --injson      JSON-FILENAME (input from an existing JSON file)
 #       --inpickle    PICKLE-FILENAME (Input from an existing pickle file)
+#       --journal     JOURNAL-FILENAME (capture journal, default HASHTAG.journal)
+#       --restart     Start over rather than resume an interrupted capture
+#       -w | --watch  SECONDS (keep polling for new tweets at this interval)
+#       -m | --html   HTML-FILENAME (watch mode)
+#       --domain      HOST:PORT (search a local test endpoint over plain HTTP)
+#       --profile     FILENAME (JSON report of the time and memory of each phase,
+#                     and of API latencies and rate-limit sleeps)
+#       --cprofile    FILENAME (cProfile statistics of the run)
+#
+#   Archives named with .gz, .bz2 or .xz after their extension, such as
+#   chat.jsonl.gz, are compressed as they're written and read.
 #
 #   If output filenames aren't given, the hashtag (without the hash) is used
 #   as a basename. For input from a previously created pickle or file, no search
 #   is done and the given hashtag is still used for an output file basename.
 #
+#   Several hashtags can be given. They're packed into as few OR queries as
+#   the 500 character query limit allows, tweets found by more than one query
+#   are kept once, and the combined tweets are named after the first hashtag
+#   with '_all' appended. Each hashtag also gets its own archive files of the
+#   tweets whose entities carry it.
+#
 #   Lower and upper limits on tweet ID's are non-inclusive. The lower argument
-#   is provided to only fetch tweets since a prior tweet search.
+#   is provided to only fetch tweets since a prior tweet search. --start gives
+#   the lower limit as a time instead, turned into the highest tweet ID that
+#   could have been made before it (tweet IDs begin with their time).
+#
+#   Each page of search results is appended to a journal as it arrives. If a
+#   search is interrupted, rerunning it for the same hashtag resumes where it
+#   stopped. Without --lower (or --start), a new search starts after the
+#   newest tweet of the captures already finished in the journal, and the
+#   output archives are written from all of those captures together with
+#   the new one, so a rerun adds to them. A rerun that finds nothing new
+#   leaves them as they are. Once the outputs are written, the captures in
+#   them are folded out of the journal, which keeps only a note that the
+#   JSON output (or the pickle, with --nojson) holds them; the next rerun
+#   reads them back from it, so that file has to be kept. Outputs are
+#   written under temporary names and renamed once complete.
+#
+#   With --watch, the search is repeated every so many seconds until the
+#   program is interrupted. New tweets are appended in ascending ID order to
+#   a JSON Lines archive (the --json file if it ends in .jsonl, otherwise
+#   HASHTAG.jsonl) and to the ends of the CSV and HTML files, so each poll
+#   only costs as much as the tweets it finds.
 #
 #   Keith Eric Grant (keg@ramblemuse.com)
+#   Sun, 18 Oct 2026
+#       Fold the captures written to the outputs out of the journal, and
+#       read them back from the outputs on a rerun. Outputs are written
+#       under temporary names and renamed over the old ones when complete.
+#       --watch forgets the archived IDs that no later poll can return, and
+#       a poll that finds nothing leaves no capture in the journal.
+#       A rerun without --lower writes the outputs from every finished
+#       capture in the journal instead of only the tweets it found, and
+#       leaves them alone when it finds none.
+#       --profile saves the time and memory of each phase of the capture,
+#       with percentiles of the API latencies and the rate-limit sleeps.
+#       The search of each packed query is now captureQueries, shared with
+#       tweetPipeline.py along with searchAPI and capturedTweets.
+#       Added --compact JSON and --protocol; pickles now default to the
+#       highest protocol, and archives may be compressed by extension.
+#       Added --start and --tz to search from a time, as a since_id.
+#       Accept several hashtags, searching them as packed OR queries and
+#       splitting the results into per-hashtag archives.
+#       Added --watch for polling during a conference, keeping the archive,
+#       CSV and HTML files up to date as tweets arrive.
+#       Replaced the fixed two second sleep with rateLimiter, which spends
+#       the rate-limit window in bursts and retries errors with backoff
+#       instead of silently reusing the last group of tweets.
+#       Record search pages in a capture journal so an interrupted search
+#       can be resumed, and take the default lower ID from the journal.
+#       Read and write archives through tweetStore, streaming each search
+#       page to the output files instead of collecting one big list. A .jsonl
+#       output or input filename selects the JSON Lines format.
 #   Sun, 18 Oct 2015
 #       Modified so count continues to be output after return of fewer
 #       than 100 tweets in a request (i.e. can't use mod function).
@@ -66,17 +135,26 @@ import sys
 import os
 import argparse
 import re
+import itertools
 import time
+import io
 import twitter
-import simplejson as json
-import codecs
-import pickle
 import base64
+import tweetStore
+import tweetProfile
+import tweetTime
+import captureJournal
+import rateLimiter
+import writeCSV
+import writeHTML
 
 
 # This app's registered name with Twitter
 myName = 'getConfHashtag'
 
+# Twitter's standard search accepts queries of up to 500 characters
+maxQuery = 500
+
 
 def mapKey(key, enc):
     """This is a helper routine for getAppToken"""
@@ -115,6 +193,259 @@ def getAppToken () :
     return token
 
 
+def searchAPI(domain=None) :
+    """The Twitter API, authenticated with the application token, or a
+    local test endpoint (HOST:PORT) over plain HTTP with a dummy token"""
+    if domain :
+        return twitter.Twitter(domain=domain, secure=False,
+            auth=twitter.OAuth2(bearer_token='local'))
+    return twitter.Twitter(auth=twitter.OAuth2(bearer_token=getAppToken()))
+
+
+def searchPages(api, hashtag, lower, upper=None, limiter=None) :
+    """Generate the pages of search results for a hashtag, newest first, as
+    (max_id, statuses) pairs. Calls are scheduled by the rate limiter."""
+
+    if limiter is None :
+        limiter = rateLimiter.rateLimiter()
+
+    while (True) :
+
+        # Maximum count for a search request is 100. This loop starts with
+        # the most recent matches and steps back in time by using the oldest
+        # tweet in the returns as the next "upper" limit on the tweet ID. Each
+        # group of tweets is passed on as soon as it arrives. Failed calls
+        # are retried by the limiter, which raises if they keep failing.
+
+        query = dict(q=hashtag, count=100, max_id=upper, since_id=lower)
+        query = dict([(k, v) for k, v in query.items() if v is not None])
+        returns = limiter.call(api.search.tweets, **query)
+        group = returns['statuses'] if 'statuses' in returns else []
+
+        if len(group) == 0 : break
+
+        yield upper, group
+
+        # The next query will return results with an ID less than (that is,
+        # older than) or equal to the specified ID.
+        upper = min([x['id'] for x in group]) - 1
+
+
+def captureTweets(api, query, capture, nnotice, limiter=None) :
+    """Run the search for the current capture of the journal, recording each
+    page as it arrives, and mark the capture complete when it runs out"""
+
+    session = capture.current
+    lower   = session.since_id
+    total   = session.count
+    nxtout  = total + nnotice
+    if limiter is None :
+        limiter = rateLimiter.rateLimiter()
+
+    for upper, group in searchPages(api, query, lower, session.cursor(), limiter) :
+        with tweetProfile.current.phase('write') :
+            capture.addPage(upper, lower, group)
+        total += len(group)
+        if total >= nxtout :
+            nxtout = total + nnotice
+            print total
+
+    capture.finish()
+    print 'Search rate: {}'.format(limiter.report())
+
+
+def captureQueries(api, queries, capture, lower, nnotice, restart=False) :
+    """Search each query into the capture journal and return the journal's
+    captures of them. Search errors are raised, leaving the journal to
+    resume from."""
+
+    # Each page is recorded in the journal as it arrives. An interrupted
+    # capture of the same query picks up from its oldest tweet, and
+    # otherwise the lower limit defaults to the newest archived tweet.
+    limiter  = rateLimiter.rateLimiter()
+    sessions = []
+    for query in queries :
+        prior = capture.pending(query)
+        if prior and not restart and lower in (None, prior.since_id) :
+            print 'Resuming capture from journal {} after {} tweets'.format(capture.filename, prior.count)
+            capture.resume(prior)
+        else :
+            since = lower
+            if since is None :
+                since = capture.archivedMax(query) if capture.archivedMax(query) else 0
+                if since :
+                    print 'Lower ID from journal {}: {}'.format(capture.filename, since)
+            capture.begin(query, since)
+
+        print 'Searching Twitter for {}'.format(query)
+        captureTweets(api, query, capture, nnotice, limiter)
+        sessions.append(capture.current)
+    return sessions
+
+
+def journalMax(capture, queries) :
+    """Highest tweet ID of the finished captures of the queries"""
+    return max([capture.archivedMax(x) for x in queries])
+
+
+def capturedTweets(capture, sessions, earlier=()) :
+    """Stream the tweets of the journal's captures, then those of the
+    archives that earlier captures were folded into. Tweets with hashtags
+    from more than one query come back from each, and are kept once."""
+    tweets = itertools.chain(*([capture.tweets(x) for x in sessions] +
+        [tweetStore.readTweets(x) for x in earlier]))
+    tweets = tweetProfile.current.timed('load', tweets)
+    return tweetStore.dedupe(tweets) if len(sessions) + len(earlier) > 1 else tweets
+
+
+def packQueries(hashtags, limit=maxQuery) :
+    """Join hashtags into as few OR queries as fit within the length limit"""
+    queries = []
+    for tag in hashtags :
+        if queries and len(queries[-1]) + len(' OR ') + len(tag) <= limit :
+            queries[-1] += ' OR ' + tag
+        else :
+            queries.append(tag)
+    return queries
+
+
+def tweetHashtags(tweet) :
+    """Return the lower-case hashtags, with the hash, that a tweet carries,
+    including those of the status it retweets"""
+    tags = set([u'#' + x['text'].lower() for x in tweet['entities'].get('hashtags', [])])
+    if 'retweeted_status' in tweet :
+        tags |= tweetHashtags(tweet['retweeted_status'])
+    return tags
+
+
+def writeDemuxed(tweets, outputs, tagOutputs, protocol=None, compact=False) :
+    """Write each tweet to all of the combined output files and to the files
+    of each requested hashtag it carries. tagOutputs maps lower-case hashtags
+    to lists of filenames. Returns the total and a count for each hashtag."""
+
+    # Each file is written under a temporary name and renamed over the old
+    # one once it's complete, so the old outputs can be read for the tweets.
+    writers = []
+    tagWriters = dict([(tag, []) for tag in tagOutputs])
+    counts = dict([(tag, 0) for tag in tagOutputs])
+    finals = {}
+    complete = False
+
+    def writer(filename) :
+        head, tail = os.path.split(filename)
+        partial = os.path.join(head, '.partial-' + tail)
+        finals[partial] = filename
+        return tweetStore.tweetWriter(partial, protocol, compact=compact)
+
+    try :
+        for filename in outputs :
+            writers.append(writer(filename))
+        for tag, filenames in tagOutputs.items() :
+            for filename in filenames :
+                tagWriters[tag].append(writer(filename))
+
+        total = 0
+        for tweet in tweets :
+            for out in writers :
+                out.write(tweet)
+            total += 1
+            if tagWriters :
+                for tag in tweetHashtags(tweet) :
+                    if tag in tagWriters :
+                        counts[tag] += 1
+                        for out in tagWriters[tag] :
+                            out.write(tweet)
+        complete = True
+    finally :
+        for out in writers + sum(tagWriters.values(), []) :
+            out.close()
+        for partial, filename in finals.items() :
+            if complete :
+                os.rename(partial, filename)
+            elif os.path.exists(partial) :
+                os.remove(partial)
+
+    return total, counts
+
+
+def watchHashtags(api, queries, capture, lower, interval, nnotice, archive, csvFilename, htmlFilename) :
+    """Poll for new tweets every interval seconds until interrupted. Each
+    batch is appended in ascending ID order to the JSON Lines archive, and
+    then added to the ends of the CSV and HTML files."""
+
+    # Tweets carrying hashtags from more than one query turn up in each
+    # of them, so the IDs already archived are kept to drop the repeats.
+    seen = set()
+
+    def remember(tweets) :
+        for tweet in tweets :
+            seen.add(tweet['id'])
+            yield tweet
+
+    # Bring the CSV and HTML files up to date with the archive once, so
+    # that each poll only has to add its own tweets to them.
+    if os.path.exists(archive) :
+        print 'Writing CSV file {} and HTML file {} from {}'.format(csvFilename, htmlFilename, archive)
+        inp = tweetStore.counter(tweetStore.readTweets(archive))
+        if os.path.exists(csvFilename) :
+            os.remove(csvFilename)
+        writeCSV.appendCSV(csvFilename, remember(inp))
+        with io.open(htmlFilename, 'w', encoding='utf-8') as out :
+            writeHTML.writePage(out, tweetStore.readTweets(archive))
+        lower = max(lower, inp.maxID)
+        print '{}: {} tweets. Uppermost ID: {}'.format(archive, inp.count, inp.maxID)
+
+    lowers  = dict([(query, lower) for query in queries])
+    limiter = rateLimiter.rateLimiter()
+    print 'Watching Twitter for {} every {} seconds'.format(' OR '.join(queries), interval)
+    while (True) :
+
+        # Search each query back to its newest tweet so far, resuming the
+        # journal's capture if an earlier poll of the same range was cut short.
+        new = []
+        done = []
+        for query in queries :
+            prior = capture.pending(query)
+            if prior and prior.since_id == lowers[query] :
+                capture.resume(prior)
+            else :
+                capture.begin(query, lowers[query])
+
+            try :
+                captureTweets(api, query, capture, nnotice, limiter)
+            except (twitter.TwitterError,) + rateLimiter.networkErrors as err :
+                print 'Search failed: {}'.format(err)
+                continue
+
+            for tweet in capture.tweets() :
+                if tweet['id'] not in seen :
+                    seen.add(tweet['id'])
+                    new.append(tweet)
+            lowers[query] = max(lowers[query], capture.current.maxID)
+            done.append(capture.current)
+
+        # Each poll only finds IDs above its query's lower limit, so those
+        # at or below the lowest limit can't turn up again.
+        floor = min(lowers.values())
+        seen.difference_update([x for x in seen if x <= floor])
+
+        if new :
+            new.sort(key=lambda x: x['id'])
+            with tweetStore.tweetWriter(archive, append=True) as out :
+                out.writeAll(new)
+            writeCSV.appendCSV(csvFilename, new)
+            if writeHTML.appendHTML(htmlFilename, new) is None :
+                with io.open(htmlFilename, 'w', encoding='utf-8') as out :
+                    writeHTML.writePage(out, tweetStore.readTweets(archive))
+
+        # The poll's tweets are in the archive now, so their captures are
+        # folded out of the journal
+        capture.fold(done, archive)
+
+        print '{} new tweets. Uppermost ID saved: {}'.format(len(new), max(lowers.values()))
+        time.sleep(interval)
+
+
 def main(argv=None):
     if argv is None:
         argv = sys.argv
@@ -122,114 +453,169 @@ def main(argv=None):
     parser = argparse.ArgumentParser(
         prog=myName,
         description='Parse hashtag and ouput options',
-        version='1.0.1')
-    parser.add_argument('hashtag', help='hashtag to search for, including #')
+        version='1.0.3')
+    parser.add_argument('hashtags', nargs='+', metavar='hashtag', help='hashtags to search for, including #')
     parser.add_argument('--pickle', '-p', action='store', dest='pickle', help='Pickle output file name')
     parser.add_argument('--json',   '-j', action='store', dest='json', help='JSON output file name')
-    parser.add_argument('--lower',  '-l', action='store', dest='lower',  type=int, default = 0, help='Set lower limit on tweet IDs')
+    parser.add_argument('--lower',  '-l', action='store', dest='lower',  type=int, help='Set lower limit on tweet IDs (default: highest ID in the journal)')
+    parser.add_argument('--start', action='store', help='Only tweets at or after this time (YYYY-MM-DD [HH:MM[:SS]])')
+    parser.add_argument('--tz', action='store', help='Time zone of --start: UTC (default), local, an offset like -07:00, or a name (needs pytz)')
     parser.add_argument('--notice', '-n', action="store", dest='notice', type=int, default=100, help='Print processing count every n tweets')
     parser.add_argument('--nojson',   action='store_true', default=False, help='No JSON output')
     parser.add_argument('--nopickle', action='store_true', default=False, help='No pickle output')
+    parser.add_argument('--compact', action='store_true', default=False, help='Write JSON arrays compactly, a tweet per line')
+    parser.add_argument('--protocol', action='store', type=int, help='Pickle protocol (default: the highest)')
     parser.add_argument('--nonotice', action='store_true', default=False, help='No processing count notices')
     parser.add_argument('--injson',   action='store', help='Load specified JSON file instead of search')
     parser.add_argument('--inpickle', action='store', help='Load specified pickle file instead of search')
+    parser.add_argument('--journal', action='store', help='Capture journal file name')
+    parser.add_argument('--restart', action='store_true', default=False, help='Abandon an interrupted capture instead of resuming it')
+    parser.add_argument('--watch', '-w', action='store', type=float, metavar='SECONDS', help='Keep polling for new tweets at this interval')
+    parser.add_argument('--csv', '-c', action='store', dest='csv', help='CSV output file name (watch mode)')
+    parser.add_argument('--html', '-m', action='store', dest='html', help='HTML output file name (watch mode)')
+    parser.add_argument('--domain', action='store', help='Search a local test endpoint (HOST:PORT) over plain HTTP')
     parser.add_argument('--sort', '-s', action='store_true', dest='sort', default=False, help='Sort by decreasing ID')
     parser.add_argument('--ascend', '-a', action='store_true', dest='ascend', default=False, help='Use ascending sort')
+    tweetProfile.addProfileArguments(parser)
     args = parser.parse_args(argv[1:])
+    tweetProfile.start(myName, args)
 
 
-    hashtag = args.hashtag
-    if hashtag[0] == '#' :
-        basetag = hashtag[1:]
-    else :
-        basetag = hashtag
-        hashtag = '#' + hashtag
+    hashtags = [x if x[0] == '#' else '#' + x for x in args.hashtags]
+    basetags = [x[1:] for x in hashtags]
+    hashtag  = ' '.join(hashtags)
 
-    jsonFilename   = args.json   if args.json   else basetag + '.json'
-    pickleFilename = args.pickle if args.pickle else basetag + '.pickle'
+    # Several hashtags share one combined set of output files, named after
+    # the first hashtag, and each also gets its own archive files.
+    basetag = basetags[0] if len(hashtags) == 1 else basetags[0] + '_all'
+
+    jsonFilename    = args.json    if args.json    else basetag + '.json'
+    pickleFilename  = args.pickle  if args.pickle  else basetag + '.pickle'
+    journalFilename = args.journal if args.journal else basetag + '.journal'
 
     lower        = args.lower
+    if args.start :
+        try :
+            start = max(tweetTime.timeID(tweetTime.parseTime(args.start, args.tz)) - 1, 0)
+        except ValueError as err :
+            print err
+            return 1
+        print 'Lower ID for {}: {}'.format(args.start, start)
+        lower = max(lower, start)
     nnotice      = args.notice
     sortem       = args.sort
     descSort     = not args.ascend
     outputJSON   = not args.nojson
     outputPickle = not args.nopickle
 
-    if args.injson :
-
-        print 'Reading JSON file {}'.format(args.injson)
-        with codecs.open(args.injson, 'rb') as inp :
-            tweets = json.load(inp)
-
-        total = len(tweets)
-        outputJSON = False
-
-    elif args.inpickle :
-
-        print 'Reading pickle file {}'.format(args.inpickle)
-        with open(args.inpickle, 'rb') as inp :
-            tweets = pickle.load(inp)
-
-        total = len(tweets)
-        outputPickle = False
+    # The tweets come either from a saved archive or from a search, and
+    # stream from there straight into the output archives.
+    capture = None
+    fresh = None
+    if args.injson or args.inpickle :
+        inpfile = args.injson if args.injson else args.inpickle
+        print 'Reading tweet file {}'.format(inpfile)
+        try :
+            tweets = tweetStore.readTweets(inpfile)
+        except ValueError as err :
+            print 'Unknown extension {}'.format(err)
+            return 1
+        if tweetStore.formatOf(inpfile) == tweetStore.formatOf(jsonFilename) :
+            outputJSON = False
+        if tweetStore.formatOf(inpfile) == tweetStore.formatOf(pickleFilename) :
+            outputPickle = False
 
     else :
 
-        # Authenticate with Twitter using an application token.
-        api = twitter.Twitter(auth=twitter.OAuth2(bearer_token=getAppToken()))
+        api = searchAPI(args.domain)
+        capture = captureJournal.journal(journalFilename)
 
-        print 'Searching Twitter for {}'.format(hashtag)
-        upper  = None
-        total  = 0
-        nxtout = total + nnotice
-
-        tweets = []
-        while (True) :
-
-            # Maximum count for a search request is 100. This loop starts with
-            # the most recent matches and steps back in time by using the oldest
-            # tweet in the returns as the next "upper" limit on the tweet ID. On
-            # each iteration the new group of tweets extends a cumulative list.
+        # Pack the hashtags into as few OR queries as the query length allows
+        queries = packQueries(hashtags)
 
+        if args.watch :
+            archive = args.json if args.json and tweetStore.formatOf(args.json) == 'jsonl' else basetag + '.jsonl'
+            csvFilename  = args.csv  if args.csv  else basetag + '.csv'
+            htmlFilename = args.html if args.html else basetag + '.html'
             try :
-                returns = api.search.tweets(q=hashtag, count=100, max_id=upper, since_id=lower)
-                group = returns['statuses'] if 'statuses' in returns else []
-            except :
-                print "Unexpected error:", sys.exc_info()[0]
-
-            if len(group) == 0 : break
-
-            tweets.extend(group)
-            total += len(group)
-            if total >= nxtout :
-                nxtout = total + nnotice
-                print total
-
-            # The next query will return results with an ID less than (that is,
-            # older than) or equal to the specified ID.
-            upper = min([x['id'] for x in group]) - 1
-
-            # Twitter rate limit for searches is 450 calls/ 15 minutes
-            time.sleep(2.0)
-
-    # Write out the total tweets and the maximum tweet ID. The latter
-    # is for use as the lower argument in a subsequent search.
-    maxID = max([tweet['id'] for tweet in tweets])
-    print '{} tweets. Uppermost ID saved: {}'.format(total, maxID)
-
+                watchHashtags(api, queries, capture, lower if lower else 0, args.watch,
+                    nnotice, archive, csvFilename, htmlFilename)
+            except KeyboardInterrupt :
+                print 'Stopped watching {}'.format(hashtag)
+            capture.close()
+            return 0
+
+        try :
+            sessions = captureQueries(api, queries, capture, lower, nnotice, args.restart)
+        except (twitter.TwitterError,) + rateLimiter.networkErrors as err :
+            print 'Search failed: {}'.format(err)
+            print 'Rerun to resume the capture from journal {}'.format(journalFilename)
+            capture.close()
+            return 1
+
+        # A search that carries on from the journal's newest tweet only
+        # finds what's new, so the outputs are written from every finished
+        # capture of the queries, newest first, and then the archives that
+        # earlier captures were folded into, rather than replaced by it.
+        fresh = sum(x.count for x in sessions)
+        earlier = []
+        if lower is None :
+            sessions = [x for query in queries for x in reversed(capture.captures(query))]
+            for query in queries :
+                earlier.extend([x for x in capture.foldedInto(query) if x not in earlier])
+            missing = [x for x in earlier if not os.path.exists(x)]
+            if missing :
+                print 'Journal {} has tweets folded into {}, which is missing'.format(
+                    journalFilename, ', '.join(missing))
+                print 'Restore it, or rerun with --lower to write only new tweets'
+                capture.close()
+                return 1
+        tweets = capturedTweets(capture, sessions, earlier)
+
+    inp = tweets = tweetStore.counter(tweets)
     if sortem :
         print 'Sorting tweets'
-        tweets.sort(key=lambda x: x['id'], reverse=descSort)
+        tweets = sorted(inp, key=lambda x: x['id'], reverse=descSort)
 
+    outputs = []
     if outputPickle :
-        print 'Writing pickle file {}'.format(pickleFilename)
-        with open(pickleFilename, 'wb') as out :
-            pickle.dump(tweets,out)
-
+        outputs.append(pickleFilename)
     if outputJSON :
-        print 'Writing JSON file {}'.format(jsonFilename)
-        with codecs.open(jsonFilename, 'wb', 'utf-8') as out :
-            json.dump(tweets, out, indent=4, encoding='utf-8')
+        outputs.append(jsonFilename)
+
+    # With several hashtags, split the tweets into an archive per hashtag
+    # as well, using the hashtags in each tweet's entities.
+    tagOutputs = {}
+    if len(hashtags) > 1 :
+        for tag, base in zip(hashtags, basetags) :
+            tagOutputs[tag.lower()] = [base + tweetStore.extensionOf(x) for x in outputs]
+
+    # Nothing new was found, so the outputs already hold every tweet
+    if capture and not fresh :
+        named = outputs + [x for names in tagOutputs.values() for x in names]
+        if all(os.path.exists(x) for x in named) :
+            capture.close()
+            print 'No new tweets; {} left as they are'.format(', '.join(named) if named else 'outputs')
+            print 'Uppermost ID saved: {}'.format(journalMax(capture, queries))
+            return 0
+
+    for filename in outputs :
+        print 'Writing {} file {}'.format('pickle' if filename == pickleFilename else 'JSON', filename)
+    total, counts = writeDemuxed(tweets, outputs, tagOutputs, args.protocol, args.compact)
+    maxID = inp.maxID
+    if capture :
+        maxID = max(maxID, journalMax(capture, queries))
+        if lower is None and outputs :
+            capture.fold(sessions, outputs[-1], queries)
+        capture.close()
+
+    for tag in hashtags :
+        if tag.lower() in counts :
+            print '{}: {} tweets'.format(tag, counts[tag.lower()])
+
+    # Write out the total tweets and the maximum tweet ID. The latter
+    # is for use as the lower argument in a subsequent search.
+    print '{} tweets. Uppermost ID saved: {}'.format(total, maxID)
 
 if __name__ == "__main__":
     sys.exit(main())
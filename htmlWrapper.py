@@ -3,6 +3,16 @@
 #   These classes provide a Python object wrapper for writing indented HTML5.
 #   Objects are created from a tag and an optional list or tuple of attributes.
 #
+#   The element and document classes build the whole document in memory and
+#   re-indent each element's lines as it closes. The streamElement and
+#   streamDocument classes have the same methods but write each line to the
+#   output as soon as its layout is known, producing the same text. An
+#   element is held back only until it's long enough that it can't fit on
+#   one line, so memory doesn't grow with the document and each line is
+#   written once.
+#
+#   Keith Eric Grant (keg@ramblemuse.com) -- 18 Oct 2026
+#       Added the streaming classes
 #	Keith Eric Grant (keg@ramblemuse.com) -- 04 Jul 2015
 #		Changed strings to Unicode strings
 #   Keith Eric Grant (keg@ramblemuse.com) -- 02 Apr 2015
@@ -77,3 +87,130 @@ class document (element) :
         out.write(u"<!DOCTYPE html>\n")
         out.write(u"\n".join(self.contents) + "\n")
 
+
+
+class streamElement :
+    """An element written straight to an output file. Until its text reaches
+    the one-line threshold it's kept pending, and a pending element that
+    closes is written on one line as element.close would. Once it reaches
+    the threshold its lines are written out, indented by depth, as they
+    come. Only the pending elements at the innermost end of the open
+    elements hold any text."""
+
+    indent = element.indent
+    threshold = element.threshold
+
+    def __init__(self, tag, parent=None, attributes=None, out=None, depth=0) :
+        self.parent = parent
+        self.tag = tag
+        self.child = None
+        if parent :
+            self.out = parent.out
+            self.depth = parent.depth + 1
+            parent.child = self
+        else :
+            self.out = out
+            self.depth = depth
+        self.pending = []
+        self.length = 0
+        if attributes :
+            self._add(u'<{} {}>'.format(tag, ' '.join(attributes)))
+        else :
+            self._add(u'<{}>'.format(tag))
+
+    def add_selfclose(self, tag, attributes=None) :
+        """Add a self-closing element"""
+        if attributes :
+            self._add(u'<{} {} />'.format(tag, ' '.join(attributes)))
+        else :
+            self._add(u'<{} />'.format(tag))
+
+    def add_element(self, tag, attributes=None) :
+        """Add an element which may contain other elements"""
+        return streamElement(tag, self, attributes)
+
+    def add_text(self, text) :
+        """Add text within an open element"""
+        self._add(text)
+
+    def add_fragment(self, text) :
+        """Add lines already laid out at this element's inner depth, such
+        as those written by a streamFragment. The fragment is taken to be
+        too long for one line, as a tweet always is."""
+        if self.pending is not None :
+            self._count(max(len(text), self.threshold))
+        self.out.write(text)
+
+    def close(self) :
+        """Close an open element, writing whatever of it is still pending"""
+
+        closing = u"</{}>".format(self.tag)
+        if self.pending is not None :
+            self._count(len(closing))
+        if self.pending is None :
+            self._line(self.depth, closing)
+        else :
+            text = u''.join(self.pending) + closing
+            self.pending = None
+            if self.parent and self.parent.pending is not None :
+                self.parent.pending.append(text)
+            else :
+                self._line(self.depth, text)
+        if self.parent :
+            self.parent.child = None
+
+    def _add(self, text) :
+        if self.pending is None :
+            self._line(self.depth + 1, text)
+        else :
+            self.pending.append(text)
+            self._count(len(text))
+
+    def _count(self, length) :
+        """Add to the length of this element and its pending ancestors, then
+        lay out over several lines any that have reached the threshold,
+        outermost first"""
+        outer = self
+        while True :
+            outer.length += length
+            if not outer.parent or outer.parent.pending is None :
+                break
+            outer = outer.parent
+        while outer is not None and outer.pending is not None and outer.length >= self.threshold :
+            outer._expand()
+            outer = outer.child
+
+    def _expand(self) :
+        pending, self.pending = self.pending, None
+        self._line(self.depth, pending[0])
+        for text in pending[1:] :
+            self._line(self.depth + 1, text)
+
+    def _line(self, depth, text) :
+        self.out.write(self.indent * depth + text + u'\n')
+
+
+class streamDocument (streamElement) :
+    """A document written to an output file as it's built. Closing it
+    finishes the file."""
+
+    def __init__(self, out) :
+        out.write(u"<!DOCTYPE html>\n")
+        streamElement.__init__(self, u'html', attributes=('lang="en"',), out=out)
+
+
+class streamFragment (streamElement) :
+    """An already open container for writing part of a document, whose
+    contents are written at the given depth"""
+
+    def __init__(self, out, depth=0) :
+        self.parent = None
+        self.tag = None
+        self.child = None
+        self.out = out
+        self.depth = depth - 1
+        self.pending = None
+        self.length = 0
+
+    def close(self) :
+        pass
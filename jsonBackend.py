@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# ******************************************************************************
+#   The JSON library used to read and write archives, chosen at run time.
+#
+#   Decoding and encoding tweets is most of the time spent loading or saving
+#   an archive, and the C libraries are several times faster than the
+#   standard library. The first of these that imports is used:
+#
+#       orjson      (Python 3)
+#       rapidjson   python-rapidjson
+#       ujson       only from version 2, which round-trips floats exactly
+#       simplejson  with its C speedups
+#       json        the standard library, always there
+#
+#   Every backend reads UTF-8 bytes and writes compact JSON text, so files
+#   written with one read the same with any other. The choice can be forced
+#   with the TWEETJSON environment variable, e.g. TWEETJSON=simplejson, or by
+#   calling use().
+#
+#   18 Oct 2026
+#
+# ******************************************************************************
+
+import os
+
+
+class backend(object) :
+    """A JSON library: loads takes UTF-8 bytes (or text), and dumps gives
+    compact text"""
+
+    def __init__(self, name, loads, dumps) :
+        self.name  = name
+        self.loads = loads
+        self.dumps = dumps
+
+
+def _orjson() :
+    import orjson
+    return backend('orjson', orjson.loads, lambda x: orjson.dumps(x).decode('utf-8'))
+
+
+def _rapidjson() :
+    import rapidjson
+    return backend('rapidjson', rapidjson.loads, rapidjson.dumps)
+
+
+def _ujson() :
+    import ujson
+    if int(ujson.__version__.split('.')[0]) < 2 :
+        raise ImportError('ujson {} rounds floats'.format(ujson.__version__))
+    return backend('ujson', ujson.loads,
+        lambda x: ujson.dumps(x, ensure_ascii=True, escape_forward_slashes=False))
+
+
+def _simplejson() :
+    import simplejson
+    if not simplejson._import_c_make_encoder() :
+        raise ImportError('simplejson has no C speedups')
+    return _stdlib(simplejson, 'simplejson')
+
+
+def _json() :
+    import json
+    return _stdlib(json, 'json')
+
+
+def _stdlib(module, name) :
+    """The loads and dumps of json or a library with the same interface.
+    Bytes are decoded first, as they'd otherwise come back as str."""
+    decoder = module.JSONDecoder()
+    encoder = module.JSONEncoder(separators=(',', ':'))
+
+    def loads(data) :
+        return decoder.decode(data.decode('utf-8') if isinstance(data, bytes) else data)
+
+    return backend(name, loads, encoder.encode)
+
+
+# Backends by name, fastest first
+backends = (('orjson', _orjson), ('rapidjson', _rapidjson), ('ujson', _ujson),
+            ('simplejson', _simplejson), ('json', _json))
+
+
+def choose(names=None) :
+    """The first of the named backends (by default all of them, fastest
+    first) that imports, raising ValueError if none do"""
+    known = dict(backends)
+    for name in (names if names else [x for x, _ in backends]) :
+        if name not in known :
+            raise ValueError('Unknown JSON backend {}'.format(name))
+        try :
+            return known[name]()
+        except ImportError :
+            continue
+    raise ValueError('None of the JSON backends {} is installed'.format(', '.join(names)))
+
+
+def use(name) :
+    """Switch to a backend by name"""
+    global current
+    current = choose([name])
+    return current
+
+
+def available() :
+    """Names of the backends that import"""
+    found = []
+    for name, make in backends :
+        try :
+            make()
+        except ImportError :
+            continue
+        found.append(name)
+    return found
+
+
+current = choose(os.environ['TWEETJSON'].split(',') if os.environ.get('TWEETJSON') else None)
+
+
+def loads(data) :
+    return current.loads(data)
+
+
+def dumps(obj) :
+    return current.dumps(obj)
@@ -1,19 +1,62 @@
 #
 # *****************************************************************************
-#   This script merges the tweets in two files, .json and/or .pickle created
-#   by getConfTweets.py The output is either a .json or .pickle file or both.
+#   This script merges the tweets in any number of files, .json, .jsonl
+#   and/or .pickle created by getConfTweets.py The output is either a .json
+#   or .pickle file or both, in descending (or ascending) tweet ID order.
 #
-#   Simplest Usage: python mergeTweets.py FILENAME1 FILENAME2
+#   Simplest Usage: python mergeTweets.py FILENAME1 FILENAME2 [FILENAME ...]
 #
 #   options:
 #       -h | --help   Print help information
 #       -p | --pickle PICKLE-FILENAME
 #       -j | --json   JSON-FILENAME
-#       -s | --sort   Sort the tweets in descending tweet ID
+#       -s | --sort   Sort the tweets in descending tweet ID (always done)
+#       -a | --ascend Use ascending order
 #       --nojson      No JSON output (default is output)
 #       --nopickle    No pickle file output (default is output)
+#       --compact     Write the JSON array compactly, a tweet per line
+#       --protocol    Pickle protocol (default the highest)
+#       --runsize     Tweets per sorted run for inputs that are out of order
+#       --tmpdir      Directory for the sorted runs
+#       -d | --db     DB-FILENAME
+#                     Merge into an SQLite archive, which drops repeated IDs
+#                     as they're inserted, and write the outputs from it
+#       --user, --since, --until, --tz, --match, --sorted, --columns
+#                     Merge only the tweets selected by poster, time or text
+#       --limit       Write at most this many merged tweets
+#       --profile, --cprofile
+#                     Save the time and memory of each phase as JSON, or
+#                     cProfile statistics (see tweetProfile.py)
+#
+#   The inputs are merged a tweet at a time with a heap, holding one tweet
+#   from each, and repeated IDs are dropped as they meet. Each input's order
+#   is found from its first run of tweets as it's merged: an input in ID
+#   order streams straight into the merge, one in the opposite order is
+#   reversed a run at a time, and any other is sorted in runs spilled to
+#   temporary files. An input that goes out of order only after its first
+#   run has the merge start over with it sorted. Inputs flagged --sorted are
+#   taken at their word.
 #
 #   Keith Eric Grant (keg@ramblemuse.com)
+#   Sun, 18 Oct 2026
+#       Find each input's order from its first run as it's merged, rather
+#       than reading it through first, and reverse inputs in the opposite
+#       order instead of sorting them.
+#       Check each input's order before merging, instead of starting the
+#       merge over each time an input turns out to be out of order.
+#       --profile saves the time and memory of each phase of the merge.
+#       Select the tweets merged with the query options; --since and --until
+#       are found by binary search in inputs flagged --sorted.
+#       --columns selects the tweets of .jsonl inputs from their columnar
+#       sidecars.
+#       Added --compact JSON and --protocol; pickles now default to the
+#       highest protocol, and archives may be compressed by extension
+#       (.gz, .bz2 or .xz after the format's).
+#       Merge any number of files with a streaming k-way merge by ID instead
+#       of collecting every tweet and a set of IDs.
+#       Merge into an indexed SQLite archive with --db.
+#       Stream the inputs through tweetStore rather than concatenating them
+#       into one list. Also accepts .jsonl files.
 #   Tue, 10 Mar 2015
 #       Removed import of base64 (not used)
 #       Added version variable to globals
@@ -24,14 +67,40 @@
 # *****************************************************************************
 
 import sys
-import os
 import argparse
-import simplejson as json
-import codecs
-import pickle
+import itertools
+import tweetStore
+import tweetSort
+import tweetArchive
+import tweetProfile
 
 myName = 'mergeTweets'
-version = '1.0.1'
+version = '1.0.3'
+
+def mergeArchive(dbFilename, fns, outputs, descSort, limit=None, protocol=None, compact=False, **query) :
+    """Add the selected tweets of the input files to an SQLite archive,
+    which drops repeated IDs as they're inserted so the inputs can be in any
+    order, then write the tweets of the archive that match the query to the
+    outputs in ID order"""
+
+    print 'Adding to archive {}'.format(dbFilename)
+    inputs = [tweetStore.counter(tweetStore.selectTweets(fn, **query)) for fn in fns]
+    query.pop('ordered', None)
+    query.pop('columns', None)
+    with tweetArchive.archive(dbFilename) as db :
+        for inp in inputs :
+            db.addAll(inp)
+        added = db.added
+        total = db.count()
+        if outputs :
+            tweetStore.writeTweetFiles(outputs, db.select(descending=descSort, limit=limit, **query),
+                protocol, compact)
+
+    for fn, inp in zip(fns, inputs) :
+        print '{}: {} tweets'.format(fn, inp.count)
+    print '{} total input tweets'.format(sum([inp.count for inp in inputs]))
+    print '{} new tweets, {} in {}'.format(added, total, dbFilename)
+
 
 def main(argv=None):
     if argv is None:
@@ -42,15 +111,29 @@ def main(argv=None):
         description='Parse filenames and options for merging tweet files',
         version=version)
 
-    parser.add_argument('fn0', help='Name of first file to merge')
-    parser.add_argument('fn1', help='Name of second file to merge')
+    parser.add_argument('inputs', nargs='+', metavar='filename', help='Names of the files to merge')
     parser.add_argument('--pickle', '-p', action='store', dest='pickle', help='Pickle output file name')
     parser.add_argument('--json',   '-j', action='store', dest='json', help='JSON output file name')
     parser.add_argument('--nojson', action='store_true', default=False, help='No JSON output')
     parser.add_argument('--nopickle', action='store_true', default=False, help='No pickle output')
-    parser.add_argument('--sort', '-s', action='store_true', dest='sort', default=False, help='Sort by decreasing ID')
+    parser.add_argument('--compact', action='store_true', default=False, help='Write the JSON array compactly, a tweet per line')
+    parser.add_argument('--protocol', action='store', type=int, help='Pickle protocol (default: the highest)')
+    parser.add_argument('--sort', '-s', action='store_true', dest='sort', default=False, help='Sort by decreasing ID (always done; kept for old scripts)')
     parser.add_argument('--ascend', '-a', action='store_true', dest='ascend', default=False, help='Use ascending sort')
+    parser.add_argument('--runsize', action='store', type=int, default=tweetSort.runSize, help='Tweets per sorted run when an input is out of order')
+    parser.add_argument('--tmpdir', action='store', help='Directory for the sorted runs')
+    parser.add_argument('--db', '-d', action='store', dest='db', help='Merge into this SQLite archive (.db), keeping what it holds')
+    tweetArchive.addQueryArguments(parser)
+    tweetProfile.addProfileArguments(parser)
     args = parser.parse_args(argv[1:])
+    tweetProfile.start(myName, args)
+
+    try :
+        query = tweetArchive.queryArguments(args)
+    except ValueError as err :
+        print err
+        return 1
+    limit = query.pop('limit')
 
     if args.pickle :
         pickleFilename = args.pickle
@@ -61,53 +144,73 @@ def main(argv=None):
     else :
         jsonFilename = 'mergedTweets.json'
 
-    sortem       = args.sort
     descSort     = not args.ascend
     outputJSON   = not args.nojson
     outputPickle = not args.nopickle
 
-    fns = (args.fn0, args.fn1)
-    tweetinp = []
-
+    fns = args.inputs
+    if args.db :
+        fns = fns + [args.db]
     for fn in fns :
-        ext = os.path.splitext(fn)[1].lower()
-        if ext == '.json' :
-            with codecs.open(fn, 'rb', 'utf-8') as inp :
-                tweets = json.load(inp)
-        elif ext == '.pickle' :
-            with open(fn, 'rb') as inp :
-                tweets = pickle.load(inp)
-        else :
-            print 'Unknown extension {}'.format(ext)
+        try :
+            tweetStore.formatOf(fn)
+        except ValueError as err :
+            print 'Unknown extension {}'.format(err)
             return 1
-        tweetinp.extend(tweets)
-        print '{}: {} tweets'.format(fn, len(tweets))
-
-    print '{} total input tweets'.format(len(tweetinp))
-
-    ids = set()
-    tweets = []
-    for tweet in tweetinp :
-        id = tweet['id']
-        if id not in ids :
-            ids.add(id)
-            tweets.append(tweet)
-
-    print '{} merged tweets'.format(len(tweets))
-
-    if sortem :
-        print 'Sorting tweets'
-        tweets.sort(key=lambda x: x['id'], reverse=descSort)
 
+    outputs = []
     if outputPickle :
         print 'Writing pickle file {}'.format(pickleFilename)
-        with open(pickleFilename, 'wb') as out :
-            pickle.dump(tweets,out)
-
+        outputs.append(pickleFilename)
     if outputJSON :
         print 'Writing JSON file {}'.format(jsonFilename)
-        with codecs.open(jsonFilename, 'w', 'utf-8') as out :
-            json.dump(tweets, out, indent=4, encoding='utf-8')
+        outputs.append(jsonFilename)
+
+    if args.db :
+        return mergeArchive(args.db, args.inputs, outputs, descSort, limit, args.protocol,
+            args.compact, **query)
+
+    def notice(fn, how) :
+        if how == 'reversed' :
+            print '{} is in the opposite ID order; reversing it in runs of {} tweets'.format(fn, args.runsize)
+        else :
+            print '{} is not in ID order; sorting it in runs of {} tweets'.format(fn, args.runsize)
+
+    # Merge the inputs in ID order, dropping repeated IDs as they come
+    # together. Captures are in order already and stream straight in; the
+    # order of each other input is told from its first run as it's merged.
+    # An input out of order only further on has the merge start again with
+    # it sorted.
+    unsorted = set()
+    while True :
+        inputs = []
+        streams = []
+        for fn in fns :
+            inp = tweetStore.counter(tweetStore.selectTweets(fn, descSort, **query))
+            inputs.append(inp)
+            if query['ordered'] or tweetStore.formatOf(fn) == 'sqlite' :
+                streams.append(tweetSort.ordered(inp, descSort, fn))
+            elif fn in unsorted :
+                streams.append(tweetSort.sortTweets(inp, descSort, args.runsize, args.tmpdir))
+            else :
+                streams.append(tweetSort.orderedTweets(inp, descSort, args.runsize, args.tmpdir, fn, notice))
+        try :
+            tweets = tweetSort.dedupeAdjacent(tweetSort.mergeSorted(streams, descSort))
+            if limit :
+                tweets = itertools.islice(tweets, limit)
+            total = tweetStore.writeTweetFiles(outputs, tweets, args.protocol, args.compact)
+            break
+        except tweetSort.outOfOrder as err :
+            if query['ordered'] :
+                print '{} is not in ID order; merge it without --sorted'.format(err)
+                return 1
+            print '{} is out of ID order after its first {} tweets; merging again with it sorted'.format(err, args.runsize)
+            unsorted.add(err.args[0])
+
+    for fn, inp in zip(fns, inputs) :
+        print '{}: {} tweets'.format(fn, inp.count)
+    print '{} total input tweets'.format(sum([inp.count for inp in inputs]))
+    print '{} merged tweets'.format(total)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+# *****************************************************************************
+#   This routine mirrors the pictures and user icons of a tweet archive into
+#   a local directory, so the HTML written by writeHTML.py keeps working, and
+#   loads faster, when Twitter's links are slow or gone.
+#
+#   The unique media and icon URLs that writeHTML.py shows are collected from
+#   the archive and downloaded by a bounded pool of threads. Files are stored
+#   by a hash of their contents, so the same picture posted under several
+#   URLs is kept once, and a manifest maps each URL to its file. URLs already
+#   in the manifest aren't downloaded again.
+#
+#   Given HTML files, the data-src attributes of their images are rewritten
+#   in place to point at the local copies. Thumbnails also get data-picture
+#   and data-link attributes naming the local hover picture, which
+#   imageHandler.js uses instead of asking Twitter for another size. A
+#   mirrored thumbnail whose hover picture couldn't be fetched names
+#   Twitter's pictures there instead, as the script can't find them from a
+#   local path.
+#
+#   Simplest usage: python mirrorMedia.py INPUT-FILENAME
+#
+#   options:
+#       -h | --help    Print help information
+#       -d | --dir     MEDIA-DIRECTORY (default media)
+#       -m | --html    HTML-FILENAME to rewrite (may be repeated)
+#       -t | --threads Number of download threads (default 8)
+#       --timeout      Seconds to wait for each download (default 30)
+#       --user, --since, --until, --tz, --match, --limit, --sorted, --columns
+#                      Select tweets by poster, time, text or count
+#       --profile, --cprofile
+#                      Save the time and memory of each phase as JSON, or
+#                      cProfile statistics (see tweetProfile.py)
+#
+#   Keith Eric Grant (keg@ramblemuse.com)
+#   18 Oct 2026
+#       Mirrored thumbnails whose hover picture failed keep Twitter's hover
+#       and linked pictures.
+#
+# *****************************************************************************
+
+import sys
+import os
+import argparse
+import hashlib
+import re
+import urllib2
+import threading
+import multiprocessing.pool
+import simplejson as json
+import tweetStore
+import tweetArchive
+import rateLimiter
+import tweetProfile
+
+
+myName  = 'mirrorMedia.py'
+version = '1.0.1'
+
+# Sizes of each picture fetched from Twitter: the thumbnail on the page and
+# the larger picture shown on hover. The picture linked from the hover
+# picture isn't mirrored.
+thumbSize   = ':thumb'
+pictureSize = ':medium'
+linkSize    = ':large'
+
+# File extensions kept for downloaded files, by content type
+extensions = {'image/jpeg' : '.jpg', 'image/png' : '.png', 'image/gif' : '.gif',
+              'image/webp' : '.webp'}
+
+# Image attributes in the HTML written by writeHTML.py
+re_datasrc = re.compile(r'(<img [^>]*?)data-src="([^"]+)"')
+
+
+def tweetURLs (tweets) :
+    """Generate the URLs of the pictures and icons that writeHTML shows for
+    some tweets: the poster's icon, and a thumbnail and hover picture for
+    the first picture of each tweet and of any tweet it quotes"""
+
+    def media (tweet) :
+        pictures = tweet['entities'].get('media')
+        if pictures :
+            url = pictures[0]['media_url']
+            yield url + thumbSize
+            yield url + pictureSize
+
+    for tweet in tweets :
+        yield tweet['user']['profile_image_url']
+        for url in media(tweet) :
+            yield url
+        if 'quoted_status' in tweet :
+            for url in media(tweet['quoted_status']) :
+                yield url
+
+
+class mediaMirror(object) :
+    """A directory of downloaded files named by the SHA-1 of their contents,
+    with a manifest.json mapping each URL to its file"""
+
+    def __init__(self, directory, timeout=30) :
+        self.directory = directory
+        self.timeout   = timeout
+        self.manifestFile = os.path.join(directory, 'manifest.json')
+        self.lock      = threading.Lock()
+        self.manifest  = {}
+        self.fetched   = 0
+        self.bytes     = 0
+        self.failed    = []
+        if os.path.exists(self.manifestFile) :
+            with open(self.manifestFile, 'rb') as inp :
+                self.manifest = json.load(inp)
+
+    def local (self, url) :
+        """Path of the local copy of a URL relative to the directory, or
+        None if it hasn't been mirrored"""
+        return self.manifest.get(url)
+
+    def download (self, url) :
+        """The contents and content type of a URL"""
+        response = urllib2.urlopen(url, timeout=self.timeout)
+        return response.read(), response.info().gettype()
+
+    def fetch (self, url) :
+        """Download one URL into the directory, unless the same contents are
+        already there. Runs in the download threads."""
+        try :
+            data, ctype = tweetProfile.current.call('api', self.download, url)
+        except (rateLimiter.networkErrors + (ValueError,)) as err :
+            with self.lock :
+                self.failed.append((url, err))
+            return
+
+        digest = hashlib.sha1(data).hexdigest()
+        ext = extensions.get(ctype, '')
+        name = '/'.join((digest[:2], digest + ext))
+        path = os.path.join(self.directory, digest[:2], digest + ext)
+
+        with self.lock :
+            if not os.path.exists(path) :
+                if not os.path.isdir(os.path.dirname(path)) :
+                    os.makedirs(os.path.dirname(path))
+                tmp = path + '.part'
+                with open(tmp, 'wb') as out :
+                    out.write(data)
+                os.rename(tmp, path)
+                self.bytes += len(data)
+            self.manifest[url] = name
+            self.fetched += 1
+
+    def mirror (self, urls, threads=8) :
+        """Download the URLs not already mirrored with a pool of threads,
+        returning how many were wanted"""
+
+        wanted = [x for x in set(urls) if x not in self.manifest]
+        if not os.path.isdir(self.directory) :
+            os.makedirs(self.directory)
+        if wanted :
+            pool = multiprocessing.pool.ThreadPool(min(threads, len(wanted)))
+            try :
+                with tweetProfile.current.phase('api') :
+                    for _ in pool.imap_unordered(self.fetch, wanted) :
+                        pass
+            finally :
+                pool.close()
+                pool.join()
+                self.save()
+        return len(wanted)
+
+    def save (self) :
+        tmp = self.manifestFile + '.part'
+        with open(tmp, 'wb') as out :
+            json.dump(self.manifest, out, indent=1, sort_keys=True)
+        os.rename(tmp, self.manifestFile)
+
+
+def rewritePage (htmlfile, mirror) :
+    """Point the data-src attributes of a page's images at their local
+    copies, returning the number rewritten. Mirrored thumbnails also get
+    data-picture and data-link attributes, naming the local hover picture,
+    or Twitter's if it wasn't mirrored."""
+
+    base = os.path.relpath(mirror.directory, os.path.dirname(os.path.abspath(htmlfile)))
+    base = base.replace(os.sep, '/')
+    count = [0]
+
+    def localize (match) :
+        attrs, url = match.group(1), match.group(2)
+        name = mirror.local(url)
+        if not name :
+            return match.group(0)
+        count[0] += 1
+        text = u'{}data-src="{}/{}"'.format(attrs, base, name)
+        if url.endswith(thumbSize) :
+            stem = url[:-len(thumbSize)]
+            picture = mirror.local(stem + pictureSize)
+            if picture :
+                picture = link = u'{}/{}'.format(base, picture)
+            else :
+                picture, link = stem + pictureSize, stem + linkSize
+            text += u' data-picture="{}" data-link="{}"'.format(picture, link)
+        return text
+
+    tmp = htmlfile + '.part'
+    with open(htmlfile, 'rb') as inp :
+        with open(tmp, 'wb') as out :
+            for line in inp :
+                out.write(re_datasrc.sub(localize, line.decode('utf-8')).encode('utf-8'))
+    os.rename(tmp, htmlfile)
+    return count[0]
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+
+    parser = argparse.ArgumentParser(
+        prog=myName,
+        description='Mirror the pictures and icons of tweets locally',
+        version=version)
+    parser.add_argument('inpfile', action='store', help='Input tweet filename (.json, .jsonl, .pickle or .db)')
+    parser.add_argument('--dir', '-d', action='store', dest='dir', default='media', help='Directory for the mirrored files')
+    parser.add_argument('--html', '-m', action='append', dest='html', default=[], help='HTML file to point at the mirrored files')
+    parser.add_argument('--threads', '-t', action='store', type=int, default=8, help='Number of download threads')
+    parser.add_argument('--timeout', action='store', type=float, default=30, help='Seconds to wait for each download')
+    tweetArchive.addQueryArguments(parser)
+    tweetProfile.addProfileArguments(parser)
+    args = parser.parse_args(argv[1:])
+    tweetProfile.start(myName, args)
+
+    try :
+        query = tweetArchive.queryArguments(args)
+    except ValueError as err :
+        print err
+        return 1
+
+    try :
+        inp = tweetStore.counter(tweetStore.selectTweets(args.inpfile, **query))
+    except ValueError as err :
+        print 'Unknown extension {}'.format(err)
+        return 1
+
+    mirror = mediaMirror(args.dir, args.timeout)
+    urls = set(tweetURLs(inp))
+    print '{}: {} tweets, {} pictures and icons'.format(args.inpfile, inp.count, len(urls))
+
+    wanted = mirror.mirror(urls, args.threads)
+    print 'Downloaded {} of {} new files ({} bytes stored), {} already mirrored'.format(
+        mirror.fetched, wanted, mirror.bytes, len(urls) - wanted)
+    for url, err in mirror.failed :
+        print 'Failed {}: {}'.format(url, err)
+
+    for htmlfile in args.html :
+        print 'Rewrote {} images in {}'.format(rewritePage(htmlfile, mirror), htmlfile)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+# *****************************************************************************
+#   This routine finds tweets that are near-duplicates of one another: manual
+#   "RT @user:" and "MT @user:" copies of a tweet, which filterRetweets.py
+#   can't tell from originals, and spam that posts the same text over and
+#   over with different links. Each group of near-duplicates keeps only its
+#   earliest tweet (the lowest ID), and the size of each group is reported.
+#
+#   The text of each tweet is normalized (RT/MT/via prefixes, URLs and
+#   punctuation dropped, case folded), cut into overlapping shingles of a few
+#   characters, and summarized by a MinHash signature. Signatures are made
+#   with one hash per shingle, each hash landing in one bin of the signature
+#   (one-permutation hashing), so the cost is linear in the text rather than
+#   in the number of hash functions. Locality-sensitive hashing then splits
+#   each signature into bands: tweets sharing a band are candidates, and a
+#   candidate joins the group of the tweet it matched if their signatures
+#   agree in at least the threshold fraction of bins. Tweets with identical
+#   normalized text, found by its SHA-1 digest, are grouped without a
+#   signature. The archive is read twice, once to group and once to write
+#   the tweets kept and pick out those printed for the largest groups,
+#   holding only a group number per tweet and the signatures of the first
+#   tweet of each group, so the time is roughly linear in the number of
+#   tweets.
+#
+#   Simplest usage: python nearDuplicates.py INPUT-FILENAME -o OUTPUT-FILENAME
+#
+#   options:
+#       -h | --help      Print help information
+#       -o | --output    OUTPUT-FILENAME for the tweets kept (may be repeated)
+#       -g | --groups    GROUPS-FILENAME, JSON list of the groups of
+#                        near-duplicates, largest first
+#       -t | --threshold Estimated similarity, 0 to 1, above which tweets
+#                        are near-duplicates (default 0.7)
+#       -k | --shingle   Characters per shingle (default 5)
+#       --top            Number of the largest groups to print (default 10)
+#       --user, --since, --until, --tz, --match, --limit, --sorted, --columns
+#                        Select tweets by poster, time, text or count
+#       --profile, --cprofile
+#                        Save the time and memory of each phase as JSON, or
+#                        cProfile statistics (see tweetProfile.py)
+#
+#   Keith Eric Grant (keg@ramblemuse.com)
+#   18 Oct 2026
+#
+# *****************************************************************************
+
+import sys
+import argparse
+import array
+import hashlib
+import itertools
+import operator
+import re
+import zlib
+import simplejson as json
+import tweetStore
+import tweetArchive
+import tweetProfile
+
+
+myName  = 'nearDuplicates.py'
+version = '1.0.1'
+
+
+# Bins in a MinHash signature (a power of two)
+signatureSize = 32
+signatureBits = 5
+
+# Added to a value borrowed by an empty bin from the next full one, per bin
+# skipped, so that borrowed values rarely agree by chance
+borrowStep = 0x9E3779B1
+
+re_prefix = re.compile(r'^(?:(?:RT|MT)\s*@\w+:?\s*)+', re.IGNORECASE | re.UNICODE)
+re_via    = re.compile(r'\b(?:via|h/t)\s*@\w+', re.IGNORECASE | re.UNICODE)
+re_url    = re.compile(r'(?:https?|ftp)://\S+', re.IGNORECASE)
+re_punct  = re.compile(r'[\W_]+', re.UNICODE)
+
+
+def normalize(text) :
+    """Reduce tweet text to the words that make it a copy of another"""
+    text = text.replace(u'&amp;', u'&').replace(u'&lt;', u'<').replace(u'&gt;', u'>')
+    text = re_url.sub(u' ', re_prefix.sub(u'', text))
+    text = re_punct.sub(u' ', re_via.sub(u' ', text))
+    return text.strip().lower()
+
+
+def bandsFor(threshold, size=None) :
+    """The number of bands and rows per band splitting a signature so that
+    pairs of about the threshold similarity are likely to share a band. The
+    LSH threshold, (1/bands)**(1/rows), is kept at or below the similarity
+    threshold to favor finding pairs, which are then checked."""
+    size = size if size else signatureSize
+    best = (1, size)
+    for rows in range(1, size + 1) :
+        if size % rows == 0 :
+            bands = size // rows
+            if (1.0 / bands) ** (1.0 / rows) <= threshold :
+                best = (bands, rows)
+    return best
+
+
+def signature(text, shingle) :
+    """MinHash signature of normalized text, by one-permutation hashing of
+    its shingles with empty bins filled from the next full bin"""
+
+    data = text.encode('utf-8')
+    if len(data) <= shingle :
+        shingles = [data]
+    else :
+        shingles = set([data[ix:ix+shingle] for ix in xrange(len(data) - shingle + 1)])
+
+    mask = signatureSize - 1
+    empty = 0xFFFFFFFF
+    sig = [empty] * signatureSize
+    for h in map(zlib.crc32, shingles) :
+        h &= 0xFFFFFFFF
+        b = h & mask
+        v = h >> signatureBits
+        if v < sig[b] :
+            sig[b] = v
+
+    if empty in sig :
+        full = list(sig)
+        for ix in xrange(signatureSize) :
+            if full[ix] == empty :
+                skip = 1
+                while full[(ix + skip) & mask] == empty :
+                    skip += 1
+                sig[ix] = (full[(ix + skip) & mask] + skip * borrowStep) & 0xFFFFFFFF
+    return sig
+
+
+class grouper(object) :
+    """Assigns each tweet in a stream a group number, grouping those with
+    identical normalized text or similar MinHash signatures. Tweets are
+    numbered in the order they're added."""
+
+    def __init__(self, threshold=0.7, shingle=5) :
+        self.threshold = threshold
+        self.shingle   = shingle
+        self.bands, self.rows = bandsFor(threshold)
+        self.agree     = int(threshold * signatureSize + 0.999999)
+        self.buckets   = [{} for _ in range(self.bands)]
+        self.exact     = {}                      # Groups by digest of the text
+        self.sigs      = array.array('L')        # Signatures of group leaders
+        self.groupOf   = array.array('l')        # Group of each tweet
+        self.ids       = []                      # ID of each tweet
+        self.sizes     = []                      # Tweets in each group
+        self.keep      = []                      # Tweet kept from each group
+
+    def _newGroup(self, index) :
+        self.sizes.append(0)
+        self.keep.append(index)
+        return len(self.sizes) - 1
+
+    def add(self, tweet) :
+        index = len(self.ids)
+        self.ids.append(tweet['id'])
+        text = normalize(tweet['text'])
+
+        key = hashlib.sha1(text.encode('utf-8')).digest()
+        group = self.exact.get(key) if text else None
+        if group is None and text :
+            group = self._similar(index, text)
+            self.exact[key] = group
+        elif group is None :
+            group = self._newGroup(index)
+
+        self.groupOf.append(group)
+        self.sizes[group] += 1
+        if tweet['id'] < self.ids[self.keep[group]] :
+            self.keep[group] = index
+
+    def _similar(self, index, text) :
+        """Group of the first leader sharing a band whose signature agrees,
+        or a new group led by this tweet"""
+
+        sig = signature(text, self.shingle)
+        rows = self.rows
+        keys = [hash(tuple(sig[ix*rows:(ix+1)*rows])) for ix in range(self.bands)]
+        tried = set()
+        sigs = self.sigs
+        for band, key in enumerate(keys) :
+            leader = self.buckets[band].get(key)
+            if leader is None or leader in tried :
+                continue
+            tried.add(leader)
+            base = leader * (signatureSize + 1)
+            agree = sum(map(operator.eq, sigs[base:base+signatureSize], sig))
+            if agree >= self.agree :
+                return sigs[base + signatureSize]
+
+        group = self._newGroup(index)
+        leader = len(sigs) // (signatureSize + 1)
+        sigs.extend(sig)
+        sigs.append(group)
+        for band, key in enumerate(keys) :
+            self.buckets[band].setdefault(key, leader)
+        return group
+
+    def kept(self) :
+        """Flags, by tweet number, of the tweets kept: the earliest of each
+        group"""
+        flags = bytearray(len(self.ids))
+        for index in self.keep :
+            flags[index] = 1
+        return flags
+
+    def groups(self) :
+        """Lists of the IDs in each group of more than one tweet, largest
+        group first, each list starting with the ID kept"""
+        members = {}
+        for index, group in enumerate(self.groupOf) :
+            if self.sizes[group] > 1 :
+                members.setdefault(group, []).append(self.ids[index])
+        result = []
+        for group, ids in members.iteritems() :
+            kept = self.ids[self.keep[group]]
+            ids.remove(kept)
+            result.append([kept] + sorted(ids))
+        result.sort(key=lambda x: (-len(x), x[0]))
+        return result
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+
+    parser = argparse.ArgumentParser(
+        prog=myName,
+        description='Find and drop near-duplicate tweets',
+        version=version)
+    parser.add_argument('inpfile', action='store', help='Input tweet filename (.json, .jsonl, .pickle or .db)')
+    parser.add_argument('--output', '-o', action='append', dest='outputs', default=[], help='Output file for the tweets kept')
+    parser.add_argument('--groups', '-g', action='store', dest='groups', help='JSON file listing the groups of near-duplicates')
+    parser.add_argument('--threshold', '-t', action='store', type=float, default=0.7, help='Similarity above which tweets are near-duplicates')
+    parser.add_argument('--shingle', '-k', action='store', type=int, default=5, help='Characters per shingle')
+    parser.add_argument('--top', action='store', type=int, default=10, help='Number of the largest groups to print')
+    tweetArchive.addQueryArguments(parser)
+    tweetProfile.addProfileArguments(parser)
+    args = parser.parse_args(argv[1:])
+    tweetProfile.start(myName, args)
+
+    if not 0 < args.threshold <= 1 :
+        print 'The threshold must be between 0 and 1'
+        return 1
+
+    try :
+        query = tweetArchive.queryArguments(args)
+    except ValueError as err :
+        print err
+        return 1
+
+    # The input is read once to group and again to write, selecting the
+    # same tweets in the same order each time
+    try :
+        for filename in args.outputs :
+            tweetStore.formatOf(filename)
+        tweets = tweetStore.selectTweets(args.inpfile, **query)
+    except ValueError as err :
+        print 'Unknown extension {}'.format(err)
+        return 1
+
+    groups = grouper(args.threshold, args.shingle)
+    add = tweetProfile.current.function('transform', groups.add)
+    for tweet in tweets :
+        add(tweet)
+    total = len(groups.ids)
+    with tweetProfile.current.phase('transform') :
+        found = groups.groups()
+    print '{}: {} tweets, {} groups of near-duplicates holding {} tweets ({} bands of {} rows)'.format(
+        args.inpfile, total, len(found), sum(len(x) for x in found), groups.bands, groups.rows)
+
+    if args.groups :
+        with open(args.groups, 'wb') as out :
+            json.dump([{'kept' : x[0], 'size' : len(x), 'ids' : x} for x in found], out, indent=1)
+        print 'Wrote {} groups to {}'.format(len(found), args.groups)
+
+    # The tweet printed for each of the largest groups is the one kept, so
+    # it's picked out as the tweets kept are written, or found on a read of
+    # its own if none are
+    shown = set(x[0] for x in found[:args.top]) if args.top else set()
+    texts = {}
+
+    def pick(tweets) :
+        for tweet in tweets :
+            if tweet['id'] in shown :
+                texts[tweet['id']] = tweet
+            yield tweet
+
+    count = None
+    if args.outputs :
+        flags = groups.kept()
+        del groups
+        kept = (x for x, keep in itertools.izip(tweetStore.selectTweets(args.inpfile, **query), flags) if keep)
+        count = tweetStore.writeTweetFiles(args.outputs, pick(kept))
+    elif shown :
+        for _ in pick(tweetStore.selectTweets(args.inpfile, **query)) :
+            pass
+
+    for ids in found[:args.top] if args.top else () :
+        tweet = texts[ids[0]]
+        print u'{:6d}  {}  @{}: {}'.format(len(ids), ids[0],
+            tweet['user']['screen_name'], tweet['text'].replace(u'\n', u' ')).encode('utf-8')
+    if count is not None :
+        print 'Wrote {} tweets, {} near-duplicates dropped'.format(count, total - count)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
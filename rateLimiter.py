@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+# ******************************************************************************
+#   Schedules calls to a rate-limited Twitter API endpoint. Rather than
+#   sleeping a fixed time after every call, the limiter reads the
+#   x-rate-limit-remaining and x-rate-limit-reset headers of each response,
+#   makes calls back to back while the window has calls left, and sleeps
+#   until the window resets once they're used up. Without the headers it
+#   falls back to pacing calls evenly (450 calls per 15 minutes for search).
+#
+#   Failed calls are retried with exponential backoff and full jitter. A
+#   rate-limit error (429, or 420 from older endpoints) waits for the reset
+#   time when the error carries one. Client errors other than those are
+#   raised at once, as is any error that outlasts the retries.
+#
+#   The clock, sleep and random functions can be replaced, so the limiter
+#   can be run quickly against a local fake endpoint. When a tool is
+#   profiled, the latency of each call and sleep goes into its report.
+#
+#   18 Oct 2026
+#
+# ******************************************************************************
+
+import time
+import random
+import httplib
+import tweetProfile
+
+
+# Failures of the connection itself, as opposed to an HTTP error status
+networkErrors = (IOError, httplib.HTTPException)
+
+
+class rateLimiter(object) :
+    """Call an API function, spending its rate-limit window in bursts and
+    backing off with jitter when calls fail"""
+
+    # Spacing of calls when a response has no rate-limit headers
+    fallbackInterval = 2.0
+
+    # Seconds added after a window's reset time before calling again
+    margin = 1.0
+
+    # Backoff for failed calls: up to maxRetries tries, each waiting a random
+    # time below baseDelay * 2**attempt, capped at maxDelay seconds.
+    maxRetries = 6
+    baseDelay  = 1.0
+    maxDelay   = 120.0
+
+    def __init__(self, reserve=0, clock=time.time, sleep=time.sleep, rand=random.random) :
+        self.reserve   = reserve
+        self.clock     = clock
+        self._sleep    = sleep
+        self.rand      = rand
+        self.remaining = None
+        self.reset     = None
+        self.nextCall  = None
+        self.calls     = 0
+        self.errors    = 0
+        self.slept     = 0.0
+        self.started   = None
+
+    def call(self, request, *args, **kwargs) :
+        """Make one call of request(*args, **kwargs) when the rate limit
+        allows it, retrying failures, and return its response"""
+
+        if self.started is None :
+            self.started = self.clock()
+
+        attempt = 0
+        while True :
+            self._wait()
+            try :
+                response = tweetProfile.current.call('api', request, *args, **kwargs)
+            except Exception as err :
+                code = errorCode(err)
+                attempt += 1
+                if not retriable(err, code) or attempt > self.maxRetries :
+                    raise
+                self.errors += 1
+                print 'Search error ({}), retry {} of {}'.format(code if code else err,
+                    attempt, self.maxRetries)
+                self._noteHeaders(errorHeaders(err), paced=False)
+                self._backoff(attempt, code)
+                continue
+
+            self.calls += 1
+            self._noteHeaders(getattr(response, 'headers', None))
+            return response
+
+    def _wait(self) :
+        now = self.clock()
+        if self.remaining is not None and self.remaining <= self.reserve and self.reset :
+            # Window used up; wait for it to reset
+            self.sleep(self.reset + self.margin - now)
+            self.remaining = None
+            self.reset = None
+        elif self.nextCall is not None :
+            self.sleep(self.nextCall - now)
+
+    def _noteHeaders(self, headers, paced=True) :
+        remaining = _intHeader(headers, 'x-rate-limit-remaining')
+        reset     = _intHeader(headers, 'x-rate-limit-reset')
+        if remaining is not None and reset is not None :
+            self.remaining = remaining
+            self.reset     = reset
+            self.nextCall  = None
+        elif paced :
+            self.nextCall  = self.clock() + self.fallbackInterval
+
+    def _backoff(self, attempt, code) :
+        delay = self.rand() * min(self.maxDelay, self.baseDelay * 2**attempt)
+        if code in (420, 429) and self.reset :
+            # The reset time says when calls will succeed again, so there's
+            # no need to keep probing; spread restarts with the jitter.
+            self.remaining = 0
+        self.sleep(delay)
+
+    def sleep(self, seconds) :
+        if seconds > 0 :
+            self.slept += seconds
+            tweetProfile.current.call('sleep', self._sleep, seconds)
+
+    def rate(self) :
+        """Successful calls per second since the first call"""
+        elapsed = self.clock() - self.started if self.started is not None else 0
+        return self.calls / elapsed if elapsed > 0 else 0.0
+
+    def report(self) :
+        elapsed = self.clock() - self.started if self.started is not None else 0
+        return '{} pages in {:.1f} s ({:.2f} pages/s), {:.1f} s waiting, {} errors'.format(
+            self.calls, elapsed, self.rate(), self.slept, self.errors)
+
+
+def errorCode(err) :
+    """HTTP status of a failed call, if it has one. Errors from the twitter
+    package wrap the urllib2 error as err.e."""
+    return getattr(getattr(err, 'e', err), 'code', None)
+
+
+def errorHeaders(err) :
+    return getattr(getattr(err, 'e', err), 'headers', None)
+
+
+def retriable(err, code) :
+    """Rate-limit and server errors are worth retrying, as are network
+    errors without a status. Other client errors won't get better."""
+    if isinstance(code, int) :
+        return code in (420, 429) or code >= 500
+    return isinstance(err, networkErrors)
+
+
+def _intHeader(headers, name) :
+    if not headers :
+        return None
+    try :
+        return int(headers.get(name))
+    except (TypeError, ValueError) :
+        return None
@@ -14,6 +14,13 @@
 //  08 May 2015 - Added link to larger image to pictures
 //  19 Oct 2015 - Now get "tweets" element by ID rather than relative to
 //                the tweet in mouseEvent. Changed for quoted tweet support.
+//  18 Oct 2026 - Load thumbnails and user icons only as they scroll near
+//                the viewport, where IntersectionObserver is supported,
+//                and create each larger picture on the first mouseover of
+//                its thumbnail. The mouse events are handled by a single
+//                handler on the "tweets" element. Older browsers still
+//                load everything after page-load. Thumbnails mirrored by
+//                mirrorMedia.py name their local hover picture.
 //
 // *****************************************************************************
 
@@ -49,16 +56,8 @@ function loadPosterIcons () {
 
     // Grab the real image src from the dataset src, replacing
     // the temporary icon used to speed page loading.
-    var img;
-    var tmp;
     for (var ix=0; ix < posterIcons.length; ix++) {
-        img = posterIcons[ix].getElementsByTagName('img')[0];
-        if ( img.dataset.src ) {
-            addEvent (img, 'error', recantImage);
-            tmp = img.src;
-            img.src = img.dataset.src;
-            img.dataset.src = tmp;
-        }
+        loadImage (posterIcons[ix].getElementsByTagName('img')[0]);
     }
 }
 
@@ -95,13 +94,127 @@ function recantImage (event) {
 }
 
 
+// How far outside the viewport images start loading, as a CSS margin
+var lazyMargin = '300px 0px';
+
+
+function loadImage (img) {
+
+    // Grab the real image src from the dataset src, replacing the
+    // temporary image used to speed page loading.
+
+    if ( img.dataset.src ) {
+        addEvent (img, 'error', recantImage);
+        var tmp = img.src;
+        img.src = img.dataset.src;
+        img.dataset.src = tmp;
+    }
+}
+
+
+function pictureSources (thumbnail) {
+
+    // Return the URLs for the hover picture and the link to a larger
+    // picture. These are given by the data-picture and data-link
+    // attributes of a thumbnail mirrored by mirrorMedia.py. Otherwise
+    // choose image sizes (small and medium or medium and large) from
+    // Twitter based on the viewport width.
+
+    if ( thumbnail.dataset.picture ) {
+        return [thumbnail.dataset.picture, thumbnail.dataset.link];
+    }
+
+    var thumbSrc = thumbnail.src;
+    var tweets  = document.getElementById('tweets');
+    var space   = tweets.getBoundingClientRect();
+    var vpwidth = space.right - space.left;
+
+    var pictSrc = thumbSrc.split(/:thumb/)[0];
+    var linkSrc = pictSrc;
+    if ( vpwidth < 600 ) {
+        pictSrc += ':small';
+        linkSrc += ':medium';
+    } else {
+        pictSrc += ':medium';
+        linkSrc += ':large';
+    }
+    return [pictSrc, linkSrc];
+}
+
+
+function showThumbnail (thumbnail) {
+
+    // Load the actual thumbnail picture if a dummy image was used to
+    // speed loading, then wrap the thumbnail in a link to a larger image.
+    // This is done once, whether the thumbnail first scrolls into view
+    // or is hovered over.
+
+    if ( thumbnail.shown ) return;
+    thumbnail.shown = true;
+    loadImage (thumbnail);
+
+    var lnk = document.createElement('a');
+    lnk.setAttribute('href', pictureSources(thumbnail)[1]);
+    thumbnail.parentNode.insertBefore(lnk, thumbnail);
+    lnk.appendChild(thumbnail);
+}
+
+
+function thumbnailPicture (thumbnail) {
+
+    // Return the larger picture that follows a thumbnail (or the link
+    // around it), or null if it hasn't been created yet.
+
+    var node = thumbnail.parentNode;
+    if ( node.nodeName.toLowerCase() != 'a' ) node = thumbnail;
+    var next = node.nextSibling;
+    if ( next && next.className == 'picture' ) return next;
+    return null;
+}
+
+
+function addPicture (thumbnail) {
+
+    // Create the larger image displayed when the mouse hovers over a
+    // thumbnail, inserting it into the DOM after the thumbnail and its
+    // link. The size fetched from Twitter depends on the viewport size.
+
+    var img = document.createElement("img");
+    img.style.display = 'none';
+
+    // Create a fallback if the wanted image has an error
+    if ( thumbnail.dataset.src ) {
+        img.dataset.src = thumbnail.dataset.src;
+        addEvent(img, 'error', recantImage);
+    }
+
+    // If the picture is being hovered over when it arrives, it was
+    // placed before its size was known, so place it again.
+    addEvent(img, 'load', function () {
+        if ( img.style.display == 'block' ) {
+            img.style.width  = '';
+            img.style.height = '';
+            placePicture (img);
+        }
+    });
+
+    img.src = pictureSources(thumbnail)[0];
+    img.className = 'picture';
+    img.alt = 'larger picture';
+
+    var node = thumbnail.parentNode;
+    if ( node.nodeName.toLowerCase() != 'a' ) node = thumbnail;
+    node.parentNode.insertBefore(img, node.nextSibling);
+    return img;
+}
+
+
 function addPictures () {
 
     // Load the actual thumbnail pictures if a dummy image was
     // used to speed loading and create the larger images
-    // displayed when the mouse hovers over the thumbnail. The
-    // size of the larger image fetched from Twitter (small or
-    // medium) depends on the viewport size.
+    // displayed when the mouse hovers over the thumbnail. This is
+    // the fallback for browsers that can't load them lazily.
 
     // Don't do anything if the Document Object Model (DOM)
     // isn't supported by the browser
@@ -110,75 +223,99 @@ function addPictures () {
         return;
     }
 
-    // Calculate the viewport width and height
-    var space  = tweets.getBoundingClientRect();
-    var vpwidth = space.right - space.left;
-    var vpheight = document.documentElement.clientHeight;
-
-    // Get a list of the thumbnail elements
-    var thumbnails = document.getElementsByClassName("thumbnail");
-    var thumbSrc;
-    var pictSrc;
-    var linkSrc;
-    var tmp;
+    // Copy the list of thumbnail elements, as the live list changes
+    // while the thumbnails are moved into their links.
+    var live = document.getElementsByClassName("thumbnail");
+    var thumbnails = [];
+    for (var ix=0; ix < live.length; ix++) {
+        thumbnails.push(live[ix]);
+    }
 
     for (var ix=0; ix < thumbnails.length; ix++) {
+        showThumbnail (thumbnails[ix]);
+        addPicture (thumbnails[ix]);
+    }
+}
 
-        // Get the source URL for the thumbnail and remove the
-        // ':thumb' off of the end. Allow for the thumbnail
-        // itself being post-loaded from the data-src attribute.
-
-        if ( thumbnails[ix].dataset.src ) {
 
-            // Dummy image used for the thumbnail. Get the real
-            // sources from the data-src attribute.
+function lazyLoadImages () {
 
-            addEvent(thumbnails[ix], 'error', recantImage);
-            tmp = thumbnails[ix].src;
-            thumbSrc = thumbnails[ix].dataset.src;
-            thumbnails[ix].src = thumbSrc;
-            thumbnails[ix].dataset.src = tmp;
+    // Load the thumbnails and user icons as they come within lazyMargin
+    // of the viewport, rather than all of them at page-load. Returns
+    // false if the browser can't, so they're all loaded at once.
 
-        } else {
+    if ( !document.getElementsByClassName || !('IntersectionObserver' in window) ) {
+        return false;
+    }
 
-            // The actual thumbnail is already loaded.
-            thumbSrc = thumbnails[ix].src;
+    var observer = new IntersectionObserver(function (entries, observer) {
+        for (var ix=0; ix < entries.length; ix++) {
+            if ( !entries[ix].isIntersecting ) continue;
+            var img = entries[ix].target;
+            observer.unobserve(img);
+            if ( img.className == 'thumbnail' ) {
+                showThumbnail (img);
+            } else {
+                loadImage (img);
+            }
         }
+    }, { rootMargin: lazyMargin });
 
-        // Set the base URLs for the hover picture and the link to a larger
-        // picture, then choose image sizes (small and medium or medium and
-        // large) from Twitter based on the viewport width.
-        pictSrc = thumbSrc.split(/:thumb/)[0];
-        linkSrc = pictSrc;
-        if ( vpwidth < 600 ) {
-            pictSrc += ':small';
-            linkSrc += ':medium';
-        } else {
-            pictSrc += ':medium';
-            linkSrc += ':large';
-        }
+    var thumbnails = document.getElementsByClassName("thumbnail");
+    for (var ix=0; ix < thumbnails.length; ix++) {
+        observer.observe(thumbnails[ix]);
+    }
+    var posterIcons = document.getElementsByClassName("posterimg");
+    for (var ix=0; ix < posterIcons.length; ix++) {
+        observer.observe(posterIcons[ix].getElementsByTagName('img')[0]);
+    }
+    return true;
+}
 
-        // Insert the hover image into the DOM after the thumbnail
-        var img = document.createElement("img");
-        img.style.display = 'none';
 
-        // Create a fallback if the wanted image has an error
-        if ( thumbnails[ix].dataset.src ) {
-            img.dataset.src = thumbnails[ix].dataset.src;
-            addEvent(thumbnails[ix], 'error', recantImage);
-        }
+function placePicture (image) {
 
-        img.src = pictSrc;
-        img.className = 'picture';
-        img.alt = 'larger picture';
-        thumbnails[ix].parentNode.insertBefore(img, thumbnails[ix].nextSibling);
+    // Show a larger picture, scaled and positioned to fit the viewport.
 
-        // Wrap the thumbnail image in a link to a larger image.
-        var lnk = document.createElement('a');
-        lnk.setAttribute('href', linkSrc);
-        thumbnails[ix].parentNode.insertBefore(lnk, thumbnails[ix]);
-        lnk.appendChild(thumbnails[ix]);
+    var tweets = document.getElementById('tweets');
+    var rmarg  = 0.85;
+
+    // Calculate the viewport width and height
+    var space  = tweets.getBoundingClientRect();
+    var vpwidth = space.right - space.left;
+    var vpheight = document.documentElement.clientHeight;
+
+    // Bring the larger image into the display so that
+    // its width and height can be determined.
+    image.style.display = 'block';
+
+    // Get the image width and height
+    var width  = image.offsetWidth;
+    var height = image.offsetHeight;
+
+    // Scale the larger image as necessary to ensure that it fits in the
+    // viewport and doesn't overlap the thumbnail image.
+    if (width > rmarg*vpwidth) {
+        height = (rmarg * vpwidth/width) * height;
+        width  = rmarg * vpwidth;
+    }
+    if (height > 0.95*vpheight) {
+        width  = (0.95 * vpheight/height) * width;
+        height = 0.95 * vpheight;
     }
+
+    // Now the position can be calculated allowing for the desired
+    // margins. The image vertical location is relative to the
+    // beginning of all tweets, not just the tweet containing it.
+
+    var left = Math.min(Math.max(0,rmarg*vpwidth-width), 0.5*(vpwidth-width));
+    var top  = (vpheight - height)/2 - space.top;
+
+    // Finally, set the image position and size.
+    image.style.left   = left.toString()   + 'px';
+    image.style.top    = top.toString()    + 'px';
+    image.style.width  = width.toString()  + 'px';
+    image.style.height = height.toString() + 'px';
 }
 
 
@@ -196,55 +333,23 @@ function mouseImageEvent (event) {
         var thumbnail = event.target;
     }
 
-    var link   = thumbnail.parentNode;
-    var tweet  = link.parentNode;
-    var tweets = document.getElementById('tweets');
-    var image  = tweet.getElementsByClassName("picture")[0];
-    var rmarg  = 0.85;
+    // Events from anything other than a thumbnail pass through
+    if ( thumbnail.className != 'thumbnail' ) return true;
+
+    var image = thumbnailPicture(thumbnail);
+
+    // The larger picture is created the first time it's wanted
+    if ( !image && event.type.toLowerCase() == 'mouseover' ) {
+        showThumbnail (thumbnail);
+        image = addPicture(thumbnail);
+    }
 
     if (image) {
 
         switch ( event.type.toLowerCase() ) {
 
         case 'mouseover' :
-
-            // Calculate the viewport width and height
-            var space  = tweets.getBoundingClientRect();
-            var vpwidth = space.right - space.left;
-            var vpheight = document.documentElement.clientHeight;
-
-            // Bring the larger image into the display so that
-            // its width and height can be determined.
-            image.style.display = 'block';
-
-            // Get the image width and height
-            var width  = image.offsetWidth;
-            var height = image.offsetHeight;
-
-            // Scale the larger image as necessary to ensure that it fits in the
-            // viewport and doesn't overlap the thumbnail image.
-            if (width > rmarg*vpwidth) {
-                height = (rmarg * vpwidth/width) * height;
-                width  = rmarg * vpwidth;
-            }
-            if (height > 0.95*vpheight) {
-                width  = (0.95 * vpheight/height) * width;
-                height = 0.95 * vpheight;
-            }
-
-            // Now the position can be calculated allowing for the desired
-            // margins. The image vertical location is relative to the
-            // beginning of all tweets, not just the tweet containing it.
-
-            var left = Math.min(Math.max(0,rmarg*vpwidth-width), 0.5*(vpwidth-width));
-            var top  = (vpheight - height)/2 - space.top;
-
-            // Finally, set the image position and size.
-            image.style.left   = left.toString()   + 'px';
-            image.style.top    = top.toString()    + 'px';
-            image.style.width  = width.toString()  + 'px';
-            image.style.height = height.toString() + 'px';
-
+            placePicture (image);
             break;
 
         case 'mouseout' :
@@ -266,22 +371,21 @@ function setMouseHandler () {
     // isn't supported by the browser
     if ( !document.getElementsByClassName ) return;
 
-    // Get a list of the thumbnail elements
-    var thumbnails = document.getElementsByClassName("thumbnail");
-
-    for (var ix=0; ix < thumbnails.length; ix++) {
-
-        var img = thumbnails[ix];
-
-        // Set event listeners for the thumbnail
-        img.onmouseover = mouseImageEvent;
-        img.onmouseout  = mouseImageEvent;
-        img.onmousedown = mouseImageEvent;
+    // Handle the mouse events of every thumbnail with one handler on the
+    // element holding all the tweets, as the events bubble up to it.
+    var tweets = document.getElementById('tweets');
+    tweets.onmouseover = mouseImageEvent;
+    tweets.onmouseout  = mouseImageEvent;
+    tweets.onmousedown = mouseImageEvent;
 
-    }
     return false;
 }
 
 
-addEvent (window, 'load', function () {addPictures ();  setMouseHandler ();} );
-addEvent (window, 'load', loadPosterIcons);
\ No newline at end of file
+addEvent (window, 'load', function () {
+    if ( !lazyLoadImages () ) {
+        addPictures ();
+        loadPosterIcons ();
+    }
+    setMouseHandler ();
+} );
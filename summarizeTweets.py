@@ -0,0 +1,516 @@
+# -*- coding: utf-8 -*-
+# *****************************************************************************
+#   This routine writes the headline numbers of an event from one pass over
+#   its tweets: tweets per hour, originals, retweets, quotes and replies,
+#   unique posters, the top tweets by retweets and by favorites, and the top
+#   hashtags, links and pictures.
+#
+#   The top tweets are kept in bounded heaps and the rest in exact counters.
+#   For archives too large for exact counts, --sketch counts unique posters
+#   with a HyperLogLog and the hashtags, links and pictures with a Count-Min
+#   sketch that tracks a bounded set of heavy hitters, so memory stays fixed
+#   whatever the size of the archive.
+#
+#   The state of a summary can be saved (--state) and summaries merged
+#   (--merge) without rereading any tweets, so per-day summaries combine
+#   into one for the whole event. The report is written as JSON (--json) and
+#   as an HTML section (--html) that writeHTML.py places above the tweets
+#   with its --summary option.
+#
+#   Simplest usage: python summarizeTweets.py INPUT-FILENAME
+#
+#   options:
+#       -h | --help    Print help information
+#       -j | --json    JSON-FILENAME for the report
+#       -m | --html    HTML-FILENAME for the report section
+#       --state        STATE-FILENAME (.json) to save the summary to
+#       --merge        STATE-FILENAME of a saved summary to merge in (may be
+#                      repeated, with or without input files)
+#       -k | --top     Number of entries in each top list (default 10)
+#       --sketch       Count with HyperLogLog and Count-Min sketches
+#       --user, --since, --until, --tz, --match, --limit, --sorted, --columns
+#                      Select tweets by poster, time, text or count
+#       --profile, --cprofile
+#                      Save the time and memory of each phase as JSON, or
+#                      cProfile statistics (see tweetProfile.py)
+#
+#   Keith Eric Grant (keg@ramblemuse.com)
+#   18 Oct 2026
+#       The Count-Min rows take their cells from slices of an MD5 digest
+#       rather than CRCs, which collide in every row at once. Saved states
+#       from before can't be merged.
+#
+# *****************************************************************************
+
+import sys
+import os
+import argparse
+import array
+import base64
+import cgi
+import collections
+import hashlib
+import heapq
+import io
+import math
+import struct
+import zlib
+import simplejson as json
+import htmlWrapper
+import tweetStore
+import tweetArchive
+import tweetTime
+import tweetProfile
+
+
+myName  = 'summarizeTweets.py'
+version = '1.0.1'
+
+# Version of the saved state
+stateVersion = 2
+
+# Sketch sizes: 2**hllBits HyperLogLog registers (about 0.8% error), and a
+# Count-Min sketch of cmsDepth rows of 2**cmsBits counters
+hllBits  = 14
+cmsBits  = 16
+cmsDepth = 4
+
+
+class hyperLogLog(object) :
+    """Estimated count of distinct items, in a fixed 2**bits bytes"""
+
+    def __init__(self, bits=None, registers=None) :
+        self.bits = bits if bits else hllBits
+        size = 1 << self.bits
+        self.registers = registers if registers is not None else bytearray(size)
+
+    def add(self, item) :
+        h = struct.unpack('<Q', hashlib.md5(item.encode('utf-8')).digest()[:8])[0]
+        index = h >> (64 - self.bits)
+        rest = (h << self.bits) & 0xFFFFFFFFFFFFFFFF
+        rank = 65 - rest.bit_length() if rest else 65 - self.bits
+        if rank > self.registers[index] :
+            self.registers[index] = rank
+
+    def merge(self, other) :
+        self.registers = bytearray(max(x, y) for x, y in zip(self.registers, other.registers))
+
+    def count(self) :
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0 ** -x for x in self.registers)
+        zeros = self.registers.count(b'\x00')
+        if estimate <= 2.5 * size and zeros :
+            estimate = size * math.log(float(size) / zeros)
+        return int(round(estimate))
+
+    def state(self) :
+        return {'bits' : self.bits, 'registers' : base64.b64encode(bytes(self.registers))}
+
+    @classmethod
+    def fromState(cls, state) :
+        return cls(state['bits'], bytearray(base64.b64decode(state['registers'])))
+
+
+class countMin(object) :
+    """Approximate counts of items in a fixed table. Estimates are never
+    low, and high by at most a small fraction of the total count. Each row
+    takes an item's cell from its own 32 bits of the item's MD5 digest, so
+    items that share a cell in one row rarely share one in the others."""
+
+    def __init__(self, bits=None, depth=None, rows=None) :
+        self.bits = bits if bits else cmsBits
+        self.depth = depth if depth else cmsDepth
+        self.mask = (1 << self.bits) - 1
+        self.rows = rows if rows else [array.array('l', [0]) * (1 << self.bits) for _ in range(self.depth)]
+
+    def cells(self, item) :
+        """The cell of an item in each row. Rows beyond four take theirs from
+        further digests, each of the one before and the item."""
+        data = item.encode('utf-8')
+        digest = hashlib.md5(data).digest()
+        while len(digest) < 4 * self.depth :
+            digest += hashlib.md5(digest[-16:] + data).digest()
+        mask = self.mask
+        return [x & mask for x in struct.unpack('<{}I'.format(self.depth), digest[:4 * self.depth])]
+
+    def add(self, item, count=1) :
+        """Count an item, returning its new estimate"""
+        estimate = None
+        for cell, row in zip(self.cells(item), self.rows) :
+            row[cell] += count
+            estimate = row[cell] if estimate is None else min(estimate, row[cell])
+        return estimate
+
+    def estimate(self, item) :
+        return min(row[cell] for cell, row in zip(self.cells(item), self.rows))
+
+    def merge(self, other) :
+        for row, more in zip(self.rows, other.rows) :
+            for ix, count in enumerate(more) :
+                if count :
+                    row[ix] += count
+
+    def state(self) :
+        return {'bits' : self.bits, 'rows' : [base64.b64encode(zlib.compress(x.tostring())) for x in self.rows]}
+
+    @classmethod
+    def fromState(cls, state) :
+        rows = []
+        for text in state['rows'] :
+            row = array.array('l')
+            row.fromstring(zlib.decompress(base64.b64decode(text)))
+            rows.append(row)
+        return cls(state['bits'], len(rows), rows)
+
+
+class topCounter(object) :
+    """Counts of items, exact or in a Count-Min sketch. A sketch keeps up to
+    a few times top candidates for the most frequent items."""
+
+    def __init__(self, top, sketch=False) :
+        self.top = top
+        self.sketch = countMin() if sketch else None
+        self.counts = {} if sketch else collections.Counter()
+
+    def add(self, item) :
+        if self.sketch is None :
+            self.counts[item] += 1
+            return
+        self.counts[item] = self.sketch.add(item)
+        if len(self.counts) > 4 * self.top :
+            self._prune()
+
+    def _prune(self) :
+        self.counts = dict(heapq.nlargest(2 * self.top, self.counts.iteritems(), key=lambda x: x[1]))
+
+    def merge(self, other) :
+        if self.sketch is None :
+            self.counts.update(other.counts)
+            return
+        self.sketch.merge(other.sketch)
+        items = set(self.counts) | set(other.counts)
+        self.counts = dict((x, self.sketch.estimate(x)) for x in items)
+        self._prune()
+
+    def most(self, top=None) :
+        """The top items and their counts, ties broken by item"""
+        return heapq.nsmallest(top if top else self.top, self.counts.iteritems(), key=lambda x: (-x[1], x[0]))
+
+    def state(self) :
+        return {'counts' : self.counts,
+                'sketch' : self.sketch.state() if self.sketch else None}
+
+    @classmethod
+    def fromState(cls, top, state) :
+        counter = cls(top, state['sketch'] is not None)
+        if counter.sketch :
+            counter.sketch = countMin.fromState(state['sketch'])
+            counter.counts = dict(state['counts'])
+        else :
+            counter.counts.update(state['counts'])
+        return counter
+
+
+class topTweets(object) :
+    """The tweets with the highest value of a count such as retweet_count,
+    each at its highest count seen. Retweets stand for the tweet they
+    retweet."""
+
+    def __init__(self, top, field) :
+        self.top = top
+        self.field = field
+        self.best = {}
+
+    def add(self, tweet) :
+        tweet = tweet.get('retweeted_status', tweet)
+        count = tweet.get(self.field) or 0
+        id = tweet['id']
+        held = self.best.get(id)
+        if held is not None and held[0] >= count :
+            return
+        self.best[id] = (count, tweet['user']['screen_name'], tweet['text'], tweet['created_at'])
+        if len(self.best) > 4 * self.top :
+            self._prune()
+
+    def _prune(self) :
+        self.best = dict(heapq.nlargest(self.top, self.best.iteritems(), key=lambda x: (x[1][0], -x[0])))
+
+    def merge(self, other) :
+        for id, entry in other.best.iteritems() :
+            if id not in self.best or self.best[id][0] < entry[0] :
+                self.best[id] = entry
+        self._prune()
+
+    def most(self, top=None) :
+        """The top tweets as dicts, highest count first"""
+        top = heapq.nsmallest(top if top else self.top, self.best.iteritems(), key=lambda x: (-x[1][0], x[0]))
+        return [{'id' : id, 'count' : x[0], 'screen_name' : x[1], 'text' : x[2],
+                 'created_at' : x[3]} for id, x in top]
+
+    def state(self) :
+        self._prune()
+        return [[id] + list(x) for id, x in self.best.iteritems()]
+
+    @classmethod
+    def fromState(cls, top, field, state) :
+        tweets = cls(top, field)
+        tweets.best = dict((x[0], tuple(x[1:])) for x in state)
+        return tweets
+
+
+class eventSummary(object) :
+    """Headline numbers for a stream of tweets, built by add and combined
+    with merge"""
+
+    def __init__(self, top=10, sketch=False) :
+        self.top = top
+        self.sketch = sketch
+        self.tweets = self.originals = self.retweets = self.quotes = self.replies = 0
+        self.first = self.last = None        # (id, created_at)
+        self.hours = collections.Counter()
+        self.posters = hyperLogLog() if sketch else set()
+        self.hashtags = topCounter(top, sketch)
+        self.urls = topCounter(top, sketch)
+        self.media = topCounter(top, sketch)
+        self.retweeted = topTweets(top, 'retweet_count')
+        self.favorited = topTweets(top, 'favorite_count')
+
+    def add(self, tweet) :
+        self.tweets += 1
+        if 'retweeted_status' in tweet :
+            self.retweets += 1
+        else :
+            self.originals += 1
+        if 'quoted_status' in tweet :
+            self.quotes += 1
+        if tweet.get('in_reply_to_status_id') is not None :
+            self.replies += 1
+
+        stamp = (tweet['id'], tweet['created_at'])
+        if self.first is None or stamp < self.first :
+            self.first = stamp
+        if self.last is None or stamp > self.last :
+            self.last = stamp
+        self.hours[tweetTime.hourOf(tweet['created_at'])] += 1
+        self.posters.add(tweet['user']['screen_name'].lower())
+
+        entities = tweet.get('entities', {})
+        for tag in entities.get('hashtags', ()) :
+            self.hashtags.add(u'#' + tag['text'].lower())
+        for url in entities.get('urls', ()) :
+            self.urls.add(url.get('expanded_url') or url['url'])
+        for picture in entities.get('media', ()) :
+            self.media.add(picture['media_url'])
+
+        self.retweeted.add(tweet)
+        self.favorited.add(tweet)
+
+    def merge(self, other) :
+        if self.sketch != other.sketch :
+            raise ValueError('Can\'t merge exact and sketched summaries')
+        self.top = max(self.top, other.top)
+        self.tweets += other.tweets
+        self.originals += other.originals
+        self.retweets += other.retweets
+        self.quotes += other.quotes
+        self.replies += other.replies
+        for stamp in (other.first, other.last) :
+            if stamp is not None :
+                self.first = stamp if self.first is None else min(self.first, stamp)
+                self.last = stamp if self.last is None else max(self.last, stamp)
+        self.hours.update(other.hours)
+        if self.sketch :
+            self.posters.merge(other.posters)
+        else :
+            self.posters |= other.posters
+        for name in ('hashtags', 'urls', 'media', 'retweeted', 'favorited') :
+            getattr(self, name).merge(getattr(other, name))
+        return self
+
+    def uniquePosters(self) :
+        return self.posters.count() if self.sketch else len(self.posters)
+
+    def report(self, top=None) :
+        """The headline numbers as a JSON-serializable dict, with top lists
+        of up to top entries"""
+        return {'tweets' : self.tweets, 'originals' : self.originals,
+                'retweets' : self.retweets, 'quotes' : self.quotes,
+                'replies' : self.replies, 'posters' : self.uniquePosters(),
+                'estimated' : self.sketch,
+                'first' : self.first[1] if self.first else None,
+                'last' : self.last[1] if self.last else None,
+                'hours' : [[x, self.hours[x]] for x in sorted(self.hours)],
+                'hashtags' : self.hashtags.most(top), 'urls' : self.urls.most(top),
+                'media' : self.media.most(top),
+                'retweeted' : self.retweeted.most(top),
+                'favorited' : self.favorited.most(top)}
+
+    def state(self) :
+        return {'version' : stateVersion, 'top' : self.top, 'sketch' : self.sketch,
+                'counts' : [self.tweets, self.originals, self.retweets, self.quotes, self.replies],
+                'first' : self.first, 'last' : self.last, 'hours' : self.hours,
+                'posters' : self.posters.state() if self.sketch else sorted(self.posters),
+                'hashtags' : self.hashtags.state(), 'urls' : self.urls.state(),
+                'media' : self.media.state(), 'retweeted' : self.retweeted.state(),
+                'favorited' : self.favorited.state()}
+
+    def save(self, filename) :
+        tmp = filename + '.part'
+        with open(tmp, 'wb') as out :
+            json.dump(self.state(), out, separators=(',', ':'))
+        os.rename(tmp, filename)
+
+    @classmethod
+    def load(cls, filename) :
+        """A summary saved by save, raising ValueError if it was saved by
+        another version"""
+        with open(filename, 'rb') as inp :
+            state = json.load(inp)
+        if state.get('version') != stateVersion :
+            raise ValueError('{} holds a summary from another version'.format(filename))
+        top = state['top']
+        summary = cls(top, state['sketch'])
+        (summary.tweets, summary.originals, summary.retweets, summary.quotes,
+            summary.replies) = state['counts']
+        summary.first = tuple(state['first']) if state['first'] else None
+        summary.last = tuple(state['last']) if state['last'] else None
+        summary.hours.update(state['hours'])
+        if summary.sketch :
+            summary.posters = hyperLogLog.fromState(state['posters'])
+        else :
+            summary.posters = set(state['posters'])
+        for name in ('hashtags', 'urls', 'media') :
+            setattr(summary, name, topCounter.fromState(top, state[name]))
+        summary.retweeted = topTweets.fromState(top, 'retweet_count', state['retweeted'])
+        summary.favorited = topTweets.fromState(top, 'favorite_count', state['favorited'])
+        return summary
+
+
+def writeSection(out, report, depth=3) :
+    """Write a report as an HTML section laid out to sit in writeHTML's
+    container element, above the tweets"""
+
+    def table(parent, title, rows) :
+        doc_table = parent.add_element('table', ('class="summary"',))
+        doc_caption = doc_table.add_element('caption')
+        doc_caption.add_text(cgi.escape(title))
+        doc_caption.close()
+        for cells in rows :
+            doc_row = doc_table.add_element('tr')
+            for cell in cells :
+                doc_cell = doc_row.add_element('td')
+                doc_cell.add_text(cell)
+                doc_cell.close()
+            doc_row.close()
+        doc_table.close()
+
+    def link(url) :
+        url = cgi.escape(url, True)
+        return u'<a href="{0}">{0}</a>'.format(url)
+
+    def tweet(entry) :
+        return u'<a href="https://twitter.com/{0}/status/{1}">@{0}</a>: {2}'.format(
+            entry['screen_name'], entry['id'], cgi.escape(entry['text']))
+
+    doc = htmlWrapper.streamFragment(out, depth)
+    doc_summary = doc.add_element('div', ('id="summary"',))
+    doc_remark = doc_summary.add_element('div', ('class="remark"',))
+    doc_remark.add_text(u'{} tweets ({} originals, {} retweets, {} quotes, {} replies) '
+        u'from {}{} posters, {} to {}'.format(report['tweets'], report['originals'],
+        report['retweets'], report['quotes'], report['replies'],
+        u'about ' if report['estimated'] else u'', report['posters'],
+        report['first'], report['last']))
+    doc_remark.close()
+
+    table(doc_summary, 'Tweets per hour (UTC)', [(x, unicode(y)) for x, y in report['hours']])
+    table(doc_summary, 'Most retweeted', [(unicode(x['count']), tweet(x)) for x in report['retweeted']])
+    table(doc_summary, 'Most favorited', [(unicode(x['count']), tweet(x)) for x in report['favorited']])
+    table(doc_summary, 'Top hashtags', [(unicode(y), cgi.escape(x)) for x, y in report['hashtags']])
+    table(doc_summary, 'Top links', [(unicode(y), link(x)) for x, y in report['urls']])
+    table(doc_summary, 'Top pictures', [(unicode(y), link(x)) for x, y in report['media']])
+    doc_summary.close()
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+
+    parser = argparse.ArgumentParser(
+        prog=myName,
+        description='Summarize the tweets of an event in one pass',
+        version=version)
+    parser.add_argument('inpfiles', action='store', nargs='*', help='Input tweet filenames (.json, .jsonl, .pickle or .db)')
+    parser.add_argument('--json', '-j', action='store', dest='json', help='JSON output file for the report')
+    parser.add_argument('--html', '-m', action='store', dest='html', help='HTML output file for the report section')
+    parser.add_argument('--state', action='store', dest='state', help='File to save the summary to, for merging later')
+    parser.add_argument('--merge', action='append', dest='merge', default=[], help='Saved summary to merge in')
+    parser.add_argument('--top', '-k', action='store', type=int, default=10, help='Number of entries in each top list')
+    parser.add_argument('--sketch', action='store_true', default=False, help='Count with HyperLogLog and Count-Min sketches')
+    tweetArchive.addQueryArguments(parser)
+    tweetProfile.addProfileArguments(parser)
+    args = parser.parse_args(argv[1:])
+    tweetProfile.start(myName, args)
+
+    if not args.inpfiles and not args.merge :
+        print 'Give input files, saved summaries to merge, or both'
+        return 1
+
+    try :
+        query = tweetArchive.queryArguments(args)
+        summary = None
+        for filename in args.merge :
+            saved = eventSummary.load(filename)
+            summary = saved if summary is None else summary.merge(saved)
+            print '{}: {} tweets'.format(filename, saved.tweets)
+    except (ValueError, IOError) as err :
+        print err
+        return 1
+
+    # Tweets are summarized the way the saved summaries were, exactly or
+    # with sketches
+    if summary is None :
+        summary = eventSummary(args.top, args.sketch)
+
+    for inpfile in args.inpfiles :
+        try :
+            inp = tweetStore.counter(tweetStore.selectTweets(inpfile, **query))
+        except ValueError as err :
+            print 'Unknown extension {}'.format(err)
+            return 1
+        part = eventSummary(args.top, summary.sketch)
+        add = tweetProfile.current.function('transform', part.add)
+        for tweet in inp :
+            add(tweet)
+        with tweetProfile.current.phase('transform') :
+            summary.merge(part)
+        print '{}: {} tweets'.format(inpfile, inp.count)
+
+    with tweetProfile.current.phase('transform') :
+        report = summary.report(args.top)
+    print '{} tweets from {}{} posters, {} to {}'.format(report['tweets'],
+        'about ' if report['estimated'] else '', report['posters'], report['first'], report['last'])
+    for title, key in (('Top hashtags', 'hashtags'), ('Top links', 'urls')) :
+        print '\n{}'.format(title)
+        for item, count in report[key] :
+            print u'{:8d}  {}'.format(count, item).encode('utf-8')
+    print '\nMost retweeted'
+    for entry in report['retweeted'] :
+        print u'{:8d}  @{}: {}'.format(entry['count'], entry['screen_name'],
+            entry['text'].replace(u'\n', u' ')).encode('utf-8')
+
+    if args.json :
+        with open(args.json, 'wb') as out :
+            json.dump(report, tweetProfile.current.writer(out), indent=1)
+        print '\nWrote the report to {}'.format(args.json)
+    if args.html :
+        with io.open(args.html, 'w', encoding='utf-8') as out :
+            writeSection(tweetProfile.current.writer(out), report)
+        print 'Wrote the report section to {}'.format(args.html)
+    if args.state :
+        summary.save(args.state)
+        print 'Saved the summary to {}'.format(args.state)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+# *****************************************************************************
+#   Writes a synthetic conference capture of any size, for trying the tools
+#   on events larger than any real capture at hand and for benchTools.py.
+#
+#   The tweets have the fields the tools read, shaped as the Twitter API
+#   gives them: Snowflake IDs and created_at times spread over the event,
+#   users (a few of them posting most of the tweets) whose follower counts
+#   creep up as it goes, text whose entities (hashtags, mentions, links and
+#   pictures) index into it, retweet and favorite counts, languages,
+#   replies, and retweets and quotes carrying the tweets they repeat.
+#
+#   Tweet number N is made from its own random generator, seeded by the
+#   seed and N, so the same seed gives the same tweets (for the same Python
+#   version) whatever range of them is asked for and in whichever order.
+#   Two overlapping ranges are what two overlapping captures would hold.
+#
+#   Simplest usage: python synthTweets.py OUTPUT-FILENAME
+#
+#   options:
+#       -h | --help    Print help information
+#       -n | --count   Number of tweets in the event (default 10000)
+#       --first        Number of the first tweet written (default 0)
+#       --last         Number after the last tweet written (default --count)
+#       --seed         Random seed (default 1)
+#       --users        Number of posters (default one per 20 tweets, at
+#                      least 100)
+#       --hours        Length of the event (default 72)
+#       --start        Time the event starts, in UTC (default 2015-10-18)
+#       -a | --ascend  Write in ascending ID order (default descending, as
+#                      captured)
+#       --compact      Write JSON arrays compactly, a tweet per line
+#       --protocol     Pickle protocol (default the highest)
+#       --profile, --cprofile
+#                      Save the time and memory of each phase as JSON, or
+#                      cProfile statistics (see tweetProfile.py)
+#
+#   Keith Eric Grant (keg@ramblemuse.com)
+#   18 Oct 2026
+#
+# *****************************************************************************
+
+import sys
+import argparse
+import random
+import time
+import tweetStore
+import tweetProfile
+import tweetTime
+
+
+myName  = 'synthTweets.py'
+version = '1.0.0'
+
+# Share of the tweets of each kind
+retweetShare = 0.35
+quoteShare   = 0.05
+replyShare   = 0.08
+mediaShare   = 0.10
+
+# Retweets, quotes and replies are of one of this many tweets before them
+recentTweets = 200
+
+# Tweets between each increase of a user's follower count
+followerStep = 5000
+
+startTime = '2015-10-18'
+
+languages = ['en'] * 17 + ['es', 'fr', 'de']
+
+sources = [
+    u'<a href="http://twitter.com/download/iphone" rel="nofollow">Twitter for iPhone</a>',
+    u'<a href="http://twitter.com/download/android" rel="nofollow">Twitter for Android</a>',
+    u'<a href="http://twitter.com" rel="nofollow">Twitter Web Client</a>',
+    u'<a href="https://about.twitter.com/products/tweetdeck" rel="nofollow">TweetDeck</a>',
+]
+
+words = [u'conference', u'talk', u'slides', u'great', u'today', u'and',
+         u'keynote', u'caf\xe9', u'panel', u'the', u'on', u'about', u'new',
+         u'session', u'with', u'room', u'at', u'demo', u'is', u'for']
+
+
+def sampleText (rnd, id) :
+    """Make up tweet text of 60 to 140 characters with the entities (urls,
+    user_mentions and hashtags) whose indices fit it"""
+
+    text = u''
+    plain = 0
+    entities = {'urls' : [], 'user_mentions' : [], 'hashtags' : []}
+
+    size = rnd.randint(60, 140)
+    while plain < size - 25 :
+        kind = rnd.random()
+        if text :
+            text += u' '
+        start = plain + (1 if plain else 0)
+        if kind < 0.05 :
+            name = u'user{}'.format(rnd.randint(0, 999))
+            text += u'@' + name
+            entities['user_mentions'].append({'screen_name' : name,
+                'indices' : [start, start + len(name) + 1]})
+        elif kind < 0.12 :
+            tag = rnd.choice([u'pycon', u'data', u'ml', u'conf2015'])
+            text += u'#' + tag
+            entities['hashtags'].append({'text' : tag, 'indices' : [start, start + len(tag) + 1]})
+        elif kind < 0.16 :
+            url = u'http://t.co/{:010d}'.format(rnd.randint(0, 10**9))
+            text += url
+            entities['urls'].append({'url' : url, 'indices' : [start, start + len(url)],
+                'expanded_url' : u'http://example.com/post?id={}&x=1'.format(id),
+                'display_url' : u'example.com/post?id={}\u2026'.format(id)})
+        elif kind < 0.165 :
+            text += rnd.choice([u'&amp;', u'&lt;3', u'-&gt;'])
+        else :
+            text += rnd.choice(words)
+        plain = len(text.replace(u'&lt;', u'<').replace(u'&gt;', u'>').replace(u'&amp;', u'&'))
+
+    return text, entities
+
+
+def _length(text) :
+    """Length of tweet text as its entity indices count it"""
+    return len(text.replace(u'&lt;', u'<').replace(u'&gt;', u'>').replace(u'&amp;', u'&'))
+
+
+class synthesizer(object) :
+    """The tweets of a synthetic event, each made on its own from its
+    number"""
+
+    def __init__(self, count, seed=1, users=None, hours=72, start=None) :
+        self.count    = count
+        self.seed     = seed
+        self.users    = users if users else max(100, count // 20)
+        self.start    = int(tweetTime.parseTime(start if start else startTime) * 1000)
+        self.interval = hours * 3600000.0 / max(count, 1)
+        self.profiles = {}
+
+    def _random(self, number) :
+        return random.Random((self.seed << 32) + number)
+
+    def _head(self, number) :
+        """The generator of a tweet, past the draws of its ID and poster"""
+        rnd = self._random(number)
+        millis = self.start + int((number + 0.9 * rnd.random()) * self.interval)
+        id = ((millis - tweetTime.twitterEpoch) << tweetTime.timestampShift) | (number & 0x3fffff)
+        poster = (int(rnd.paretovariate(1.2)) - 1) % self.users
+        return rnd, id, millis, poster
+
+    def user(self, poster, number) :
+        """The profile of a poster as of a tweet, shared with the poster's
+        other tweets until the follower count goes up"""
+        followers = 50 + (poster * 7919) % 5000 + number // followerStep
+        held = self.profiles.get(poster)
+        if held and held['followers_count'] == followers :
+            return held
+        id = 100000 + poster
+        profile = {
+            'id' : id, 'id_str' : unicode(id),
+            'name' : u'Conference Goer {}'.format(poster),
+            'screen_name' : u'user{}'.format(poster),
+            'location' : u'Somewhere, CA',
+            'description' : u'Coder, speaker and coffee drinker. Opinions my own.',
+            'url' : None, 'protected' : False, 'verified' : poster % 97 == 0,
+            'followers_count' : followers,
+            'friends_count' : 100 + (poster * 31) % 900,
+            'statuses_count' : 1000 + (poster * 131) % 20000,
+            'created_at' : u'Mon Jan 05 10:00:00 +0000 2009',
+            'lang' : u'en', 'utc_offset' : -25200,
+            'time_zone' : u'Pacific Time (US & Canada)',
+            'profile_image_url' : u'http://pbs.twimg.com/profile_images/{}/photo_normal.jpg'.format(id),
+            'profile_image_url_https' : u'https://pbs.twimg.com/profile_images/{}/photo_normal.jpg'.format(id),
+            'default_profile' : True,
+        }
+        self.profiles[poster] = profile
+        return profile
+
+    def original(self, number) :
+        """Tweet number as its poster wrote it, before any retweet, quote
+        or reply is made of it"""
+        rnd, id, millis, poster = self._head(number)
+        text, entities = sampleText(rnd, id)
+        if rnd.random() < mediaShare :
+            url = u'http://t.co/m{:09d}'.format(number)
+            start = _length(text) + 1
+            text += u' ' + url
+            entities['media'] = [{'id' : id, 'id_str' : unicode(id), 'type' : u'photo',
+                'url' : url, 'indices' : [start, start + len(url)],
+                'media_url' : u'http://pbs.twimg.com/media/{}.jpg'.format(id),
+                'media_url_https' : u'https://pbs.twimg.com/media/{}.jpg'.format(id),
+                'display_url' : u'pic.twitter.com/{}'.format(id),
+                'expanded_url' : u'http://twitter.com/user{}/status/{}/photo/1'.format(poster, id)}]
+        return {
+            'id' : id, 'id_str' : unicode(id),
+            'created_at' : unicode(time.strftime('%a %b %d %H:%M:%S +0000 %Y', time.gmtime(millis // 1000))),
+            'text' : text, 'entities' : entities,
+            'source' : rnd.choice(sources), 'lang' : rnd.choice(languages),
+            'user' : self.user(poster, number),
+            'retweet_count' : int(rnd.paretovariate(1.5)) - 1,
+            'favorite_count' : int(rnd.paretovariate(1.3)) - 1,
+            'in_reply_to_status_id' : None, 'in_reply_to_status_id_str' : None,
+            'in_reply_to_screen_name' : None, 'is_quote_status' : False,
+            'truncated' : False, 'favorited' : False, 'retweeted' : False,
+            'geo' : None, 'coordinates' : None, 'place' : None,
+        }
+
+    def tweet(self, number) :
+        """Tweet number, which may retweet, quote or reply to one of the
+        tweets shortly before it"""
+        tweet = self.original(number)
+        rnd = self._random(-1 - number)
+        kind = rnd.random()
+        if number == 0 or kind >= retweetShare + quoteShare + replyShare :
+            return tweet
+        earlier = number - 1 - rnd.randrange(min(number, recentTweets))
+        other = self.original(earlier)
+        name = other['user']['screen_name']
+
+        if kind < retweetShare :
+            prefix = u'RT @{}: '.format(name)
+            shift = len(prefix)
+            text = (prefix + other['text'])[:140]
+            entities = {'user_mentions' : [{'screen_name' : name, 'indices' : [3, 4 + len(name)]}]}
+            for key, items in other['entities'].items() :
+                items = [dict(x, indices=[x['indices'][0] + shift, x['indices'][1] + shift])
+                    for x in items if x['indices'][1] + shift <= _length(text)]
+                if items or key != 'media' :
+                    entities.setdefault(key, []).extend(items)
+            tweet.update(text=text, entities=entities, retweeted_status=other,
+                retweet_count=other['retweet_count'], favorite_count=0)
+        elif kind < retweetShare + quoteShare :
+            url = u'https://t.co/q{:09d}'.format(number)
+            if _length(tweet['text']) + 1 + len(url) <= 140 :
+                start = _length(tweet['text']) + 1
+                tweet['text'] += u' ' + url
+                tweet['entities']['urls'].append({'url' : url, 'indices' : [start, start + len(url)],
+                    'expanded_url' : u'https://twitter.com/{}/status/{}'.format(name, other['id']),
+                    'display_url' : u'twitter.com/{}/status/\u2026'.format(name)})
+            tweet.update(quoted_status=other, quoted_status_id=other['id'],
+                quoted_status_id_str=other['id_str'], is_quote_status=True)
+        else :
+            tweet.update(in_reply_to_status_id=other['id'], in_reply_to_status_id_str=other['id_str'],
+                in_reply_to_screen_name=name, in_reply_to_user_id=other['user']['id'])
+        return tweet
+
+
+def synthTweets(count, seed=1, first=0, last=None, ascending=False, **settings) :
+    """Generate tweets first up to last of a synthetic event of count
+    tweets, in descending ID order unless ascending. settings go to the
+    synthesizer (users, hours, start)."""
+    maker = synthesizer(count, seed, **settings)
+    numbers = xrange(first, count if last is None else last)
+    for number in (numbers if ascending else reversed(numbers)) :
+        yield maker.tweet(number)
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+
+    parser = argparse.ArgumentParser(
+        prog=myName,
+        description='Write a synthetic conference capture',
+        version=version)
+    parser.add_argument('outfile', action='store', help='Output tweet filename')
+    parser.add_argument('--count', '-n', action='store', type=int, default=10000, help='Number of tweets in the event')
+    parser.add_argument('--first', action='store', type=int, default=0, help='Number of the first tweet written')
+    parser.add_argument('--last', action='store', type=int, help='Number after the last tweet written')
+    parser.add_argument('--seed', action='store', type=int, default=1, help='Random seed')
+    parser.add_argument('--users', action='store', type=int, help='Number of posters')
+    parser.add_argument('--hours', action='store', type=float, default=72, help='Length of the event in hours')
+    parser.add_argument('--start', action='store', default=startTime, help='Time the event starts, in UTC')
+    parser.add_argument('--ascend', '-a', action='store_true', default=False, help='Write in ascending ID order')
+    parser.add_argument('--compact', action='store_true', default=False, help='Write JSON arrays compactly, a tweet per line')
+    parser.add_argument('--protocol', action='store', type=int, help='Pickle protocol (default: the highest)')
+    tweetProfile.addProfileArguments(parser)
+    args = parser.parse_args(argv[1:])
+    tweetProfile.start(myName, args)
+
+    try :
+        tweetStore.formatOf(args.outfile)
+        tweets = synthTweets(args.count, args.seed, args.first, args.last, args.ascend,
+            users=args.users, hours=args.hours, start=args.start)
+        total = tweetStore.writeTweets(args.outfile, tweets, args.protocol, args.compact)
+    except ValueError as err :
+        print err
+        return 1
+    print '{}: {} synthetic tweets'.format(args.outfile, total)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# *****************************************************************************
+#   Tests that a query selects the same tweets from an SQLite archive as
+#   from a flat file, where tweetArchive applies it with matcher as the
+#   tweets stream past. Text matches ignore the case of any letter, not
+#   only ASCII ones, in both.
+#
+#   Simplest usage: python testArchive.py
+#
+#   Keith Eric Grant (keg@ramblemuse.com)
+#   18 Oct 2026
+#
+# *****************************************************************************
+
+import os
+import shutil
+import tempfile
+import unittest
+import tweetArchive
+import tweetStore
+
+
+texts = [u'Un café, merci', u'CAFÉ SOCIETY', u'cafe without the accent', u'Die Straße',
+    u'ΣΟΦΙΑ and σοφια', u'100% sure', u'snake_case', u'back\\slash', u'nothing here']
+
+
+class matchTests(unittest.TestCase) :
+    """--match on a .db archive and on a .jsonl file"""
+
+    def setUp(self) :
+        self.workdir = tempfile.mkdtemp(prefix='testarchive')
+        tweets = [{'id' : 1000 + ix, 'text' : text, 'user' : {'screen_name' : 'alice'},
+            'created_at' : 'Sun Oct 18 12:00:00 +0000 2009', 'entities' : {}}
+            for ix, text in enumerate(texts)]
+        self.db = os.path.join(self.workdir, 'tweets.db')
+        self.flat = os.path.join(self.workdir, 'tweets.jsonl')
+        tweetStore.writeTweets(self.db, tweets)
+        tweetStore.writeTweets(self.flat, tweets)
+
+    def tearDown(self) :
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def matches(self, match) :
+        found = []
+        for filename in (self.db, self.flat) :
+            tweets = tweetStore.selectTweets(filename, descending=False, match=match)
+            found.append([x['text'] for x in tweets])
+        self.assertEqual(found[0], found[1], match)
+        return found[0]
+
+    def testUnicodeCase(self) :
+        self.assertEqual(self.matches(u'CAFÉ'), [texts[0], texts[1]])
+        self.assertEqual(self.matches(u'café'), [texts[0], texts[1]])
+        self.assertEqual(self.matches(u'σοφια'), [texts[4]])
+        self.assertEqual(self.matches(u'STRASSE'), [])
+
+    def testWildcards(self) :
+        self.assertEqual(self.matches(u'%'), [texts[5]])
+        self.assertEqual(self.matches(u'_'), [texts[6]])
+        self.assertEqual(self.matches(u'\\'), [texts[7]])
+
+    def testCommandLine(self) :
+        # A --match value read from the command line is decoded first
+        match = u'CAFÉ'.encode('utf-8')
+
+        class args(object) :
+            user = since = until = tz = limit = None
+            ordered = columns = False
+
+        args.match = match
+        query = tweetArchive.queryArguments(args)
+        self.assertEqual(query['match'], u'CAFÉ')
+
+
+if __name__ == '__main__' :
+    unittest.main()
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+# *****************************************************************************
+#   Tests of the filter expression language of tweetFilter.py, run against
+#   small hand-made tweets:
+#
+#       parse     each kind of test, spacing around the comparisons, and
+#                 the precedence of not, and, or and parentheses
+#       cost      the reordering of and/or operands to try the cheap tests
+#                 first, seen through tweets whose text can't be read
+#       errors    the messages for expressions that can't be parsed
+#
+#   Simplest usage: python testFilter.py
+#
+#   Any test runner that finds unittest cases will also run them, and the
+#   usual unittest options select and report them (python testFilter.py -v
+#   costTests).
+#
+#   Keith Eric Grant (keg@ramblemuse.com)
+#   18 Oct 2026
+#
+# *****************************************************************************
+
+import os
+import shutil
+import tempfile
+import unittest
+import tweetFilter
+import tweetTime
+
+
+def tweet(id=1000, user='alice', text=u'hello', **fields) :
+    """A tweet with just the fields the filters read"""
+    made = {'id' : id, 'text' : text, 'user' : {'screen_name' : user, 'followers_count' : 10},
+        'entities' : {'hashtags' : [], 'urls' : [], 'user_mentions' : []}}
+    made.update(fields)
+    return made
+
+
+class untouchable(dict) :
+    """A tweet whose text raises if it's read, to tell whether a test ran"""
+
+    def __getitem__(self, key) :
+        if key == 'text' :
+            raise AssertionError('text was read')
+        return dict.__getitem__(self, key)
+
+
+class parseTests(unittest.TestCase) :
+    """Expressions compiled and applied to tweets"""
+
+    def keeps(self, expression, *tweets) :
+        keep = tweetFilter.compileFilter(expression)
+        return [keep(x) for x in tweets]
+
+    def testFlags(self) :
+        plain   = tweet()
+        retweet = tweet(retweeted_status=tweet())
+        reply   = tweet(in_reply_to_status_id=5)
+        self.assertEqual(self.keeps('retweet', plain, retweet, reply), [False, True, False])
+        self.assertEqual(self.keeps('reply', plain, retweet, reply), [False, False, True])
+        self.assertEqual(self.keeps('RETWEET', plain, retweet), [False, True])
+
+    def testNumbers(self) :
+        tweets = [tweet(retweet_count=x) for x in (5, 10, 15)]
+        self.assertEqual(self.keeps('retweets>=10', *tweets), [False, True, True])
+        self.assertEqual(self.keeps('retweets<10', *tweets), [True, False, False])
+        self.assertEqual(self.keeps('retweets=10', *tweets), [False, True, False])
+        self.assertEqual(self.keeps('retweets!=10', *tweets), [True, False, True])
+        self.assertEqual(self.keeps('favorites>0', tweet()), [False])
+
+    def testSpacing(self) :
+        tweets = [tweet(retweet_count=x) for x in (5, 10, 15)]
+        for expression in ('retweets >= 10', 'retweets>= 10', 'retweets >=10', ' retweets  >=  10 ') :
+            self.assertEqual(self.keeps(expression, *tweets), [False, True, True], expression)
+        self.assertEqual(self.keeps('user : alice', tweet(), tweet(user='bob')), [True, False])
+        self.assertEqual(self.keeps('text ~ "^he"', tweet(), tweet(text=u'oh')), [True, False])
+
+    def testNames(self) :
+        tweets = [tweet(user='Alice', lang='en'), tweet(user='bob', lang='fr')]
+        self.assertEqual(self.keeps('user:alice', *tweets), [True, False])
+        self.assertEqual(self.keeps('user:@BOB,carol', *tweets), [False, True])
+        self.assertEqual(self.keeps('user!=alice', *tweets), [False, True])
+        self.assertEqual(self.keeps('lang:EN', *tweets), [True, False])
+
+    def testUsersFile(self) :
+        workdir = tempfile.mkdtemp(prefix='testfilter')
+        try :
+            names = os.path.join(workdir, 'names.txt')
+            with open(names, 'w') as out :
+                out.write('# blocked\n@Bob\n\ncarol  # spam\n')
+            tweets = [tweet(user='alice'), tweet(user='bob'), tweet(user='carol')]
+            self.assertEqual(self.keeps('not users:' + names, *tweets), [True, False, False])
+        finally :
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def testText(self) :
+        tweets = [tweet(text=u'Big NEWS today'), tweet(text=u'nothing here')]
+        self.assertEqual(self.keeps('text:news', *tweets), [True, False])
+        self.assertEqual(self.keeps('text:"news today"', *tweets), [True, False])
+        self.assertEqual(self.keeps(u'text~\\bnot', *tweets), [False, True])
+
+    def testTimes(self) :
+        noon = tweetTime.timeID(tweetTime.parseTime('2015-10-18 12:00'))
+        tweets = [tweet(id=noon - (1 << 22) * 1000), tweet(id=noon), tweet(id=noon + (1 << 22) * 1000)]
+        self.assertEqual(self.keeps("since:'2015-10-18 12:00'", *tweets), [False, True, True])
+        self.assertEqual(self.keeps("until:'2015-10-18 12:00'", *tweets), [True, False, False])
+
+    def testPrecedence(self) :
+        # and binds tighter than or, and not tighter than both
+        retweet = tweet(retweeted_status=tweet(), retweet_count=0)
+        popular = tweet(retweet_count=20)
+        plain   = tweet(retweet_count=0)
+        tweets  = [retweet, popular, plain]
+        self.assertEqual(self.keeps('retweet or retweets>10 and user:bob', *tweets), [True, False, False])
+        self.assertEqual(self.keeps('(retweet or retweets>10) and user:alice', *tweets), [True, True, False])
+        self.assertEqual(self.keeps('not retweet and retweets>10', *tweets), [False, True, False])
+        self.assertEqual(self.keeps('not (retweet or retweets>10)', *tweets), [False, False, True])
+        self.assertEqual(self.keeps('not not retweet', *tweets), [True, False, False])
+        self.assertEqual(self.keeps('retweet AND NOT reply Or quote', *tweets), [True, False, False])
+
+
+class costTests(unittest.TestCase) :
+    """The cheap operands of and/or run first, whatever order they're
+    written in"""
+
+    def testAnd(self) :
+        keep = tweetFilter.compileFilter('text:hello and retweet')
+        self.assertFalse(keep(untouchable(tweet())))
+        keep = tweetFilter.compileFilter('text~h.llo and user:bob and retweets>5')
+        self.assertFalse(keep(untouchable(tweet(retweet_count=10))))
+
+    def testOr(self) :
+        keep = tweetFilter.compileFilter('text:hello or retweet')
+        self.assertTrue(keep(untouchable(tweet(retweeted_status=tweet()))))
+
+    def testNested(self) :
+        keep = tweetFilter.compileFilter('(text:a or text:b) and not (user:alice or retweet)')
+        self.assertFalse(keep(untouchable(tweet())))
+
+    def testCosts(self) :
+        cost = lambda x: tweetFilter._parser(x).parse().cost
+        self.assertEqual(cost('retweet'), tweetFilter.costFlag)
+        self.assertEqual(cost('text~a and retweets>1'), tweetFilter.costRegex + tweetFilter.costNumber)
+        self.assertEqual(cost('not user:bob'), tweetFilter.costName)
+
+
+class errorTests(unittest.TestCase) :
+    """The messages for expressions that can't be parsed"""
+
+    def fails(self, expression, message) :
+        with self.assertRaises(tweetFilter.filterError) as caught :
+            tweetFilter.compileFilter(expression)
+        self.assertEqual(str(caught.exception), '{} in filter "{}"'.format(message, expression))
+
+    def testMessages(self) :
+        self.fails('bogus', 'Unknown flag bogus')
+        self.fails('bogus:1', 'Unknown test bogus')
+        self.fails('retweets >= ten', 'Not a number: ten')
+        self.fails('retweets >=', 'Missing value for retweets')
+        self.fails('retweets~1', 'Bad comparison retweets~')
+        self.fails('user<bob', 'Bad comparison user<')
+        self.fails('text>a', 'Bad comparison text>')
+        self.fails('since~2015', 'Bad comparison since~')
+        self.fails("since:'not a time'", 'Unrecognized time not a time')
+        self.fails('(retweet or quote', 'Missing )')
+        self.fails('retweet quote', "Unexpected 'quote'")
+        self.fails('retweet and', "Expected a test at 'end'")
+        self.fails('', "Expected a test at 'end'")
+        self.fails('not )', "Expected a test at ')'")
+
+    def testRegex(self) :
+        with self.assertRaises(tweetFilter.filterError) as caught :
+            tweetFilter.compileFilter('text~"(a"')
+        self.assertIn('Bad regular expression (a', str(caught.exception))
+
+    def testUsersFile(self) :
+        with self.assertRaises(tweetFilter.filterError) as caught :
+            tweetFilter.compileFilter('users:/no/such/file.txt')
+        self.assertIn("Can't read names", str(caught.exception))
+
+
+if __name__ == '__main__' :
+    unittest.main()
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# *****************************************************************************
+#   Tests that htmlWrapper's streaming classes write the same text as the
+#   classes that build the whole document in memory:
+#
+#       document  random trees of elements, self-closing tags and text,
+#                 written through document and through streamDocument
+#       fragment  random subtrees long enough to need several lines, written
+#                 through streamFragment and added with add_fragment, as
+#                 writeHTML does with each tweet
+#
+#   The trees come from seeded random generators, so a failure names the
+#   seed that gives it. Texts run from empty to past the one-line threshold,
+#   so that elements land on both sides of it, alone and added up.
+#
+#   Simplest usage: python testHtmlWrapper.py
+#
+#   Keith Eric Grant (keg@ramblemuse.com)
+#   18 Oct 2026
+#
+# *****************************************************************************
+
+import io
+import random
+import unittest
+import htmlWrapper
+
+
+tags = ['div', 'p', 'span', 'a', 'ul', 'li']
+attributes = [None, ('class="x"',), ('id="tweet"', 'class="quote"'), ('href="http://example.com/' + 'x' * 40 + '"',)]
+
+
+def randomTree(rng, level=0) :
+    """The parts of an element's contents: ('element', tag, attributes,
+    parts), ('selfclose', tag, attributes) or ('text', text)"""
+    parts = []
+    for _ in range(rng.randint(0, 4 if level < 5 else 0)) :
+        kind = rng.random()
+        if kind < 0.4 :
+            parts.append(('text', u'w' * rng.choice([0, 1, 5, 20, 40, 79, 80, 81, 120])))
+        elif kind < 0.55 :
+            parts.append(('selfclose', rng.choice(['br', 'img', 'hr']), rng.choice(attributes)))
+        else :
+            parts.append(('element', rng.choice(tags), rng.choice(attributes), randomTree(rng, level + 1)))
+    return parts
+
+
+def build(parent, parts) :
+    """Add the parts to an open element of either kind"""
+    for part in parts :
+        if part[0] == 'text' :
+            parent.add_text(part[1])
+        elif part[0] == 'selfclose' :
+            parent.add_selfclose(part[1], part[2])
+        else :
+            child = parent.add_element(part[1], part[2])
+            build(child, part[3])
+            child.close()
+
+
+def treeText(parts) :
+    """The document as built in memory"""
+    doc = htmlWrapper.document()
+    build(doc, parts)
+    doc.close()
+    buf = io.StringIO()
+    doc.write(buf)
+    return buf.getvalue()
+
+
+def streamText(parts) :
+    """The document as streamed"""
+    buf = io.StringIO()
+    doc = htmlWrapper.streamDocument(buf)
+    build(doc, parts)
+    doc.close()
+    return buf.getvalue()
+
+
+class documentTests(unittest.TestCase) :
+    """Whole documents written both ways"""
+
+    def testFixed(self) :
+        parts = [('element', 'head', None, [('element', 'title', None, [('text', u'Tweets')])]),
+                 ('element', 'body', None, [('element', 'p', None, [('text', u'x' * 100)]),
+                                            ('selfclose', 'br', None)])]
+        self.assertEqual(streamText(parts), treeText(parts))
+        self.assertEqual(streamText([]), treeText([]))
+
+    def testRandom(self) :
+        for seed in range(500) :
+            parts = randomTree(random.Random(seed))
+            self.assertEqual(streamText(parts), treeText(parts), 'seed {}'.format(seed))
+
+
+class fragmentTests(unittest.TestCase) :
+    """Subtrees written as fragments and added to a streamed document,
+    against the same subtrees built in place"""
+
+    def testRandom(self) :
+        for seed in range(500) :
+            rng = random.Random(seed)
+            fragments = []
+            count = rng.randint(1, 3)
+            while len(fragments) < count :
+                parts = [('element', 'div', ('class="tweet"',), randomTree(rng, 3))]
+                if len(treeText(parts)) > 200 :
+                    fragments.append(parts)
+
+            container = lambda parts : [('element', 'body', None,
+                [('element', 'div', ('id="tweets"',), parts)])]
+            expected = treeText(container(sum(fragments, [])))
+
+            buf = io.StringIO()
+            doc = htmlWrapper.streamDocument(buf)
+            body = doc.add_element('body')
+            tweets = body.add_element('div', ('id="tweets"',))
+            for parts in fragments :
+                text = io.StringIO()
+                build(htmlWrapper.streamFragment(text, 3), parts)
+                tweets.add_fragment(text.getvalue())
+            tweets.close()
+            body.close()
+            doc.close()
+            self.assertEqual(buf.getvalue(), expected, 'seed {}'.format(seed))
+
+
+if __name__ == '__main__' :
+    unittest.main()
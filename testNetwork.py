@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+# *****************************************************************************
+#   Tests of the code that talks to the network, run against servers on the
+#   local machine rather than Twitter:
+#
+#       search  getConfHashtag's search, through --domain, against a stub
+#               search endpoint that can be told to fail its next calls, so
+#               that the rate limiter's retries, backoff and waits for the
+#               rate-limit reset can be checked. The limiter's sleep, clock
+#               and random functions are replaced, so the waits it chooses
+#               are recorded rather than slept. A rerun of a capture is
+#               checked to read back the tweets folded out of the journal.
+#       mirror  mirrorMedia downloading from SimpleHTTPServer, including
+#               files that are missing (404) and a server that never answers
+#               (the download times out), and the rewriting of a page for
+#               the pictures that did and didn't arrive.
+#
+#   Each test starts its own servers on free ports and works in a temporary
+#   directory, so nothing is left behind.
+#
+#   Simplest usage: python testNetwork.py
+#
+#   Any test runner that finds unittest cases will also run them, and the
+#   usual unittest options select and report them (python testNetwork.py -v
+#   searchTests).
+#
+#   Keith Eric Grant (keg@ramblemuse.com)
+#   18 Oct 2026
+#
+# *****************************************************************************
+
+import sys
+import os
+import io
+import bisect
+import shutil
+import tempfile
+import threading
+import unittest
+import urlparse
+import BaseHTTPServer
+import SimpleHTTPServer
+import SocketServer
+import simplejson as json
+import twitter
+import getConfHashtag
+import mirrorMedia
+import rateLimiter
+import synthTweets
+import tweetStore
+
+
+class localServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer) :
+    """An HTTP server on a free local port, answering each request in a
+    thread of its own"""
+
+    daemon_threads = True
+
+    def __init__(self, handler) :
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0), handler)
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+
+    @property
+    def domain(self) :
+        return '{}:{}'.format(*self.server_address)
+
+    def start(self) :
+        self.thread.start()
+        return self
+
+    def stop(self) :
+        self.shutdown()
+        self.server_close()
+        self.thread.join()
+
+
+class searchHandler(BaseHTTPServer.BaseHTTPRequestHandler) :
+    """A stub of the search endpoint, answering from the server's tweets
+    by since_id, max_id and count as Twitter does, after failing with each
+    of the server's failures in turn"""
+
+    def log_message(self, *args) :
+        pass
+
+    def do_GET(self) :
+        server = self.server
+        query = urlparse.parse_qs(urlparse.urlparse(self.path).query)
+        server.requests.append(query)
+        if server.failures :
+            status, headers = server.failures.pop(0)
+            self.reply(status, {'errors' : [{'code' : status, 'message' : 'stub failure'}]}, headers)
+            return
+
+        since = int(query.get('since_id', ['0'])[0])
+        upper = int(query['max_id'][0]) if 'max_id' in query else None
+        count = int(query.get('count', ['15'])[0])
+        low  = bisect.bisect_right(server.ids, since)
+        high = bisect.bisect_right(server.ids, upper) if upper is not None else len(server.ids)
+        statuses = server.tweets[max(low, high - count):high][::-1]
+        self.reply(200, {'statuses' : statuses, 'search_metadata' : {'count' : count}},
+            {'x-rate-limit-remaining' : '400', 'x-rate-limit-reset' : str(server.reset)})
+
+    def reply(self, status, body, headers) :
+        text = json.dumps(body)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(text)))
+        for name, value in headers.items() :
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(text)
+
+
+def searchServer(tweets, reset=0) :
+    """A stub search endpoint holding some tweets, started"""
+    server = localServer(searchHandler)
+    server.tweets   = sorted(tweets, key=lambda x : x['id'])
+    server.ids      = [x['id'] for x in server.tweets]
+    server.failures = []
+    server.requests = []
+    server.reset    = reset
+    return server.start()
+
+
+class fakeClock(object) :
+    """A clock moved on only by the sleeps it's given, which it records"""
+
+    def __init__(self, now=1000000.0) :
+        self.now = now
+        self.sleeps = []
+
+    def time(self) :
+        return self.now
+
+    def sleep(self, seconds) :
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class searchTests(unittest.TestCase) :
+    """Searches through the rate limiter against the stub endpoint"""
+
+    count = 250
+
+    def setUp(self) :
+        self.tweets = list(synthTweets.synthTweets(self.count, 1))
+        self.clock  = fakeClock()
+        self.server = searchServer(self.tweets, int(self.clock.now) + 60)
+        self.api    = getConfHashtag.searchAPI(self.server.domain)
+        # The largest backoff each time, so the waits are known
+        self.limiter = rateLimiter.rateLimiter(clock=self.clock.time,
+            sleep=self.clock.sleep, rand=lambda : 1.0)
+
+    def tearDown(self) :
+        self.server.stop()
+
+    def search(self) :
+        pages = getConfHashtag.searchPages(self.api, '#conf', 0, limiter=self.limiter)
+        return [x['id'] for upper, group in pages for x in group]
+
+    def quietly(self, func, *args) :
+        """Call a function with what it prints kept from the test output"""
+        stdout, sys.stdout = sys.stdout, io.BytesIO()
+        try :
+            return func(*args)
+        finally :
+            sys.stdout = stdout
+
+    def testPages(self) :
+        ids = self.search()
+        self.assertEqual(ids, sorted(self.server.ids, reverse=True))
+        # Three full pages and the empty one that ends the search
+        self.assertEqual(len(self.server.requests), 4)
+        self.assertEqual(self.clock.sleeps, [])
+        self.assertEqual(self.limiter.calls, 4)
+
+    def testRetries(self) :
+        self.server.failures = [(503, {}), (502, {})]
+        ids = self.quietly(self.search)
+        self.assertEqual(len(ids), self.count)
+        self.assertEqual(self.limiter.errors, 2)
+        # Exponential backoff: baseDelay * 2**attempt
+        base = rateLimiter.rateLimiter.baseDelay
+        self.assertEqual(self.clock.sleeps, [2 * base, 4 * base])
+
+    def testRateLimit(self) :
+        reset = self.server.reset
+        self.server.failures = [(429, {'x-rate-limit-remaining' : '0',
+                                       'x-rate-limit-reset' : str(reset)})]
+        ids = self.quietly(self.search)
+        self.assertEqual(len(ids), self.count)
+        # The backoff, then the rest of the wait for the window to reset
+        self.assertEqual(len(self.clock.sleeps), 2)
+        self.assertEqual(self.clock.sleeps[0], 2 * rateLimiter.rateLimiter.baseDelay)
+        self.assertEqual(self.clock.now, reset + rateLimiter.rateLimiter.margin)
+
+    def testWindowUsedUp(self) :
+        # Keeping back as many calls as the window has left waits for its
+        # reset after the first page; later pages come after the reset
+        self.limiter.reserve = 400
+        ids = self.search()
+        self.assertEqual(len(ids), self.count)
+        self.assertEqual(len(self.clock.sleeps), 1)
+        self.assertEqual(self.clock.now, self.server.reset + rateLimiter.rateLimiter.margin)
+
+    def testClientError(self) :
+        self.server.failures = [(404, {})]
+        with self.assertRaises(twitter.TwitterHTTPError) as caught :
+            self.search()
+        self.assertEqual(rateLimiter.errorCode(caught.exception), 404)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def testGivesUp(self) :
+        retries = rateLimiter.rateLimiter.maxRetries
+        self.server.failures = [(503, {})] * (retries + 2)
+        with self.assertRaises(twitter.TwitterHTTPError) :
+            self.quietly(self.search)
+        self.assertEqual(len(self.server.requests), retries + 1)
+        self.assertEqual(len(self.clock.sleeps), retries)
+
+    def testCapture(self) :
+        # The whole capture through the command line, with backoff short
+        # enough to sleep for real
+        self.server.failures = [(503, {})]
+        workdir = tempfile.mkdtemp(prefix='testnetwork')
+        baseDelay = rateLimiter.rateLimiter.baseDelay
+        rateLimiter.rateLimiter.baseDelay = 0.01
+        stdout, sys.stdout = sys.stdout, io.BytesIO()
+        try :
+            status = getConfHashtag.main(['getConfHashtag.py', '#conf', '--domain', self.server.domain,
+                '--nopickle', '--nonotice', '-j', os.path.join(workdir, 'conf.jsonl'),
+                '--journal', os.path.join(workdir, 'conf.journal')])
+            printed = sys.stdout.getvalue()
+        finally :
+            sys.stdout = stdout
+            rateLimiter.rateLimiter.baseDelay = baseDelay
+        try :
+            self.assertFalse(status)
+            self.assertIn('Search error (503), retry 1 of', printed)
+            ids = [x['id'] for x in tweetStore.readTweets(os.path.join(workdir, 'conf.jsonl'))]
+            self.assertEqual(sorted(ids), self.server.ids)
+        finally :
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def testRerun(self) :
+        # A rerun finds only the newer tweets, and reads the earlier ones
+        # back from the output they were folded into
+        workdir = tempfile.mkdtemp(prefix='testnetwork')
+        output  = os.path.join(workdir, 'conf.jsonl')
+        journal = os.path.join(workdir, 'conf.journal')
+        argv = ['getConfHashtag.py', '#conf', '--domain', self.server.domain,
+            '--nopickle', '--nonotice', '-j', output, '--journal', journal]
+        half = self.count // 2
+        allTweets, allIDs = self.server.tweets, self.server.ids
+        try :
+            self.server.tweets, self.server.ids = allTweets[:half], allIDs[:half]
+            self.assertFalse(self.quietly(getConfHashtag.main, argv))
+            self.server.tweets, self.server.ids = allTweets, allIDs
+            self.assertFalse(self.quietly(getConfHashtag.main, argv))
+            ids = [x['id'] for x in tweetStore.readTweets(output)]
+            self.assertEqual(ids, allIDs[::-1])
+            with open(journal, 'rb') as inp :
+                records = [json.loads(x) for x in inp]
+            self.assertEqual([x['type'] for x in records], ['folded'])
+            self.assertEqual(records[0]['count'], self.count)
+            self.assertEqual(records[0]['max_id'], allIDs[-1])
+            self.assertEqual(records[0]['into'], output)
+            self.assertEqual(sorted(os.listdir(workdir)), ['conf.journal', 'conf.jsonl'])
+
+            os.remove(output)
+            self.assertEqual(self.quietly(getConfHashtag.main, argv), 1)
+        finally :
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+class fileHandler(SimpleHTTPServer.SimpleHTTPRequestHandler) :
+    """Serves the files of the current directory, quietly"""
+
+    def log_message(self, *args) :
+        pass
+
+
+class stalledHandler(BaseHTTPServer.BaseHTTPRequestHandler) :
+    """Never answers, until the server's release event is set"""
+
+    def log_message(self, *args) :
+        pass
+
+    def do_GET(self) :
+        self.server.release.wait(10)
+
+
+class mirrorTests(unittest.TestCase) :
+    """Mirroring from SimpleHTTPServer, and from a server that stalls"""
+
+    def setUp(self) :
+        self.workdir = tempfile.mkdtemp(prefix='testnetwork')
+        self.served  = os.path.join(self.workdir, 'served')
+        self.media   = os.path.join(self.workdir, 'media')
+        os.makedirs(self.served)
+        # Two icons with the same contents, a picture with both sizes, and
+        # one whose hover picture is missing
+        files = {'icon.png' : 'icon', 'icon2.png' : 'icon', 'a.jpg:thumb' : 'a thumb',
+                 'a.jpg:medium' : 'a medium', 'b.jpg:thumb' : 'b thumb'}
+        for name, data in files.items() :
+            with open(os.path.join(self.served, name), 'wb') as out :
+                out.write(data)
+
+        # SimpleHTTPServer serves the current directory
+        self.cwd = os.getcwd()
+        os.chdir(self.served)
+        self.files = localServer(fileHandler).start()
+        self.stalled = localServer(stalledHandler)
+        self.stalled.release = threading.Event()
+        self.stalled.start()
+
+        files = 'http://{}/'.format(self.files.domain)
+        stalled = 'http://{}/'.format(self.stalled.domain)
+        self.url = dict((x, files + x) for x in ('icon.png', 'icon2.png', 'a.jpg', 'b.jpg'))
+        self.url['c.jpg'] = stalled + 'c.jpg'
+        self.tweets = [self.tweet('icon.png', 'a.jpg'), self.tweet('icon2.png', 'b.jpg'),
+                       self.tweet('icon.png', 'c.jpg')]
+
+    def tearDown(self) :
+        os.chdir(self.cwd)
+        self.stalled.release.set()
+        self.stalled.stop()
+        self.files.stop()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def tweet(self, icon, picture) :
+        return {'user' : {'profile_image_url' : self.url[icon]},
+                'entities' : {'media' : [{'media_url' : self.url[picture]}]}}
+
+    def mirror(self) :
+        mirror = mirrorMedia.mediaMirror(self.media, timeout=0.5)
+        wanted = mirror.mirror(mirrorMedia.tweetURLs(self.tweets), threads=4)
+        return mirror, wanted
+
+    def testMirror(self) :
+        mirror, wanted = self.mirror()
+        self.assertEqual(wanted, 8)
+        self.assertEqual(mirror.fetched, 5)
+        failed = dict(mirror.failed)
+        self.assertEqual(sorted(failed), sorted([self.url['b.jpg'] + ':medium',
+            self.url['c.jpg'] + ':thumb', self.url['c.jpg'] + ':medium']))
+        self.assertEqual(rateLimiter.errorCode(failed[self.url['b.jpg'] + ':medium']), 404)
+        self.assertIsNone(rateLimiter.errorCode(failed[self.url['c.jpg'] + ':thumb']))
+
+        # The two icons share one file, kept under the type's extension
+        icon = mirror.local(self.url['icon.png'])
+        self.assertEqual(icon, mirror.local(self.url['icon2.png']))
+        self.assertTrue(icon.endswith('.png'))
+        stored = [x for path, dirs, names in os.walk(self.media) for x in names]
+        self.assertEqual(len(stored), 5)
+        with open(os.path.join(self.media, icon), 'rb') as inp :
+            self.assertEqual(inp.read(), 'icon')
+
+        # Run again, only the failures are wanted
+        again, wanted = self.mirror()
+        self.assertEqual(wanted, 3)
+        self.assertEqual(again.fetched, 0)
+        self.assertEqual(again.local(self.url['a.jpg'] + ':thumb'), mirror.local(self.url['a.jpg'] + ':thumb'))
+
+    def testRewrite(self) :
+        mirror, wanted = self.mirror()
+        page = os.path.join(self.workdir, 'page.html')
+        lines = [u'<img class="icon" data-src="{}">'.format(self.url['icon.png'])]
+        lines += [u'<img class="thumb" data-src="{}:thumb">'.format(self.url[x])
+                  for x in ('a.jpg', 'b.jpg', 'c.jpg')]
+        with open(page, 'wb') as out :
+            out.write(u'\n'.join(lines).encode('utf-8') + '\n')
+        self.assertEqual(mirrorMedia.rewritePage(page, mirror), 3)
+        with open(page, 'rb') as inp :
+            icon, a, b, c = inp.read().decode('utf-8').splitlines()
+
+        self.assertIn(u'data-src="media/{}"'.format(mirror.local(self.url['icon.png'])), icon)
+        local = u'media/' + mirror.local(self.url['a.jpg'] + ':medium')
+        self.assertIn(u'data-src="media/{}"'.format(mirror.local(self.url['a.jpg'] + ':thumb')), a)
+        self.assertIn(u'data-picture="{0}" data-link="{0}"'.format(local), a)
+        # A local thumbnail whose hover picture failed keeps Twitter's
+        self.assertIn(u'data-src="media/{}"'.format(mirror.local(self.url['b.jpg'] + ':thumb')), b)
+        self.assertIn(u'data-picture="{0}:medium" data-link="{0}:large"'.format(self.url['b.jpg']), b)
+        self.assertEqual(c, lines[3])
+
+
+if __name__ == "__main__":
+    unittest.main()
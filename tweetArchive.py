@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+# ******************************************************************************
+#   An indexed tweet archive kept in an SQLite database, so that a question
+#   like "tweets from a user between 14:00 and 15:00" reads only the rows it
+#   needs rather than scanning a whole pickle or JSON file.
+#
+#   Each tweet is one row keyed by its tweet ID, holding the full tweet as
+#   compact JSON along with the columns used to select it: the poster's
+#   screen_name, the posting time (seconds since the epoch, UTC), the text,
+#   and flags for retweets and tweets with media. Each of those columns is
+#   indexed. Tweets already in the archive are skipped on insert, so adding
+#   overlapping captures to an archive also merges them.
+#
+#   Archives use the .db or .sqlite extension and can be read and written
+#   through tweetStore like any other archive. The query functions here are
+#   shared with the other tools, which apply the same selections to flat
+#   files by filtering the stream. Times are read from tweet IDs (see
+#   tweetTime), so a time range is a range of the primary key. A text match
+#   ignores case with Python's unicode.lower in both, as SQLite's own lower
+#   and LIKE only fold ASCII letters.
+#
+#   18 Oct 2026
+#
+# ******************************************************************************
+
+import os
+import sys
+import sqlite3
+import jsonBackend
+import tweetTime
+import tweetRecord
+
+
+# Tweets inserted per executemany while adding to an archive
+insertBatch = 1000
+
+schema = '''
+CREATE TABLE IF NOT EXISTS tweets (
+    id          INTEGER PRIMARY KEY,
+    screen_name TEXT,
+    created     INTEGER,
+    retweet     INTEGER,
+    media       INTEGER,
+    text        TEXT,
+    tweet       TEXT
+);
+CREATE INDEX IF NOT EXISTS tweets_screen_name ON tweets (screen_name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS tweets_created ON tweets (created);
+CREATE INDEX IF NOT EXISTS tweets_retweet ON tweets (retweet);
+CREATE INDEX IF NOT EXISTS tweets_media ON tweets (media);
+'''
+
+
+def hasMedia(tweet) :
+    return 'media' in tweet.get('entities', {})
+
+
+class archive(object) :
+    """An SQLite tweet archive. Tweets added with add are buffered and
+    inserted in batches; close (or flush) commits them. The added attribute
+    counts the tweets that weren't already in the archive."""
+
+    def __init__(self, filename, fresh=False) :
+        self.filename = filename
+        if fresh and os.path.exists(filename) :
+            os.remove(filename)
+        self.db = sqlite3.connect(filename)
+        self.db.create_function('lower', 1, _lower)
+        self.db.executescript(schema)
+        self.pending = []
+        self.added = 0
+
+    def add(self, tweet) :
+        """Queue a tweet for insertion, ignoring it if its ID is present"""
+        self.pending.append((tweet['id'], tweet['user']['screen_name'],
+            tweetTime.tweetTime(tweet), int('retweeted_status' in tweet),
+            int(hasMedia(tweet)), tweet['text'],
+            jsonBackend.dumps(tweetRecord.plain(tweet))))
+        if len(self.pending) >= insertBatch :
+            self.flush()
+
+    def addAll(self, tweets) :
+        for tweet in tweets :
+            self.add(tweet)
+        self.flush()
+        return self.added
+
+    def flush(self) :
+        if self.pending :
+            cursor = self.db.executemany('INSERT OR IGNORE INTO tweets '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)', self.pending)
+            self.added += cursor.rowcount
+            self.pending = []
+        self.db.commit()
+
+    def count(self) :
+        return self.db.execute('SELECT COUNT(*) FROM tweets').fetchone()[0]
+
+    def select(self, user=None, since=None, until=None, match=None,
+        retweets=None, media=None, limit=None, descending=True) :
+        """Generate the tweets matching a query in ID order. since and until
+        are in seconds since the epoch, with until exclusive, and are
+        looked up as ranges of IDs where they can be; match is a
+        case-insensitive substring of the text; retweets and media, if not
+        None, require the flag to be set or clear."""
+
+        self.flush()
+        where, params = [], []
+        if user :
+            where.append('screen_name = ? COLLATE NOCASE')
+            params.append(user.lstrip('@'))
+        low, high = tweetTime.idBounds(since, until)
+        if low is not None :
+            where.append('id >= ?')
+            params.append(low)
+        elif since is not None :
+            where.append('created >= ?')
+            params.append(since)
+        if high is not None :
+            where.append('id < ?')
+            params.append(high)
+        elif until is not None :
+            where.append('created < ?')
+            params.append(until)
+        if match :
+            where.append("lower(text) LIKE ? ESCAPE '\\'")
+            params.append(u'%{}%'.format(_likeEscape(match.lower())))
+        if retweets is not None :
+            where.append('retweet = ?')
+            params.append(int(retweets))
+        if media is not None :
+            where.append('media = ?')
+            params.append(int(media))
+
+        sql = 'SELECT tweet FROM tweets'
+        if where :
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY id DESC' if descending else ' ORDER BY id'
+        if limit :
+            sql += ' LIMIT ?'
+            params.append(limit)
+
+        loads = jsonBackend.current.loads
+        for row in self.db.execute(sql, params) :
+            yield loads(row[0])
+
+    def close(self) :
+        if self.db is None :
+            return
+        self.flush()
+        self.db.close()
+        self.db = None
+
+    def __enter__(self) :
+        return self
+
+    def __exit__(self, *exc) :
+        self.close()
+        return False
+
+
+def readArchive(filename, descending=True, **query) :
+    """Generate the tweets of an archive that match a query, closing the
+    database when they run out"""
+    if not os.path.exists(filename) :
+        raise IOError('No such archive: {}'.format(filename))
+    with archive(filename) as db :
+        for tweet in db.select(descending=descending, **query) :
+            yield tweet
+
+
+def _likeEscape(text) :
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _lower(text) :
+    """SQL lower() folding the case of any letter, not only ASCII ones"""
+    return text.lower() if text is not None else None
+
+
+def _text(value) :
+    """A command-line value as unicode, in UTF-8 if the locale's encoding
+    can't read it"""
+    if isinstance(value, str) :
+        try :
+            return value.decode(sys.getfilesystemencoding() or 'utf-8')
+        except UnicodeDecodeError :
+            return value.decode('utf-8', 'replace')
+    return value
+
+
+def addQueryArguments(parser) :
+    """Add the options selecting tweets by user, time, text and count"""
+    group = parser.add_argument_group('query', 'Select tweets (read straight '
+        'from the index for .db/.sqlite archives)')
+    group.add_argument('--user', action='store', help='Only tweets by this screen name')
+    group.add_argument('--since', action='store', help='Only tweets at or after this time (YYYY-MM-DD [HH:MM[:SS]])')
+    group.add_argument('--until', action='store', help='Only tweets before this time')
+    group.add_argument('--tz', action='store', help='Time zone of --since and --until: UTC (default), '
+        'local, an offset like --tz=-07:00, or a name like America/Denver (needs pytz)')
+    group.add_argument('--sorted', action='store_true', default=False, dest='ordered',
+        help='The input is in ID order, so --since and --until are found by binary search')
+    group.add_argument('--match', action='store', help='Only tweets whose text contains this (any case)')
+    group.add_argument('--limit', action='store', type=int, help='At most this many tweets')
+    group.add_argument('--columns', action='store_true', default=False,
+        help='Select and sort a .jsonl input from its columnar sidecar (ARCHIVE.cols), '
+        'building or updating it first (needs numpy)')
+
+
+def queryArguments(args) :
+    """Turn the query options into keyword arguments for selectTweets"""
+    return {'user'    : args.user,
+            'since'   : tweetTime.parseTime(args.since, args.tz) if args.since else None,
+            'until'   : tweetTime.parseTime(args.until, args.tz) if args.until else None,
+            'match'   : _text(args.match),
+            'limit'   : args.limit,
+            'ordered' : args.ordered,
+            'columns' : args.columns}
+
+
+def matcher(user=None, since=None, until=None, match=None, retweets=None, media=None) :
+    """Return a predicate applying the same selection as archive.select to
+    tweets read from a flat file"""
+
+    user  = user.lstrip('@').lower() if user else None
+    match = match.lower() if match else None
+    timed = since is not None or until is not None
+    low, high = tweetTime.idBounds(since, until)
+    byID = (since is None or low is not None) and (until is None or high is not None)
+
+    def test(tweet) :
+        if user and tweet['user']['screen_name'].lower() != user :
+            return False
+        if retweets is not None and ('retweeted_status' in tweet) != retweets :
+            return False
+        if media is not None and hasMedia(tweet) != media :
+            return False
+        if match and match not in tweet['text'].lower() :
+            return False
+        if timed and byID and tweetTime.isSnowflake(tweet['id']) :
+            id = tweet['id']
+            if low is not None and id < low :
+                return False
+            if high is not None and id >= high :
+                return False
+        elif timed :
+            when = tweetTime.tweetTime(tweet)
+            if since is not None and when < since :
+                return False
+            if until is not None and when >= until :
+                return False
+        return True
+
+    return test
@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+# ******************************************************************************
+#   A columnar sidecar of the numeric fields of a JSON Lines archive, kept
+#   as NumPy arrays that are memory-mapped when opened.
+#
+#   Selecting tweets by poster, time or kind and sorting them by ID
+#   otherwise means parsing every tweet into a dict. The sidecar of
+#   capture.jsonl is the directory capture.jsonl.cols, holding one .npy
+#   array per column, a row per tweet in file order:
+#
+#       id          tweet ID
+#       time        posting time, seconds since the epoch (see tweetTime)
+#       user        index of the poster in users.json, a list of
+#                   [id_str, screen_name] pairs
+#       retweets    retweet_count
+#       favorites   favorite_count
+#       flags       retweetFlag, quoteFlag and mediaFlag
+#       offset      byte offset of the tweet's line in the archive
+#       length      byte length of the line
+#
+#   Selections and sorts run over the arrays, and only the tweets selected
+#   are read, each with one slice of the memory-mapped archive. An .ijsonl
+#   archive (see tweetRecord) also has the offsets of its user lines, so a
+#   fetched tweet's users are read as they're needed.
+#
+#   meta.json records how much of the archive the columns cover along with
+#   checksums of its first and last bytes. An archive that has only been
+#   appended to since has columns added for the new lines; one that has
+#   been rewritten has them built again. A partial last line, as an archive
+#   that's still being written may have, is left for the next update.
+#
+#   Typical use:
+#
+#       cols = tweetColumns.openColumns('capture.jsonl')
+#       rows = cols.order(cols.select(since=start, retweets=False))
+#       for tweet in cols.fetch(rows[:20]) : ...
+#
+#   18 Oct 2026
+#
+# ******************************************************************************
+
+import os
+import mmap
+import zlib
+import itertools
+import jsonBackend
+import tweetArchive
+import tweetRecord
+import tweetTime
+
+try :
+    import numpy
+except ImportError :
+    numpy = None
+
+
+# Columns of each tweet, and of each user line of an .ijsonl archive
+columnTypes = (('id', 'int64'), ('time', 'int64'), ('user', 'int32'),
+               ('retweets', 'int32'), ('favorites', 'int32'), ('flags', 'uint8'),
+               ('offset', 'int64'), ('length', 'int32'))
+versionTypes = (('versionUser', 'int32'), ('versionOffset', 'int64'),
+                ('versionLength', 'int32'))
+
+# Bits of the flags column
+retweetFlag = 1
+quoteFlag   = 2
+mediaFlag   = 4
+
+# Bytes at each end of the covered archive that are checksummed
+checkBytes = 4096
+
+# Layout of the sidecar, bumped when it changes
+sidecarVersion = 1
+
+
+def sidecarName(filename) :
+    return filename + '.cols'
+
+
+def _check(filename) :
+    if numpy is None :
+        raise ValueError('{} (columns need numpy)'.format(filename))
+    if not filename.endswith(('.jsonl', '.ijsonl')) :
+        raise ValueError('{} (only uncompressed .jsonl and .ijsonl archives have columns)'.format(filename))
+
+
+def _checksums(filename, size) :
+    """CRCs of the first and last checkBytes of the first size bytes of a
+    file"""
+    with open(filename, 'rb') as inp :
+        head = zlib.crc32(inp.read(min(size, checkBytes)))
+        inp.seek(max(size - checkBytes, 0))
+        tail = zlib.crc32(inp.read(min(size, checkBytes)))
+    return [head, tail]
+
+
+def _readMeta(dirname) :
+    try :
+        with open(os.path.join(dirname, 'meta.json'), 'rb') as inp :
+            meta = jsonBackend.loads(inp.read())
+        with open(os.path.join(dirname, 'users.json'), 'rb') as inp :
+            users = jsonBackend.loads(inp.read())
+    except (IOError, ValueError) :
+        return None, None
+    return (meta, users) if meta.get('version') == sidecarVersion else (None, None)
+
+
+def _save(dirname, name, values) :
+    """Write an array, replacing the old one only once it's complete"""
+    path = os.path.join(dirname, name + '.npy')
+    with open(path + '.tmp', 'wb') as out :
+        numpy.save(out, values)
+    if os.path.exists(path) :
+        os.remove(path)
+    os.rename(path + '.tmp', path)
+
+
+def _writeText(dirname, name, value) :
+    with open(os.path.join(dirname, name), 'wb') as out :
+        out.write(jsonBackend.dumps(value).encode('utf-8'))
+
+
+class _scanner(object) :
+    """Columns of the lines of an archive, continuing from the users and
+    user versions already known"""
+
+    def __init__(self, users, versionUser) :
+        self.users = users
+        self.userIndex = dict((tuple(x), ix) for ix, x in enumerate(users))
+        self.versionUser = versionUser
+        self.rows = dict((x, []) for x, _ in columnTypes)
+        self.versions = dict((x, []) for x, _ in versionTypes)
+
+    def userOf(self, user) :
+        key = (user.get('id_str') or unicode(user.get('id')), user.get('screen_name'))
+        index = self.userIndex.get(key)
+        if index is None :
+            index = self.userIndex[key] = len(self.users)
+            self.users.append(list(key))
+        return index
+
+    def scan(self, filename, start) :
+        """Add the complete lines from byte start, returning the byte at
+        which they end"""
+        loads = jsonBackend.current.loads
+        rows, versions = self.rows, self.versions
+        with open(filename, 'rb') as inp :
+            inp.seek(start)
+            offset = start
+            for line in inp :
+                if not line.endswith('\n') :
+                    break
+                length = len(line)
+                if line.strip() :
+                    item = loads(line)
+                    if isinstance(item, list) :
+                        self.versionUser.append(self.userOf(item[1]))
+                        versions['versionUser'].append(self.versionUser[-1])
+                        versions['versionOffset'].append(offset)
+                        versions['versionLength'].append(length)
+                    else :
+                        self.addTweet(item, offset, length)
+                offset += length
+        return offset
+
+    def addTweet(self, tweet, offset, length) :
+        rows = self.rows
+        user = tweet['user']
+        flags = 0
+        if 'retweeted_status' in tweet :
+            flags |= retweetFlag
+        if 'quoted_status' in tweet :
+            flags |= quoteFlag
+        if tweetArchive.hasMedia(tweet) :
+            flags |= mediaFlag
+        rows['id'].append(tweet['id'])
+        rows['time'].append(tweetTime.tweetTime(tweet))
+        rows['user'].append(self.versionUser[user] if isinstance(user, (int, long)) else self.userOf(user))
+        rows['retweets'].append(tweet.get('retweet_count') or 0)
+        rows['favorites'].append(tweet.get('favorite_count') or 0)
+        rows['flags'].append(flags)
+        rows['offset'].append(offset)
+        rows['length'].append(length)
+
+
+def buildColumns(filename) :
+    """Bring the sidecar of an archive up to date, adding only the lines
+    appended since it was last built if that's all that changed. Returns
+    the number of tweets added to it."""
+    _check(filename)
+    dirname = sidecarName(filename)
+    size = os.path.getsize(filename)
+    meta, users = _readMeta(dirname)
+    if meta and (meta['size'] > size or meta['checksums'] != _checksums(filename, meta['size'])) :
+        meta = None
+    if meta and meta['size'] == size :
+        return 0
+
+    if not os.path.isdir(dirname) :
+        os.makedirs(dirname)
+    if meta :
+        start = meta['size']
+        old = dict((x, numpy.load(os.path.join(dirname, x + '.npy')))
+            for x, _ in columnTypes + versionTypes)
+        versionUser = old['versionUser'].tolist()
+    else :
+        start = 0
+        old = {}
+        users, versionUser = [], []
+        if os.path.exists(os.path.join(dirname, 'meta.json')) :
+            os.remove(os.path.join(dirname, 'meta.json'))
+
+    scanner = _scanner(users, versionUser)
+    covered = scanner.scan(filename, start)
+    added = dict(scanner.rows, **scanner.versions)
+    for name, dtype in columnTypes + versionTypes :
+        values = numpy.array(added[name], dtype=dtype)
+        if name in old :
+            values = numpy.concatenate((old[name], values))
+        _save(dirname, name, values)
+    _writeText(dirname, 'users.json', scanner.users)
+    _writeText(dirname, 'meta.json', {'version' : sidecarVersion, 'size' : covered,
+        'checksums' : _checksums(filename, covered), 'rows' : len(old.get('id', ())) + len(added['id'])})
+    return len(added['id'])
+
+
+def openColumns(filename, update=True) :
+    """The columns of an archive, memory-mapped, building or updating the
+    sidecar first unless update is False"""
+    _check(filename)
+    if update :
+        buildColumns(filename)
+    return columns(filename)
+
+
+class columns(object) :
+    """The memory-mapped columns of an archive, each a NumPy array with a
+    row per tweet in file order (see columnTypes), and users, the
+    [id_str, screen_name] of each user index"""
+
+    def __init__(self, filename) :
+        self.filename = filename
+        self.dirname = sidecarName(filename)
+        meta, self.users = _readMeta(self.dirname)
+        if meta is None :
+            raise ValueError('{} (no columns built)'.format(filename))
+        self.size = meta['size']
+        self.interned = filename.endswith('.ijsonl')
+        for name, _ in columnTypes + versionTypes :
+            setattr(self, name, numpy.load(os.path.join(self.dirname, name + '.npy'), mmap_mode='r'))
+        self._archive = None
+
+    def __len__(self) :
+        return len(self.id)
+
+    def close(self) :
+        if self._archive is not None :
+            self._archive.close()
+            self._archive = None
+
+    def __enter__(self) :
+        return self
+
+    def __exit__(self, *exc) :
+        self.close()
+
+    def rows(self) :
+        return numpy.arange(len(self))
+
+    def select(self, user=None, since=None, until=None, retweets=None, media=None, rows=None) :
+        """Indexes of the rows matching a query, in file order, as in
+        tweetArchive.archive.select but for the text; rows narrows an
+        earlier selection"""
+        mask = numpy.ones(len(self), dtype=bool)
+        if user :
+            name = user.lstrip('@').lower()
+            mask &= numpy.in1d(self.user, [ix for ix, x in enumerate(self.users) if x[1].lower() == name])
+        if since is not None :
+            mask &= self.time >= since
+        if until is not None :
+            mask &= self.time < until
+        if retweets is not None :
+            mask &= (self.flags & retweetFlag != 0) == retweets
+        if media is not None :
+            mask &= (self.flags & mediaFlag != 0) == media
+        selected = numpy.flatnonzero(mask)
+        return selected if rows is None else numpy.intersect1d(rows, selected)
+
+    def order(self, rows=None, descending=True) :
+        """Rows sorted by tweet ID, rows with equal IDs kept in file order"""
+        rows = self.rows() if rows is None else numpy.asarray(rows)
+        ids = self.id[rows]
+        return rows[numpy.argsort(-ids if descending else ids, kind='mergesort')]
+
+    def fetch(self, rows) :
+        """Generate the tweets of the rows, in the order given"""
+        if self._archive is None and self.size :
+            with open(self.filename, 'rb') as inp :
+                self._archive = mmap.mmap(inp.fileno(), self.size, access=mmap.ACCESS_READ)
+        data = self._archive
+        loads = jsonBackend.current.loads
+        rows = numpy.asarray(rows, dtype='int64')
+        profiles = _profiles(self) if self.interned else None
+        for offset, length in itertools.izip(self.offset[rows].tolist(), self.length[rows].tolist()) :
+            tweet = loads(data[offset:offset + length])
+            yield tweetRecord.loadedTweet(tweet, profiles) if profiles is not None else tweet
+
+    def selectTweets(self, descending=True, sort=False, limit=None, match=None, **query) :
+        """Generate the tweets matching a query, as tweetStore.selectStream
+        would from the whole archive: in file order, or by ID if sorted.
+        Only the text match needs the tweets, so it's applied to the rows
+        fetched."""
+        rows = self.select(**query)
+        if sort :
+            rows = self.order(rows, descending)
+        if limit and not match :
+            rows = rows[:limit]
+        tweets = self.fetch(rows)
+        if match :
+            tweets = itertools.ifilter(tweetArchive.matcher(match=match), tweets)
+            if limit :
+                tweets = itertools.islice(tweets, limit)
+        return tweets
+
+
+class _profiles(object) :
+    """The user versions of an .ijsonl archive by number, each read from
+    its line when first asked for"""
+
+    def __init__(self, cols) :
+        self.cols = cols
+        self.loaded = {}
+
+    def __getitem__(self, number) :
+        user = self.loaded.get(number)
+        if user is None :
+            offset = int(self.cols.versionOffset[number])
+            line = self.cols._archive[offset:offset + int(self.cols.versionLength[number])]
+            user = self.loaded[number] = jsonBackend.current.loads(line)[1]
+        return user
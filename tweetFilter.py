@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+# ******************************************************************************
+#   A small expression language for selecting tweets, compiled into a single
+#   predicate that the tools apply as tweets stream past, and routing of one
+#   stream to several output files by expression in the same pass.
+#
+#   An expression is made of tests joined with and, or, not and parentheses:
+#
+#       retweet  quote  reply  media     Flags of the tweet
+#       user:NAME[,NAME...]              Posted by one of these screen names
+#       users:FILENAME                   ... or one listed in a file, one per
+#                                        line, e.g. "not users:blocked.txt"
+#       lang:CODE[,CODE...]              In one of these languages
+#       text:WORDS                       Text contains this (any case)
+#       text~REGEX                       Text matches this regular expression
+#       since:TIME  until:TIME           Posted at or after / before a time,
+#                                        in UTC unless a zone is given
+#       id, retweets, favorites,         Compared with =, !=, <, <=, > or >=
+#       followers                        e.g. "retweets>=10" or "retweets >= 10"
+#
+#   Values holding spaces or parentheses are quoted with ' or ", e.g.
+#   since:'2015-10-18 14:00'. A test that appears after "and" is only tried
+#   if the tests before it pass, so when compiling, the operands of every
+#   and/or are reordered to try the cheap tests (flags, numbers, and times,
+#   which are read from the tweet IDs) before the dearer ones (names and
+#   text).
+#
+#   Typical use:
+#
+#       keep = tweetFilter.compileFilter('not retweet and lang:en and retweets>=5')
+#       tweets = itertools.ifilter(keep, tweetStore.readTweets('in.jsonl'))
+#
+#   18 Oct 2026
+#
+# ******************************************************************************
+
+import re
+import io
+import operator
+import tweetStore
+import tweetArchive
+import tweetTime
+import tweetProfile
+
+
+class filterError(ValueError) :
+    """Raised for an expression that can't be parsed"""
+    pass
+
+
+# Relative cost of each kind of test, used to order the operands of and/or
+costFlag    = 1
+costNumber  = 2
+costTime    = 3
+costName    = 4
+costText    = 8
+costRegex   = 16
+
+flags = {
+    'retweet' : lambda x: 'retweeted_status' in x,
+    'quote'   : lambda x: 'quoted_status' in x,
+    'reply'   : lambda x: x.get('in_reply_to_status_id') is not None,
+    'media'   : tweetArchive.hasMedia,
+}
+
+numbers = {
+    'id'        : lambda x: x['id'],
+    'retweets'  : lambda x: x.get('retweet_count', 0),
+    'favorites' : lambda x: x.get('favorite_count', 0),
+    'followers' : lambda x: x['user'].get('followers_count', 0),
+}
+
+comparisons = {'=' : operator.eq, ':' : operator.eq, '!=' : operator.ne,
+               '<' : operator.lt, '<=' : operator.le,
+               '>' : operator.gt, '>=' : operator.ge}
+
+re_space = re.compile(r'\s*')
+re_word  = re.compile(r'[A-Za-z_]+')
+re_op    = re.compile(r'<=|>=|!=|[=<>:~]')
+re_value = re.compile(r'''"([^"]*)"|'([^']*)'|([^\s()]+)''')
+
+
+class _node(object) :
+    """A compiled test: a predicate on a tweet and its relative cost"""
+
+    def __init__(self, test, cost) :
+        self.test = test
+        self.cost = cost
+
+
+class _parser(object) :
+    """Recursive descent over an expression string:
+
+        expr   := term ('or' term)*
+        term   := factor ('and' factor)*
+        factor := 'not' factor | '(' expr ')' | test
+    """
+
+    def __init__(self, text, zone=None) :
+        self.text = text
+        self.zone = zone
+        self.pos = 0
+
+    def parse(self) :
+        node = self.expr()
+        self.skip()
+        if self.pos < len(self.text) :
+            self.fail('Unexpected {!r}'.format(self.text[self.pos:]))
+        return node
+
+    def fail(self, message) :
+        raise filterError('{} in filter "{}"'.format(message, self.text))
+
+    def skip(self) :
+        self.pos = re_space.match(self.text, self.pos).end()
+
+    def keyword(self, word) :
+        """Consume a keyword if it comes next"""
+        self.skip()
+        match = re_word.match(self.text, self.pos)
+        if match and match.group().lower() == word :
+            self.pos = match.end()
+            return True
+        return False
+
+    def expr(self) :
+        nodes = [self.term()]
+        while self.keyword('or') :
+            nodes.append(self.term())
+        return _anyOf(nodes)
+
+    def term(self) :
+        nodes = [self.factor()]
+        while self.keyword('and') :
+            nodes.append(self.factor())
+        return _allOf(nodes)
+
+    def factor(self) :
+        if self.keyword('not') :
+            node = self.factor()
+            test = node.test
+            return _node(lambda x: not test(x), node.cost)
+        self.skip()
+        if self.text.startswith('(', self.pos) :
+            self.pos += 1
+            node = self.expr()
+            self.skip()
+            if not self.text.startswith(')', self.pos) :
+                self.fail('Missing )')
+            self.pos += 1
+            return node
+        return self.test()
+
+    def test(self) :
+        match = re_word.match(self.text, self.pos)
+        if not match :
+            self.fail('Expected a test at {!r}'.format(self.text[self.pos:] or 'end'))
+        name = match.group().lower()
+        self.pos = match.end()
+
+        self.skip()
+        match = re_op.match(self.text, self.pos)
+        if not match :
+            if name not in flags :
+                self.fail('Unknown flag {}'.format(name))
+            return _node(flags[name], costFlag)
+        op = match.group()
+        self.pos = match.end()
+
+        self.skip()
+        match = re_value.match(self.text, self.pos)
+        if not match :
+            self.fail('Missing value for {}'.format(name))
+        value = next(x for x in match.groups() if x is not None)
+        self.pos = match.end()
+
+        try :
+            return _test(name, op, value, self.zone)
+        except filterError as err :
+            self.fail(err)
+
+
+def _test(name, op, value, zone=None) :
+    """Compile a single name-op-value test"""
+
+    if name in numbers :
+        if op not in comparisons :
+            raise filterError('Bad comparison {}{}'.format(name, op))
+        try :
+            value = int(value)
+        except ValueError :
+            raise filterError('Not a number: {}'.format(value))
+        field, compare = numbers[name], comparisons[op]
+        return _node(lambda x: compare(field(x), value), costNumber)
+
+    if name in ('user', 'users', 'lang') :
+        if op not in (':', '=', '!=') :
+            raise filterError('Bad comparison {}{}'.format(name, op))
+        if name == 'users' :
+            values = readNames(value)
+        else :
+            values = set(x.strip().lstrip('@').lower() for x in value.split(','))
+        if name != 'lang' :
+            test = lambda x: x['user']['screen_name'].lower() in values
+        else :
+            test = lambda x: (x.get('lang') or '').lower() in values
+        if op == '!=' :
+            test = _negate(test)
+        return _node(test, costName)
+
+    if name == 'text' :
+        if op == '~' :
+            try :
+                pattern = re.compile(value, re.IGNORECASE | re.UNICODE)
+            except re.error as err :
+                raise filterError('Bad regular expression {}: {}'.format(value, err))
+            search = pattern.search
+            return _node(lambda x: search(x['text']) is not None, costRegex)
+        if op in (':', '=') :
+            value = value.lower()
+            return _node(lambda x: value in x['text'].lower(), costText)
+        raise filterError('Bad comparison {}{}'.format(name, op))
+
+    if name in ('since', 'until') :
+        if op not in (':', '=') :
+            raise filterError('Bad comparison {}{}'.format(name, op))
+        try :
+            when = tweetTime.parseTime(value, zone)
+        except ValueError as err :
+            raise filterError(str(err))
+        created = tweetTime.tweetTime
+        if name == 'since' :
+            return _node(lambda x: created(x) >= when, costTime)
+        return _node(lambda x: created(x) < when, costTime)
+
+    raise filterError('Unknown test {}'.format(name))
+
+
+def _negate(test) :
+    return lambda x: not test(x)
+
+
+def _allOf(nodes) :
+    """Conjunction of nodes, cheapest first"""
+    if len(nodes) == 1 :
+        return nodes[0]
+    nodes = sorted(nodes, key=lambda x: x.cost)
+    test = nodes[-1].test
+    for node in reversed(nodes[:-1]) :
+        test = _both(node.test, test)
+    return _node(test, sum(x.cost for x in nodes))
+
+
+def _anyOf(nodes) :
+    """Disjunction of nodes, cheapest first"""
+    if len(nodes) == 1 :
+        return nodes[0]
+    nodes = sorted(nodes, key=lambda x: x.cost)
+    test = nodes[-1].test
+    for node in reversed(nodes[:-1]) :
+        test = _either(node.test, test)
+    return _node(test, sum(x.cost for x in nodes))
+
+
+def _both(first, second) :
+    return lambda x: first(x) and second(x)
+
+
+def _either(first, second) :
+    return lambda x: first(x) or second(x)
+
+
+def readNames(filename) :
+    """Set of lowercased screen names listed in a file, one per line, with
+    blank lines and # comments skipped"""
+    try :
+        with io.open(filename, 'r', encoding='utf-8') as inp :
+            names = [x.split('#')[0].strip().lstrip('@').lower() for x in inp]
+    except IOError as err :
+        raise filterError('Can\'t read names: {}'.format(err))
+    return set(x for x in names if x)
+
+
+def compileFilter(expression, zone=None) :
+    """Compile a filter expression into a predicate on tweets, raising
+    filterError if it can't be parsed. Times are read in the zone given
+    (see tweetTime.parseTime)."""
+    return tweetProfile.current.function('transform', _parser(expression, zone).parse().test)
+
+
+def routeTweets(routes, tweets, protocol=None, compact=False) :
+    """Write each tweet of a stream to the files of every route whose
+    predicate it passes, all in one pass. routes is a list of (filenames,
+    predicate) pairs. Returns the number of tweets read and a list of the
+    number written by each route."""
+
+    counts = [0] * len(routes)
+    writers = [[] for _ in routes]
+    try :
+        for ix, (filenames, keep) in enumerate(routes) :
+            for filename in filenames :
+                writers[ix].append(tweetStore.tweetWriter(filename, protocol, compact=compact))
+        total = 0
+        for tweet in tweets :
+            total += 1
+            for ix, (filenames, keep) in enumerate(routes) :
+                if keep(tweet) :
+                    counts[ix] += 1
+                    for out in writers[ix] :
+                        out.write(tweet)
+    finally :
+        for outs in writers :
+            for out in outs :
+                out.close()
+    return total, counts
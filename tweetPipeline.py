@@ -0,0 +1,573 @@
+# -*- coding: utf-8 -*-
+# *****************************************************************************
+#   One entry point for the capture, merge, filter and export tools, which
+#   can also chain them into a pipeline run in a single process. The usual
+#
+#       getConfHashtag.py -> mergeTweets.py -> filterRetweets.py
+#           -> writeCSV.py + writeHTML.py
+#
+#   writes and reads back the whole archive at every step. Here the tweets
+#   flow from step to step as one stream, the CSV and HTML files are written
+#   in the same pass, and an archive is only written by a save step.
+#
+#   Each step is a subcommand, and steps are chained with "then":
+#
+#       python tweetPipeline.py capture '#chat' then merge chat_old.jsonl
+#           then filter then csv chat.csv then html chat.html
+#
+#   or listed a step per line in a pipeline file, blank lines and lines
+#   starting with # skipped, and run with
+#
+#       python tweetPipeline.py run chat.pipeline
+#
+#   Steps:
+#       capture HASHTAG [HASHTAG ...]
+#                     Search Twitter through the capture journal, as
+#                     getConfHashtag.py does (--lower, --start, --tz,
+#                     --journal, --restart, --notice, --domain)
+#       read FILENAME Read an archive (-s, -a and the query options)
+#       merge FILENAME [FILENAME ...]
+#                     Merge archives with the tweets so far in ID order,
+#                     dropping repeated IDs, as mergeTweets.py does (-a,
+#                     --runsize, --tmpdir and the query options)
+#       filter        Drop retweets, or with -w keep the tweets matching a
+#                     filter expression (see tweetFilter.py), and apply the
+#                     query options
+#       sort          Sort by ID in bounded memory (-a, --runsize, --tmpdir)
+#       save FILENAME [FILENAME ...]
+#                     Write the tweets so far to archives (--compact,
+#                     --protocol)
+#       csv FILENAME  Write the tweets so far as writeCSV.py does
+#       html FILENAME Write the tweets so far as one page, as writeHTML.py
+#                     does (--summary, --cache, --cachesize)
+#
+#   --profile FILENAME, given ahead of the first step, saves the time and
+#   memory of each phase of the whole pipeline (see tweetProfile.py), and
+#   --cprofile FILENAME its cProfile statistics.
+#
+#   capture and read start a pipeline; merge may start one too. The save,
+#   csv and html steps pass the tweets on, so any number of them see the
+#   same pass. A merge tells the order of each input from its first run as
+#   it streams: one in order passes straight through, one in the opposite
+#   order is reversed a run at a time, and any other is sorted in runs. If
+#   an input whose first run was in order turns out not to be, the whole
+#   pipeline starts again with that input sorted. The tweets so far are
+#   taken to be in order if a sort or merge made them so, or they were read
+#   from an SQLite archive, with --sort, or with --sorted.
+#
+#   Keith Eric Grant (keg@ramblemuse.com)
+#   18 Oct 2026
+#
+# *****************************************************************************
+
+import sys
+import os
+import argparse
+import shlex
+import codecs
+import io
+import itertools
+import time
+import twitter
+import tweetStore
+import tweetArchive
+import tweetFilter
+import tweetProfile
+import tweetSort
+import tweetTime
+import captureJournal
+import rateLimiter
+import fragmentCache
+import getConfHashtag
+import writeCSV
+import writeHTML
+
+
+myName  = 'tweetPipeline.py'
+version = '1.0.2'
+
+# Word separating the steps of a pipeline on the command line
+separator = 'then'
+
+
+class pipelineError(ValueError) :
+    """Raised for a pipeline that can't be run as given"""
+    pass
+
+
+class step(object) :
+    """A step of a pipeline. apply takes the stream of tweets from the
+    steps before it, or None for the first step, and returns the stream it
+    passes on. close ends its work once the stream has run out (or failed),
+    and report gives the lines to print once the pipeline is done. before
+    is the step ahead of it, if any, and inOrder whether the stream it
+    passes on is known to be in ID order; most steps keep the order they're
+    given. restart is asked, when a stream turns out to be out of ID order,
+    whether the step can take it sorted if the pipeline starts again."""
+
+    source = False
+
+    def __init__(self, args) :
+        self.args = args
+        self.before = None
+
+    def apply(self, tweets) :
+        return tweets
+
+    def inOrder(self, descending=True) :
+        return self.before is not None and self.before.inOrder(descending)
+
+    def restart(self, name) :
+        return False
+
+    def close(self) :
+        pass
+
+    def report(self) :
+        return []
+
+
+class captureStep(step) :
+    """Search for hashtags into the capture journal, and stream the tweets
+    found in the order the journal holds them"""
+
+    source = True
+
+    def __init__(self, args) :
+        step.__init__(self, args)
+        self.hashtags = [x if x[0] == '#' else '#' + x for x in args.hashtags]
+        basetags = [x[1:] for x in self.hashtags]
+        basetag = basetags[0] if len(self.hashtags) == 1 else basetags[0] + '_all'
+        self.journalFilename = args.journal if args.journal else basetag + '.journal'
+        self.lower = args.lower
+        if args.start :
+            start = max(tweetTime.timeID(tweetTime.parseTime(args.start, args.tz)) - 1, 0)
+            self.lower = max(self.lower, start)
+        self.capture = None
+        self.sessions = None
+
+    def apply(self, tweets) :
+        if self.capture is None :
+            self.capture = captureJournal.journal(self.journalFilename)
+        if self.sessions is None :
+            api = getConfHashtag.searchAPI(self.args.domain)
+            try :
+                self.sessions = getConfHashtag.captureQueries(api,
+                    getConfHashtag.packQueries(self.hashtags), self.capture,
+                    self.lower, self.args.notice, self.args.restart)
+            except (twitter.TwitterError,) + rateLimiter.networkErrors as err :
+                self.capture.close()
+                raise pipelineError('Search failed: {}\nRerun to resume the capture '
+                    'from journal {}'.format(err, self.journalFilename))
+        self.inp = tweetStore.counter(getConfHashtag.capturedTweets(self.capture, self.sessions))
+        return self.inp
+
+    def inOrder(self, descending=True) :
+        return False
+
+    def close(self) :
+        if self.capture :
+            self.capture.close()
+            self.capture = None
+
+    def report(self) :
+        return ['{}: {} tweets. Uppermost ID: {}'.format(' '.join(self.hashtags),
+            self.inp.count, self.inp.maxID)]
+
+
+class readStep(step) :
+    """Stream the selected tweets of an archive"""
+
+    source = True
+
+    def apply(self, tweets) :
+        args = self.args
+        self.inp = tweetStore.counter(tweetStore.selectTweets(args.inpfile,
+            not args.ascend, args.sort, **tweetArchive.queryArguments(args)))
+        return self.inp
+
+    def inOrder(self, descending=True) :
+        args = self.args
+        if args.sort or tweetStore.formatOf(args.inpfile) == 'sqlite' :
+            return descending != args.ascend
+        return args.ordered
+
+    def report(self) :
+        return ['{}: {} tweets'.format(self.args.inpfile, self.inp.count)]
+
+
+class mergeStep(step) :
+    """Merge archives, and the tweets so far if there are any, in ID order,
+    dropping repeated IDs. Each input not known to be in order is told
+    from its first run as it's merged, and those found out of order later
+    on are sorted when the pipeline starts again."""
+
+    def __init__(self, args) :
+        step.__init__(self, args)
+        self.query = tweetArchive.queryArguments(args)
+        self.limit = self.query.pop('limit')
+        self.upstream = 'The tweets ahead of merging {}'.format(' '.join(args.inputs))
+        self.unsorted = set()
+        self.checked = set()
+
+    def apply(self, tweets) :
+        descSort = not self.args.ascend
+        named = [(fn, tweetStore.selectTweets(fn, descSort, **self.query)) for fn in self.args.inputs]
+        if tweets is not None :
+            query = dict((x, y) for x, y in self.query.items() if x != 'columns')
+            named.insert(0, (self.upstream, tweetStore.selectStream(tweets, **query)))
+        self.inputs = []
+        self.checked = set()
+        streams = []
+        for name, inp in named :
+            inp = tweetStore.counter(inp)
+            self.inputs.append((name, inp))
+            if name == self.upstream :
+                ordered = self.before.inOrder(descSort)
+            else :
+                ordered = self.query['ordered'] or tweetStore.formatOf(name) == 'sqlite'
+            if ordered :
+                streams.append(tweetSort.ordered(inp, descSort, name))
+            elif name in self.unsorted :
+                streams.append(tweetSort.sortTweets(inp, descSort, self.args.runsize, self.args.tmpdir))
+            else :
+                self.checked.add(name)
+                streams.append(tweetSort.orderedTweets(inp, descSort, self.args.runsize,
+                    self.args.tmpdir, name, self.notice))
+        self.merged = tweetStore.counter(tweetSort.dedupeAdjacent(tweetSort.mergeSorted(streams, descSort)))
+        return itertools.islice(self.merged, self.limit) if self.limit else self.merged
+
+    def notice(self, name, how) :
+        if how == 'reversed' :
+            print '{} is in the opposite ID order; reversing it in runs of {} tweets'.format(name, self.args.runsize)
+        else :
+            print '{} is not in ID order; sorting it in runs of {} tweets'.format(name, self.args.runsize)
+
+    def inOrder(self, descending=True) :
+        return descending != self.args.ascend
+
+    def restart(self, name) :
+        if name not in self.checked :
+            return False
+        print '{} is out of ID order after its first {} tweets; starting again with it sorted'.format(
+            name, self.args.runsize)
+        self.unsorted.add(name)
+        return True
+
+    def report(self) :
+        lines = ['{}: {} tweets'.format(x, y.count) for x, y in self.inputs]
+        lines.append('{} merged tweets'.format(self.merged.count))
+        return lines
+
+
+class filterStep(step) :
+    """Drop retweets, or keep the tweets matching a filter expression, and
+    apply the query options"""
+
+    def __init__(self, args) :
+        step.__init__(self, args)
+        self.query = tweetArchive.queryArguments(args)
+        self.query.pop('columns')
+        self.limit = self.query.pop('limit')
+        if args.where :
+            self.keep = tweetFilter.compileFilter(args.where, args.tz)
+        else :
+            self.keep = lambda tweet : 'retweeted_status' not in tweet
+
+    def apply(self, tweets) :
+        self.kept = tweetStore.counter(tweetStore.selectStream(itertools.ifilter(self.keep, tweets),
+            limit=self.limit, **self.query))
+        return self.kept
+
+    def report(self) :
+        if self.args.where :
+            return ['{} tweets matching {}'.format(self.kept.count, self.args.where)]
+        return ['{} tweets without retweets'.format(self.kept.count)]
+
+
+class sortStep(step) :
+    """Sort the tweets by ID, in runs spilled to temporary files"""
+
+    def apply(self, tweets) :
+        return tweetSort.sortTweets(tweets, not self.args.ascend, self.args.runsize, self.args.tmpdir)
+
+    def inOrder(self, descending=True) :
+        return descending != self.args.ascend
+
+
+class saveStep(step) :
+    """Write the tweets passing through to archive files"""
+
+    def apply(self, tweets) :
+        self.count = 0
+        self.writers = []
+        for filename in self.args.outputs :
+            self.writers.append(tweetStore.tweetWriter(filename, self.args.protocol,
+                compact=self.args.compact))
+        return self.passOn(tweets)
+
+    def passOn(self, tweets) :
+        for tweet in tweets :
+            for out in self.writers :
+                out.write(tweet)
+            self.count += 1
+            yield tweet
+
+    def close(self) :
+        for out in getattr(self, 'writers', []) :
+            out.close()
+        self.writers = []
+
+    def report(self) :
+        return ['Wrote {} tweets to {}'.format(self.count, ', '.join(self.args.outputs))]
+
+
+class csvStep(step) :
+    """Write the CSV rows of the tweets passing through"""
+
+    def apply(self, tweets) :
+        self.count = 0
+        self.out = codecs.open(self.args.csv, mode='w', encoding='utf-8')
+        self.out.write(writeCSV.csvHeader)
+        return self.passOn(tweets)
+
+    def passOn(self, tweets) :
+        row = tweetProfile.current.function('render', writeCSV.csvRow)
+        out = tweetProfile.current.writer(self.out)
+        for tweet in tweets :
+            out.write(row(tweet))
+            self.count += 1
+            yield tweet
+
+    def close(self) :
+        if getattr(self, 'out', None) :
+            self.out.close()
+            self.out = None
+
+    def report(self) :
+        return ['Wrote {} tweets to CSV file {}'.format(self.count, self.args.csv)]
+
+
+class htmlStep(step) :
+    """Write the tweets passing through as an HTML page, a tweet at a time
+    between the page's opening and closing text"""
+
+    def __init__(self, args) :
+        step.__init__(self, args)
+        self.summary = None
+        if args.summary :
+            with io.open(args.summary, 'r', encoding='utf-8') as section :
+                self.summary = section.read()
+        self.cache = None
+
+    def apply(self, tweets) :
+        args = self.args
+        if args.cache is not None :
+            cacheFile = args.cache if args.cache else os.path.splitext(args.html)[0] + '.fragments.db'
+            self.cache = fragmentCache.fragmentCache(cacheFile, writeHTML.renderVersion, args.cachesize)
+        head, self.tail = writeHTML.pageShell(self.summary)
+        self.count = 0
+        self.out = io.open(args.html, 'w', encoding='utf-8')
+        self.out.write(head)
+        return self.passOn(tweets)
+
+    def passOn(self, tweets) :
+        cache = self.cache
+        profile = tweetProfile.current
+        out = profile.writer(self.out)
+        for tweet in tweets :
+            with profile.phase('render') :
+                html = writeHTML.cachedTweet(cache, tweet) if cache else writeHTML.renderTweet(tweet)
+            out.write(html)
+            self.count += 1
+            yield tweet
+
+    def close(self) :
+        if getattr(self, 'out', None) :
+            self.out.write(self.tail)
+            self.out.close()
+            self.out = None
+        if self.cache :
+            self.cache.close()
+            self.cacheReport = self.cache.report()
+            self.cache = None
+
+    def report(self) :
+        lines = ['Wrote {} tweets to HTML file {}'.format(self.count, self.args.html)]
+        if self.args.cache is not None :
+            lines.append(self.cacheReport)
+        return lines
+
+
+def runPipeline(steps) :
+    """Run the steps over one stream of tweets. Returns the number of
+    tweets that came out of the last step. If a merged input turns out to
+    be out of ID order, the steps after the source are closed and the
+    pipeline starts again with that input sorted; a capture streams its
+    tweets again from the journal rather than searching again."""
+
+    try :
+        while True :
+            tweets = None
+            try :
+                for before, item in zip([None] + steps, steps) :
+                    item.before = before
+                    tweets = item.apply(tweets)
+                total = 0
+                for _ in tweets :
+                    total += 1
+                return total
+            except tweetSort.outOfOrder as err :
+                if not any([x.restart(err.args[0]) for x in steps]) :
+                    raise
+                for item in steps :
+                    if not item.source :
+                        item.close()
+    finally :
+        for item in steps :
+            item.close()
+
+
+def stepParser() :
+    """The command line parser, with a subcommand for each step"""
+
+    parser = argparse.ArgumentParser(
+        prog=myName,
+        description='Capture, merge, filter and export tweets in one pass',
+        version=version)
+    steps = parser.add_subparsers(dest='step', metavar='STEP',
+        help='capture, read, merge, filter, sort, save, csv, html, or run a pipeline file; '
+        'chain steps with "{}"'.format(separator))
+    tweetProfile.addProfileArguments(parser)
+
+    sub = steps.add_parser('run', help='Run the pipeline listed in a file, a step per line')
+    sub.add_argument('pipeline', action='store', help='Pipeline filename')
+
+    sub = steps.add_parser('capture', help='Search Twitter for hashtags')
+    sub.add_argument('hashtags', nargs='+', metavar='hashtag', help='hashtags to search for, including #')
+    sub.add_argument('--lower',  '-l', action='store', type=int, help='Set lower limit on tweet IDs (default: highest ID in the journal)')
+    sub.add_argument('--start', action='store', help='Only tweets at or after this time (YYYY-MM-DD [HH:MM[:SS]])')
+    sub.add_argument('--tz', action='store', help='Time zone of --start: UTC (default), local, an offset like --tz=-07:00, or a name (needs pytz)')
+    sub.add_argument('--notice', '-n', action='store', type=int, default=100, help='Print processing count every n tweets')
+    sub.add_argument('--journal', action='store', help='Capture journal file name')
+    sub.add_argument('--restart', action='store_true', default=False, help='Abandon an interrupted capture instead of resuming it')
+    sub.add_argument('--domain', action='store', help='Search a local test endpoint (HOST:PORT) over plain HTTP')
+    sub.set_defaults(make=captureStep)
+
+    sub = steps.add_parser('read', help='Read an archive')
+    sub.add_argument('inpfile', action='store', help='Input tweet filename')
+    sub.add_argument('--sort', '-s', action='store_true', default=False, help='Sort by decreasing ID')
+    sub.add_argument('--ascend', '-a', action='store_true', default=False, help='Use ascending sort')
+    tweetArchive.addQueryArguments(sub)
+    sub.set_defaults(make=readStep)
+
+    sub = steps.add_parser('merge', help='Merge archives with the tweets so far in ID order')
+    sub.add_argument('inputs', nargs='+', metavar='filename', help='Names of the files to merge')
+    sub.add_argument('--ascend', '-a', action='store_true', default=False, help='Use ascending order')
+    sub.add_argument('--runsize', action='store', type=int, default=tweetSort.runSize, help='Tweets per sorted run when an input is out of order')
+    sub.add_argument('--tmpdir', action='store', help='Directory for the sorted runs')
+    tweetArchive.addQueryArguments(sub)
+    sub.set_defaults(make=mergeStep)
+
+    sub = steps.add_parser('filter', help='Drop retweets, or keep the tweets matching an expression')
+    sub.add_argument('--where', '-w', action='store', help='Keep tweets matching this filter expression')
+    tweetArchive.addQueryArguments(sub)
+    sub.set_defaults(make=filterStep)
+
+    sub = steps.add_parser('sort', help='Sort by ID')
+    sub.add_argument('--ascend', '-a', action='store_true', default=False, help='Use ascending sort')
+    sub.add_argument('--runsize', action='store', type=int, default=tweetSort.runSize, help='Tweets per sorted run')
+    sub.add_argument('--tmpdir', action='store', help='Directory for the sorted runs')
+    sub.set_defaults(make=sortStep)
+
+    sub = steps.add_parser('save', help='Write the tweets to archive files')
+    sub.add_argument('outputs', nargs='+', metavar='filename', help='Archive file names')
+    sub.add_argument('--compact', action='store_true', default=False, help='Write JSON arrays compactly, a tweet per line')
+    sub.add_argument('--protocol', action='store', type=int, help='Pickle protocol (default: the highest)')
+    sub.set_defaults(make=saveStep)
+
+    sub = steps.add_parser('csv', help='Write the tweets as a CSV file')
+    sub.add_argument('csv', action='store', help='CSV output file name')
+    sub.set_defaults(make=csvStep)
+
+    sub = steps.add_parser('html', help='Write the tweets as an HTML page')
+    sub.add_argument('html', action='store', help='HTML output file name')
+    sub.add_argument('--summary', action='store', help='HTML section from summarizeTweets.py to put above the tweets')
+    sub.add_argument('--cache', action='store', nargs='?', const='', help='Reuse tweets rendered by earlier runs, kept in this file (default: HTML-NAME.fragments.db)')
+    sub.add_argument('--cachesize', action='store', type=int, default=fragmentCache.defaultLimit, help='Most fragments kept in the cache')
+    sub.set_defaults(make=htmlStep)
+
+    return parser
+
+
+def splitSteps(words) :
+    """Split a command line into the words of each step"""
+    if not words :
+        return [words]
+    groups = [list(y) for x, y in itertools.groupby(words, lambda x: x == separator) if not x]
+    if len(groups) != words.count(separator) + 1 :
+        raise pipelineError('Each "{}" has to come between two steps'.format(separator))
+    return groups
+
+
+def readPipeline(filename) :
+    """The words of each step listed in a pipeline file"""
+    groups = []
+    with open(filename, 'rb') as inp :
+        for line in inp :
+            if line.strip() and not line.lstrip().startswith('#') :
+                groups.append(shlex.split(line))
+    if not groups :
+        raise pipelineError('No steps in {}'.format(filename))
+    return groups
+
+
+def buildSteps(parser, groups) :
+    """The steps of a pipeline from the words of each"""
+    steps = []
+    for words in groups :
+        args = parser.parse_args(words)
+        if args.step == 'run' :
+            raise pipelineError('run has to be the only step')
+        item = args.make(args)
+        if item.source and steps :
+            raise pipelineError('{} has to be the first step'.format(args.step))
+        if not steps and not item.source and args.step != 'merge' :
+            raise pipelineError('{} needs tweets from capture, read or merge ahead of it'.format(args.step))
+        steps.append(item)
+    return steps
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+
+    parser = stepParser()
+    try :
+        groups = splitSteps(argv[1:])
+        tweetProfile.start(myName, parser.parse_args(groups[0]))
+        if len(groups) == 1 and groups[0] and groups[0][0] == 'run' :
+            groups = readPipeline(parser.parse_args(groups[0]).pipeline)
+        steps = buildSteps(parser, groups)
+    except (ValueError, IOError) as err :
+        print err
+        return 1
+
+    start = time.time()
+    try :
+        total = runPipeline(steps)
+    except (ValueError, IOError) as err :
+        print err
+        return 1
+    except tweetSort.outOfOrder as err :
+        print '{} is not in ID order; merge it without --sorted'.format(err)
+        return 1
+
+    for item in steps :
+        for line in item.report() :
+            print line
+    print '{} tweets through {} steps in {:.2f} seconds'.format(total, len(steps), time.time() - start)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,348 @@
+# -*- coding: utf-8 -*-
+# ******************************************************************************
+#   Per-phase profiling shared by the tools. With --profile FILE, a tool
+#   records the wall time, CPU time and peak memory spent in each phase of
+#   its work and saves them as a JSON report when it exits:
+#
+#       load       reading and decoding tweets from archives
+#       transform  selecting, filtering and deduplicating them
+#       sort       sorting and merging them by ID
+#       render     turning them into CSV rows and HTML
+#       write      writing files
+#       api        waiting on Twitter API calls (and downloads)
+#       sleep      waiting for the rate limit
+#       other      anything else
+#
+#   Tweets stream through several phases at once, so the time is split at
+#   each hand-over: a phase is charged only while it's the innermost one
+#   running, not for the phases it pulls tweets from. Memory is read from
+#   the process's peak resident size, so a phase is charged with the growth
+#   of the peak while it runs. The latency of each API call and each sleep
+#   is kept too, and reported as percentiles. With --cprofile FILE the run
+#   is also profiled by cProfile, and the statistics saved for pstats.
+#
+#   The library code marks its phases through current, which is a profiler
+#   that does nothing until a tool starts profiling: its timed, function
+#   and writer hand back what they're given, so profiling costs nothing
+#   when it's off.
+#
+#   Typical use:
+#
+#       tweetProfile.addProfileArguments(parser)
+#       args = parser.parse_args(argv[1:])
+#       tweetProfile.start(myName, args)
+#       ...
+#       tweets = tweetProfile.current.timed('load', readSomehow(filename))
+#
+#   18 Oct 2026
+#
+# ******************************************************************************
+
+import sys
+import os
+import atexit
+import platform
+import thread
+import time
+import simplejson as json
+
+try :
+    import resource
+except ImportError :
+    resource = None
+
+
+phaseNames = ['load', 'transform', 'sort', 'render', 'write', 'api', 'sleep', 'other']
+
+
+def addProfileArguments(parser) :
+    """Add the options that turn on profiling"""
+    group = parser.add_argument_group('profile', 'Measure where the time and memory go')
+    group.add_argument('--profile', action='store', metavar='FILE',
+        help='Save the wall and CPU time and peak memory of each phase, and API '
+        'latencies, as a JSON report')
+    group.add_argument('--cprofile', action='store', metavar='FILE',
+        help='Save cProfile statistics of the run, for pstats')
+
+
+def _usage() :
+    """Wall seconds, CPU seconds and peak resident KB of the process"""
+    if resource is None :
+        times = os.times()
+        return time.time(), times[0] + times[1], None
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    # Linux gives kilobytes, OS X bytes
+    peak = usage.ru_maxrss // 1024 if sys.platform == 'darwin' else usage.ru_maxrss
+    return time.time(), usage.ru_utime + usage.ru_stime, peak
+
+
+def percentile(ordered, fraction) :
+    """The value a fraction of the way through a sorted list, interpolated"""
+    if not ordered :
+        return None
+    pos = fraction * (len(ordered) - 1)
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+class phaseTotals(object) :
+    """What's been charged to one phase"""
+
+    __slots__ = ('wall', 'cpu', 'grewKB', 'peakKB', 'entries', 'items')
+
+    def __init__(self) :
+        self.wall    = 0.0
+        self.cpu     = 0.0
+        self.grewKB  = 0
+        self.peakKB  = None
+        self.entries = 0
+        self.items   = 0
+
+    def report(self) :
+        return {'wall' : round(self.wall, 6), 'cpu' : round(self.cpu, 6),
+                'peak_mb' : round(self.peakKB / 1024.0, 1) if self.peakKB is not None else None,
+                'grew_mb' : round(self.grewKB / 1024.0, 1),
+                'entries' : self.entries, 'items' : self.items}
+
+
+class _phase(object) :
+    """Context manager charging the time inside it to a phase"""
+
+    __slots__ = ('profile', 'name')
+
+    def __init__(self, profile, name) :
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self) :
+        self.profile._enter(self.name)
+        return self
+
+    def __exit__(self, *exc) :
+        self.profile._leave()
+        return False
+
+
+class _timedWriter(object) :
+    """File wrapper charging its writes to the write phase"""
+
+    def __init__(self, profile, out) :
+        self._profile = profile
+        self._out = out
+
+    def write(self, text) :
+        self._profile._enter('write')
+        try :
+            return self._out.write(text)
+        finally :
+            self._profile._leave()
+
+    def __getattr__(self, name) :
+        return getattr(self._out, name)
+
+
+class profiler(object) :
+    """Charges the time and memory of a run to the phases it passes
+    through. Only the thread that started it is charged; other threads
+    record their call latencies only."""
+
+    def __init__(self, tool, filename=None, cprofile=None, argv=None) :
+        self.tool     = tool
+        self.filename = filename
+        self.cprofileFile = cprofile
+        self.argv     = list(argv) if argv is not None else list(sys.argv)
+        self.thread   = thread.get_ident()
+        self.phases   = dict((x, phaseTotals()) for x in phaseNames)
+        self.latencies = {}
+        self.stack    = ['other']
+        self.phases['other'].entries = 1
+        self.started  = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        self.first    = self.last = _usage()
+        self.cprofile = None
+        if cprofile :
+            import cProfile
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+
+    def _charge(self) :
+        """Charge the usage since the last hand-over to the running phase"""
+        now = _usage()
+        totals = self.phases[self.stack[-1]]
+        totals.wall += now[0] - self.last[0]
+        totals.cpu  += now[1] - self.last[1]
+        if now[2] is not None :
+            totals.grewKB += now[2] - self.last[2]
+            totals.peakKB = now[2]
+        self.last = now
+
+    def _totals(self, name) :
+        totals = self.phases.get(name)
+        if totals is None :
+            totals = self.phases[name] = phaseTotals()
+        return totals
+
+    def _enter(self, name) :
+        if thread.get_ident() != self.thread :
+            return
+        self._charge()
+        self.stack.append(name)
+        self._totals(name).entries += 1
+
+    def _leave(self) :
+        if thread.get_ident() != self.thread :
+            return
+        self._charge()
+        self.stack.pop()
+
+    def phase(self, name) :
+        """Context manager charging the time inside it to a phase"""
+        return _phase(self, name)
+
+    def timed(self, name, items) :
+        """Pass an iterable through, charging the time spent producing each
+        item to a phase"""
+        items = iter(items)
+        totals = self._totals(name)
+        while True :
+            self._enter(name)
+            try :
+                item = next(items)
+            except StopIteration :
+                return
+            finally :
+                self._leave()
+            # A stream wrapped twice in one phase counts its items once
+            if self.stack[-1] != name :
+                totals.items += 1
+            yield item
+
+    def function(self, name, func) :
+        """Wrap a function so that its calls are charged to a phase"""
+        def timed(*args, **kwargs) :
+            self._enter(name)
+            try :
+                return func(*args, **kwargs)
+            finally :
+                self._leave()
+        return timed
+
+    def writer(self, out) :
+        """Wrap a file so that its writes are charged to the write phase"""
+        return _timedWriter(self, out)
+
+    def call(self, name, func, *args, **kwargs) :
+        """Call a function, charging it to a phase and keeping how long it
+        took among that phase's latencies"""
+        self._enter(name)
+        start = time.time()
+        try :
+            return func(*args, **kwargs)
+        finally :
+            self.latencies.setdefault(name, []).append(time.time() - start)
+            self._leave()
+
+    def report(self) :
+        """The report of the run so far, as a dict"""
+        self._charge()
+        end = self.last
+        latency = {}
+        for name, samples in self.latencies.items() :
+            ordered = sorted(samples)
+            latency[name] = {'count' : len(ordered), 'total' : round(sum(ordered), 6),
+                'mean' : round(sum(ordered) / len(ordered), 6),
+                'p50' : round(percentile(ordered, 0.50), 6),
+                'p90' : round(percentile(ordered, 0.90), 6),
+                'p99' : round(percentile(ordered, 0.99), 6),
+                'max' : round(ordered[-1], 6)}
+        return {'tool' : self.tool, 'argv' : self.argv, 'started' : self.started,
+                'python' : platform.python_version(), 'platform' : platform.platform(),
+                'wall' : round(end[0] - self.first[0], 6), 'cpu' : round(end[1] - self.first[1], 6),
+                'peak_mb' : round(end[2] / 1024.0, 1) if end[2] is not None else None,
+                'phases' : dict((x, y.report()) for x, y in self.phases.items()
+                                if y.entries or x == 'other'),
+                'latency' : latency}
+
+    def finish(self) :
+        """Stop profiling, saving the report and the cProfile statistics
+        and printing a summary"""
+        if self.cprofile :
+            self.cprofile.disable()
+            self.cprofile.dump_stats(self.cprofileFile)
+        report = self.report()
+        if self.filename :
+            with open(self.filename, 'w') as out :
+                json.dump(report, out, indent=2, sort_keys=True)
+                out.write('\n')
+        printReport(report)
+
+
+class nullProfiler(object) :
+    """The profiler in place while profiling is off, which hands back what
+    it's given"""
+
+    def phase(self, name) :
+        return _nullPhase
+
+    def timed(self, name, items) :
+        return items
+
+    def function(self, name, func) :
+        return func
+
+    def writer(self, out) :
+        return out
+
+    def call(self, name, func, *args, **kwargs) :
+        return func(*args, **kwargs)
+
+
+class _nullContext(object) :
+
+    def __enter__(self) :
+        return self
+
+    def __exit__(self, *exc) :
+        return False
+
+
+_nullPhase = _nullContext()
+
+current = nullProfiler()
+
+
+def start(tool, args) :
+    """Start profiling a tool if its --profile or --cprofile option is set.
+    The report is saved when the tool exits, or when finish is called."""
+    global current
+    if not (getattr(args, 'profile', None) or getattr(args, 'cprofile', None)) :
+        return current
+    finish()
+    current = profiler(tool, args.profile, args.cprofile)
+    return current
+
+
+def finish() :
+    """Stop profiling, if it's on, and save the report"""
+    global current
+    if isinstance(current, profiler) :
+        done, current = current, nullProfiler()
+        done.finish()
+
+
+atexit.register(finish)
+
+
+def printReport(report) :
+    print 'Profile: {:.2f} s wall, {:.2f} s CPU, peak {} MB'.format(report['wall'],
+        report['cpu'], report['peak_mb'] if report['peak_mb'] is not None else '-')
+    print '  {:<10} {:>9} {:>9} {:>9} {:>9}'.format('Phase', 'Wall s', 'CPU s', 'Grew MB', 'Items')
+    names = phaseNames + sorted(set(report['phases']) - set(phaseNames))
+    for name in names :
+        if name in report['phases'] :
+            phase = report['phases'][name]
+            print '  {:<10} {:>9.2f} {:>9.2f} {:>9.1f} {:>9}'.format(name, phase['wall'],
+                phase['cpu'], phase['grew_mb'], phase['items'])
+    for name, latency in sorted(report['latency'].items()) :
+        print '  {} latency: {} calls, p50 {:.3f} s, p90 {:.3f} s, p99 {:.3f} s, max {:.3f} s'.format(
+            name, latency['count'], latency['p50'], latency['p90'], latency['p99'], latency['max'])
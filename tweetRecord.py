@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+# ******************************************************************************
+#   Compact in-memory tweets with their users interned.
+#
+#   Every tweet from the Twitter API carries a full copy of its poster's
+#   profile, and retweets and quotes carry more inside retweeted_status and
+#   quoted_status, so a prolific poster's profile is repeated thousands of
+#   times in a loaded archive. Here each tweet becomes a record with slots
+#   for the fields the tools read (ID, time, text, source, user and the
+#   retweeted and quoted tweets, themselves records) and one dict for the
+#   rest, and its user is looked up in a userTable shared by every record.
+#   A profile is only shared with tweets whose copy is equal, so a user
+#   whose follower count changes during a capture has a few versions and
+#   nothing is lost: record.tweet() gives back a dict equal to the tweet.
+#
+#   Records read like the tweet dicts (tweet['user']['screen_name'],
+#   tweet.get('retweeted_status'), 'media' in tweet['entities']), so the
+#   tools take either. Interned users are shared and must not be changed.
+#
+#   The .ijsonl (interned JSON Lines) archive format of tweetStore keeps the
+#   table on disk too: each user version is written once, as a line
+#
+#       [NUMBER, {...user...}]
+#
+#   ahead of the first tweet line that refers to it, and in the tweet lines
+#   "user" is the number. It streams both ways like .jsonl.
+#
+#   Typical use:
+#
+#       users = tweetRecord.userTable()
+#       tweets = list(tweetRecord.internTweets(tweetStore.readTweets('in.json'), users))
+#
+#   18 Oct 2026
+#
+# ******************************************************************************
+
+import tweetProfile
+
+
+# Tweet fields kept in slots, nested tweets among them
+slotFields = ('id', 'created_at', 'text', 'source', 'user')
+nestedFields = ('retweeted_status', 'quoted_status')
+_slotted = frozenset(slotFields + nestedFields)
+
+# Versions of a user's profile that a new copy is compared with
+versionsCompared = 8
+
+
+class _missing(object) :
+    """Marks a slot whose field the tweet doesn't have"""
+    __slots__ = ()
+
+    def __repr__(self) :
+        return 'missing'
+
+    def __reduce__(self) :
+        return 'missing'
+
+missing = _missing()
+
+
+class userTable(object) :
+    """Interned user profiles, numbered in the order they're added. Equal
+    profiles of the same user share one dict."""
+
+    def __init__(self) :
+        self.users    = []                 # Profile of each number
+        self.versions = {}                 # Numbers of each user's versions, newest last
+        self.copies   = 0                  # Profiles interned, shared or not
+
+    def __len__(self) :
+        return len(self.users)
+
+    def number(self, user) :
+        """Number of a user profile, adding it if it's a new version. Only
+        the last few versions are compared, so a profile that flips back
+        and forth may be kept more than once."""
+        self.copies += 1
+        versions = self.versions.setdefault(user.get('id_str') or user.get('id'), [])
+        users = self.users
+        for ix in reversed(versions[-versionsCompared:]) :
+            held = users[ix]
+            if held is user or held == user :
+                return ix
+        versions.append(len(users))
+        users.append(user)
+        return versions[-1]
+
+    def intern(self, user) :
+        """The shared copy of a user profile"""
+        return self.users[self.number(user)]
+
+    def add(self, number, user) :
+        """Add a profile under the number it was saved with"""
+        if number != len(self.users) :
+            raise ValueError('User {} is out of sequence'.format(number))
+        self.versions.setdefault(user.get('id_str') or user.get('id'), []).append(number)
+        self.users.append(user)
+
+
+class record(object) :
+    """A tweet with its common fields in slots and its user interned. Reads
+    like the tweet dict, and tweet() rebuilds the dict."""
+
+    __slots__ = slotFields + nestedFields + ('extra',)
+
+    def __init__(self, tweet, users=None) :
+        for field in slotFields :
+            setattr(self, field, tweet.get(field, missing))
+        if users is not None and isinstance(self.user, dict) :
+            self.user = users.intern(self.user)
+        for field in nestedFields :
+            nested = tweet.get(field, missing)
+            if isinstance(nested, dict) :
+                nested = record(nested, users)
+            setattr(self, field, nested)
+        self.extra = dict((x, y) for x, y in tweet.iteritems() if x not in _slotted)
+
+    def __getitem__(self, key) :
+        if key in _slotted :
+            value = getattr(self, key)
+            if value is missing :
+                raise KeyError(key)
+            return value
+        return self.extra[key]
+
+    def get(self, key, default=None) :
+        try :
+            return self[key]
+        except KeyError :
+            return default
+
+    def __contains__(self, key) :
+        if key in _slotted :
+            return getattr(self, key) is not missing
+        return key in self.extra
+
+    has_key = __contains__
+
+    def keys(self) :
+        return [x for x in slotFields + nestedFields if getattr(self, x) is not missing] + self.extra.keys()
+
+    def __iter__(self) :
+        return iter(self.keys())
+
+    def __len__(self) :
+        return len(self.keys())
+
+    def tweet(self) :
+        """The tweet as Twitter's JSON shape, equal to the dict it was made
+        from"""
+        tweet = dict(self.extra)
+        for field in slotFields :
+            value = getattr(self, field)
+            if value is not missing :
+                tweet[field] = value
+        for field in nestedFields :
+            value = getattr(self, field)
+            if value is not missing :
+                tweet[field] = value.tweet() if isinstance(value, record) else value
+        return tweet
+
+    def __eq__(self, other) :
+        if isinstance(other, record) :
+            other = other.tweet()
+        return self.tweet() == other
+
+    def __ne__(self, other) :
+        return not self == other
+
+    __hash__ = None
+
+    def __getstate__(self) :
+        return tuple(getattr(self, x) for x in record.__slots__)
+
+    def __setstate__(self, state) :
+        for field, value in zip(record.__slots__, state) :
+            setattr(self, field, value)
+
+    def __repr__(self) :
+        return 'record({!r})'.format(self.tweet())
+
+
+def plain(tweet) :
+    """A tweet as a dict, whether it's a record or already a dict"""
+    return tweet.tweet() if isinstance(tweet, record) else tweet
+
+
+def internTweets(tweets, users=None) :
+    """Generate records of a stream of tweets, their users interned in a
+    table shared by all of them. Records pass through as they are."""
+    users = users if users is not None else userTable()
+    records = (x if isinstance(x, record) else record(x, users) for x in tweets)
+    return tweetProfile.current.timed('load', records)
+
+
+def savedTweet(tweet, users) :
+    """A tweet as saved in .ijsonl, with its users (and those of its nested
+    tweets) replaced by their numbers. Also returns the numbers of the
+    users that are new to the table, which have to be saved first."""
+    start = len(users)
+    saved = _numbered(plain(tweet), users)
+    return saved, range(start, len(users))
+
+
+def _numbered(tweet, users) :
+    saved = dict(tweet)
+    if isinstance(tweet.get('user'), dict) :
+        saved['user'] = users.number(tweet['user'])
+    for field in nestedFields :
+        if isinstance(tweet.get(field), dict) :
+            saved[field] = _numbered(tweet[field], users)
+    return saved
+
+
+def loadedTweet(saved, users) :
+    """The record of a tweet read from .ijsonl, looking its users up in the
+    table of the users read so far (or any sequence of them by number)"""
+    _resolve(saved, users.users if isinstance(users, userTable) else users)
+    return record(saved)
+
+
+def _resolve(tweet, table) :
+    if isinstance(tweet.get('user'), (int, long)) :
+        tweet['user'] = table[tweet['user']]
+    for field in nestedFields :
+        if isinstance(tweet.get(field), dict) :
+            _resolve(tweet[field], table)
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+# ******************************************************************************
+#   Sorting and merging of tweet streams by ID in bounded memory.
+#
+#   mergeSorted does a heap-based k-way merge of streams that are already in
+#   ID order, holding one tweet per stream. Streams that aren't in order are
+#   sorted externally: they're read in runs of runSize tweets, each run is
+#   sorted in memory and spilled to a temporary JSON Lines file, and the runs
+#   are then merged. If there are more runs than can be merged at once, they
+#   are merged in passes. orderedTweets finds which a stream needs from its
+#   first run as it streams: a stream in order passes straight through, one
+#   in the opposite order is reversed a run at a time, and any other is
+#   sorted in runs.
+#
+#   Descending order (newest first) matches the order of search results and
+#   the default of the other tools.
+#
+#   18 Oct 2026
+#
+# ******************************************************************************
+
+import os
+import heapq
+import itertools
+import tempfile
+import shutil
+import tweetStore
+import tweetProfile
+
+
+# Tweets sorted in memory for each spilled run
+runSize = 50000
+
+# Most runs merged at once, keeping open files well within system limits
+fanIn = 200
+
+
+class outOfOrder(Exception) :
+    """Raised by ordered when a stream's IDs go the wrong way"""
+    pass
+
+
+def ordered(tweets, descending=True, name=None, last=None) :
+    """Pass tweets through, raising outOfOrder if an ID goes the wrong way
+    (from last, the ID of the tweet before them, if given)"""
+    for tweet in tweets :
+        id = tweet['id']
+        if last is not None and (id > last if descending else id < last) :
+            raise outOfOrder(name)
+        last = id
+        yield tweet
+
+
+def inOrder(tweets, descending=True) :
+    """Whether a stream's IDs all go one way, reading it only as far as the
+    first that doesn't"""
+    last = None
+    for tweet in tweets :
+        id = tweet['id']
+        if last is not None and (id > last if descending else id < last) :
+            return False
+        last = id
+    return True
+
+
+def mergeSorted(streams, descending=True) :
+    """Generate the tweets of several ID-ordered streams in one ID order.
+    Ties go to the earlier stream."""
+
+    def decorate(tweets, index) :
+        for seq, tweet in enumerate(tweets) :
+            id = tweet['id']
+            yield (-id if descending else id), index, seq, tweet
+
+    decorated = [decorate(tweets, ix) for ix, tweets in enumerate(streams)]
+    merged = (item[3] for item in heapq.merge(*decorated))
+    return tweetProfile.current.timed('sort', merged)
+
+
+def dedupeAdjacent(tweets) :
+    """Drop tweets with the same ID as the one before, which for an ordered
+    stream removes every repeat while remembering only one ID"""
+    last = None
+    for tweet in tweets :
+        id = tweet['id']
+        if id != last :
+            last = id
+            yield tweet
+
+
+def spillRuns(tweets, tmpdir, descending=True, size=None) :
+    """Sort a stream in runs of size tweets, writing each to a JSON Lines
+    file in tmpdir. Returns the run filenames."""
+
+    size = size if size else runSize
+    runs = []
+    tweets = iter(tweets)
+    while True :
+        run = list(itertools.islice(tweets, size))
+        if not run :
+            break
+        run.sort(key=lambda x: x['id'], reverse=descending)
+        runs.append(_runFile(tmpdir, run))
+        del run
+    return runs
+
+
+def mergeRuns(runs, tmpdir, descending=True) :
+    """Generate the tweets of sorted run files in ID order, first merging
+    them in passes while there are more than fanIn"""
+
+    while len(runs) > fanIn :
+        merged = []
+        for ix in range(0, len(runs), fanIn) :
+            group = runs[ix:ix+fanIn]
+            merged.append(_runFile(tmpdir, mergeSorted(
+                [tweetStore.readTweets(x) for x in group], descending)))
+            for filename in group :
+                os.remove(filename)
+        runs = merged
+
+    return mergeSorted([tweetStore.readTweets(x) for x in runs], descending)
+
+
+def sortTweets(tweets, descending=True, size=None, tmpdir=None) :
+    """Generate a stream of tweets in ID order, holding at most one run in
+    memory. Streams shorter than a run are sorted without spilling."""
+    return tweetProfile.current.timed('sort', _sortTweets(tweets, descending, size, tmpdir))
+
+
+def _sortTweets(tweets, descending, size, tmpdir) :
+    size = size if size else runSize
+    tweets = iter(tweets)
+    first = list(itertools.islice(tweets, size))
+    first.sort(key=lambda x: x['id'], reverse=descending)
+    rest = list(itertools.islice(tweets, 1))
+    if not rest :
+        for tweet in first :
+            yield tweet
+        return
+
+    workdir = tempfile.mkdtemp(prefix='tweetsort', dir=tmpdir)
+    try :
+        runs = [_runFile(workdir, first)]
+        del first
+        runs.extend(spillRuns(itertools.chain(rest, tweets), workdir, descending, size))
+        for tweet in mergeRuns(runs, workdir, descending) :
+            yield tweet
+    finally :
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def orderedTweets(tweets, descending=True, size=None, tmpdir=None, name=None, notice=None) :
+    """Generate a stream's tweets in ID order, telling from its first run of
+    size tweets whether it's in order already, in the opposite order, or in
+    neither. A stream in order passes straight through; one in the opposite
+    order is reversed a run at a time and the runs read back last first; any
+    other is sorted by sortTweets. notice, if given, is called with the name
+    and 'reversed' or 'sorted' when a stream isn't in order. Raises
+    outOfOrder if a stream whose first run was in order turns out not to
+    be."""
+    return tweetProfile.current.timed('sort',
+        _orderedTweets(tweets, descending, size, tmpdir, name, notice))
+
+
+def _orderedTweets(tweets, descending, size, tmpdir, name, notice) :
+    size = size if size else runSize
+    tweets = iter(tweets)
+    first = list(itertools.islice(tweets, size))
+    if inOrder(first, descending) :
+        for tweet in first :
+            yield tweet
+        last = first[-1]['id'] if first else None
+        del first
+        for tweet in ordered(tweets, descending, name, last) :
+            yield tweet
+        return
+
+    if not inOrder(first, not descending) :
+        if notice :
+            notice(name, 'sorted')
+        for tweet in _sortTweets(itertools.chain(first, tweets), descending, size, tmpdir) :
+            yield tweet
+        return
+
+    if notice :
+        notice(name, 'reversed')
+    rest = list(itertools.islice(tweets, 1))
+    first.reverse()
+    if not rest :
+        for tweet in first :
+            yield tweet
+        return
+
+    # Each run is reversed as it's spilled. While every run carries on the
+    # opposite order from the one before, the runs read back last first are
+    # in order; a run that doesn't turns the rest into a sort of the runs.
+    workdir = tempfile.mkdtemp(prefix='tweetsort', dir=tmpdir)
+    try :
+        runs = [_runFile(workdir, first)]
+        edge = first[0]
+        del first
+        tweets = itertools.chain(rest, tweets)
+        while True :
+            run = list(itertools.islice(tweets, size))
+            if not run :
+                break
+            if not inOrder(itertools.chain([edge], run), not descending) :
+                run.sort(key=lambda x: x['id'], reverse=descending)
+                runs.append(_runFile(workdir, run))
+                del run
+                runs.extend(spillRuns(tweets, workdir, descending, size))
+                for tweet in mergeRuns(runs, workdir, descending) :
+                    yield tweet
+                return
+            edge = run[-1]
+            run.reverse()
+            runs.append(_runFile(workdir, run))
+            del run
+        for filename in reversed(runs) :
+            for tweet in tweetStore.readTweets(filename) :
+                yield tweet
+    finally :
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+_runCount = itertools.count()
+
+
+def _runFile(tmpdir, tweets) :
+    filename = os.path.join(tmpdir, 'run{:06d}.jsonl'.format(next(_runCount)))
+    tweetStore.writeTweets(filename, tweets)
+    return filename
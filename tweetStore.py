@@ -0,0 +1,590 @@
+# -*- coding: utf-8 -*-
+# ******************************************************************************
+#   Shared reading and writing of tweet archives for all of the tools. Tweets
+#   are read as a generator and written one at a time, so a tool can pass an
+#   archive through in roughly constant memory rather than loading it as one
+#   big list.
+#
+#   The archive format is chosen from the filename extension:
+#
+#       .jsonl    JSON Lines, one compact tweet per line (streamed both ways)
+#       .ijsonl   Interned JSON Lines: each user profile is written once and
+#                 the tweets refer to it by number (see tweetRecord). Tweets
+#                 are read as records sharing their users.
+#       .json     A JSON array of tweets as written by the older tools. It is
+#                 written with the same indent=4 layout, or compactly with a
+#                 tweet per line, and read incrementally.
+#       .pickle   A pickled Python list of tweets, by default in the highest
+#                 protocol. It is written incrementally and can still be read
+#                 with a plain pickle.load, but reading has to unpickle the
+#                 whole list before the first tweet.
+#       .db       An indexed SQLite archive (see tweetArchive). Tweets are
+#       .sqlite   read in descending ID order, and writing skips any tweet
+#                 whose ID is already there.
+#
+#   Any of the file formats can be compressed by adding .gz, .bz2 or .xz
+#   (.lzma) to the name, e.g. capture.jsonl.gz, and is compressed and
+#   decompressed as it streams. JSON is read and written with the fastest
+#   JSON library installed (see jsonBackend).
+#
+#   An archive in ID order, as captures and merges are written, can be read
+#   for just a time range with readRange: a JSON Lines file is searched by
+#   seeking to the middle of the file and reading the ID of the next line,
+#   and any other format (or a compressed file) is read until it passes the
+#   end of the range.
+#
+#   Typical use:
+#
+#       with tweetStore.tweetWriter('out.jsonl') as out :
+#           for tweet in tweetStore.readTweets('in.json') :
+#               out.write(tweet)
+#
+#   18 Oct 2026
+#
+# ******************************************************************************
+
+import os
+import codecs
+import pickle
+import cPickle
+import gzip
+import bz2
+import gc
+import itertools
+import simplejson as json
+import jsonBackend
+import tweetArchive
+import tweetTime
+import tweetRecord
+import tweetColumns
+import tweetProfile
+
+try :
+    import lzma
+except ImportError :
+    try :
+        from backports import lzma
+    except ImportError :
+        lzma = None
+
+
+# Recognized archive extensions and their formats
+formats = {'.jsonl' : 'jsonl', '.ijsonl' : 'ijsonl', '.json' : 'json',
+           '.pickle' : 'pickle', '.db' : 'sqlite', '.sqlite' : 'sqlite'}
+
+# Compressions, by the extension added after the format's
+compressions = {'.gz' : 'gzip', '.bz2' : 'bz2', '.xz' : 'lzma', '.lzma' : 'lzma'}
+
+# gzip level, near the size of level 9 in much less time
+gzipLevel = 6
+
+# Size of the reads used while scanning a JSON array
+chunkSize = 1 << 16
+
+# Number of tweets pickled between memo resets in a streamed pickle
+pickleBatch = 1000
+
+# Pickle protocol written unless another is asked for
+pickleProtocol = pickle.HIGHEST_PROTOCOL
+
+
+def splitCompression(filename) :
+    """The filename without its compression extension, and the compression
+    (None if it hasn't one)"""
+    root, ext = os.path.splitext(filename)
+    if ext.lower() in compressions :
+        return root, compressions[ext.lower()]
+    return filename, None
+
+
+def formatOf(filename) :
+    """Return the archive format for a filename, raising ValueError with
+    the offending extension if it isn't one of the known formats"""
+    name, compression = splitCompression(filename)
+    ext = os.path.splitext(name)[1].lower()
+    if ext not in formats or (compression and formats[ext] == 'sqlite') :
+        raise ValueError(os.path.splitext(filename)[1] if compression else ext)
+    return formats[ext]
+
+
+def extensionOf(filename) :
+    """The archive extension of a filename along with any compression
+    extension, e.g. .jsonl.gz"""
+    name = splitCompression(filename)[0]
+    return os.path.splitext(name)[1] + filename[len(name):]
+
+
+def openArchive(filename, mode='rb') :
+    """Open an archive file for binary reading, writing or appending,
+    through its compression if it has one"""
+    compression = splitCompression(filename)[1]
+    if compression == 'gzip' :
+        return gzip.open(filename, mode, gzipLevel)
+    elif compression == 'bz2' :
+        return bz2.BZ2File(filename, mode)
+    elif compression == 'lzma' :
+        if lzma is None :
+            raise ValueError('{} (needs the lzma module)'.format(os.path.splitext(filename)[1]))
+        fmt = lzma.FORMAT_XZ if filename.lower().endswith('.xz') else lzma.FORMAT_ALONE
+        return lzma.open(filename, mode, format=lzma.FORMAT_AUTO if 'r' in mode else fmt)
+    return open(filename, mode)
+
+
+def _lines(inp) :
+    """Lines of a binary file, read in large blocks, which is much faster
+    than readline through a decompressor"""
+    rest = b''
+    while True :
+        block = inp.read(chunkSize)
+        if not block :
+            break
+        lines = (rest + block).split(b'\n')
+        rest = lines.pop()
+        for line in lines :
+            yield line
+    if rest :
+        yield rest
+
+
+def readTweets(filename) :
+    """Generate the tweets in an archive file one at a time"""
+    fmt = formatOf(filename)
+    if fmt == 'jsonl' :
+        tweets = _readJSONLines(filename)
+    elif fmt == 'ijsonl' :
+        tweets = _readInterned(filename)
+    elif fmt == 'json' :
+        tweets = _readJSONArray(filename)
+    elif fmt == 'sqlite' :
+        tweets = tweetArchive.readArchive(filename)
+    else :
+        tweets = _readPickle(filename)
+    return tweetProfile.current.timed('load', tweets)
+
+
+def selectTweets(filename, descending=True, sort=False, limit=None, ordered=False,
+    intern=False, columns=False, **query) :
+    """Generate the tweets in an archive file that match a query (see
+    tweetArchive.archive.select). An SQLite archive answers from its indexes,
+    always in ID order; other files are filtered as they stream, after
+    reading only the time range of the query if they're ordered by ID. With
+    columns, a JSON Lines archive is selected and sorted from its columnar
+    sidecar, built or brought up to date first, and only the tweets chosen
+    are read (see tweetColumns). With intern, the tweets are records
+    sharing their users (see tweetRecord), which keeps tweets held for
+    sorting small."""
+    if formatOf(filename) == 'sqlite' :
+        tweets = tweetArchive.readArchive(filename, descending, limit=limit, **query)
+        tweets = tweetProfile.current.timed('load', tweets)
+        return tweetRecord.internTweets(tweets) if intern else tweets
+    if columns and hasColumns(filename) :
+        tweets = tweetColumns.openColumns(filename).selectTweets(descending, sort, limit, **query)
+        tweets = tweetProfile.current.timed('load', tweets)
+        return tweetRecord.internTweets(tweets) if intern else tweets
+    if ordered :
+        tweets = readRange(filename, query.get('since'), query.get('until'))
+    else :
+        tweets = readTweets(filename)
+    if intern :
+        tweets = tweetRecord.internTweets(tweets)
+    return selectStream(tweets, descending, sort, limit, **query)
+
+
+def hasColumns(filename) :
+    """Whether an archive can have a columnar sidecar: uncompressed JSON
+    Lines"""
+    return formatOf(filename) in ('jsonl', 'ijsonl') and not splitCompression(filename)[1]
+
+
+def selectStream(tweets, descending=True, sort=False, limit=None, ordered=False, **query) :
+    """Apply a query to a stream of tweets, sorting them by ID first if
+    asked so that the limit keeps the same tweets an archive would. A stream
+    that's ordered by ID is read only until it passes the time range."""
+    if ordered :
+        tweets = _idRange(tweets, *tweetTime.idBounds(query.get('since'), query.get('until')))
+    if any(x is not None for x in query.values()) :
+        tweets = itertools.ifilter(tweetArchive.matcher(**query), tweets)
+        tweets = tweetProfile.current.timed('transform', tweets)
+    if sort :
+        with tweetProfile.current.phase('sort') :
+            tweets = sorted(tweets, key=lambda x: x['id'], reverse=descending)
+    if limit :
+        tweets = itertools.islice(tweets, limit)
+    return tweets
+
+
+def _readJSONLines(filename) :
+    loads = jsonBackend.current.loads
+    with openArchive(filename) as inp :
+        for line in _lines(inp) :
+            if line.strip() :
+                yield loads(line)
+
+
+def _readInterned(filename) :
+    """Records of the tweets in an interned JSON Lines file, their users
+    shared from the profiles saved ahead of them"""
+    users = tweetRecord.userTable()
+    loads = jsonBackend.current.loads
+    with openArchive(filename) as inp :
+        for line in _lines(inp) :
+            if not line.strip() :
+                continue
+            item = loads(line)
+            if isinstance(item, list) :
+                users.add(*item)
+            else :
+                yield tweetRecord.loadedTweet(item, users)
+
+
+def readRange(filename, since=None, until=None) :
+    """Generate the tweets of an archive in ID order, either way, from the
+    first that could have been posted at or after since up to the last that
+    could have been posted before until. The range is found from the IDs,
+    so a few tweets either side of it may be included when a bound is
+    before Snowflake IDs; select the tweets to drop those."""
+    low, high = tweetTime.idBounds(since, until)
+    if (formatOf(filename) != 'jsonl' or splitCompression(filename)[1]
+        or (low is None and high is None)) :
+        return _idRange(readTweets(filename), low, high)
+    return tweetProfile.current.timed('load', _readJSONLinesRange(filename, low, high))
+
+
+def _idRange(tweets, low, high) :
+    """Pass the tweets of an ID-ordered stream with IDs in [low, high),
+    stopping once the stream has gone past the range"""
+    if low is None and high is None :
+        for tweet in tweets :
+            yield tweet
+        return
+
+    first = None
+    descending = None
+    for tweet in tweets :
+        id = tweet['id']
+        if descending is None :
+            if first is None :
+                first = id
+            elif id != first :
+                descending = id < first
+        if low is not None and id < low :
+            if descending :
+                return
+            continue
+        if high is not None and id >= high :
+            if descending is False :
+                return
+            continue
+        yield tweet
+
+
+def _lineID(inp, pos) :
+    """Offset and ID of the first whole line starting after pos (or at 0),
+    with None for the ID at the end of the file"""
+    inp.seek(pos)
+    if pos :
+        inp.readline()
+    while True :
+        start = inp.tell()
+        line = inp.readline()
+        if not line :
+            return start, None
+        if line.strip() :
+            return start, jsonBackend.loads(line)['id']
+
+
+def _lastID(inp, size) :
+    """ID on the last line of a file of JSON Lines"""
+    block = chunkSize
+    while True :
+        inp.seek(max(0, size - block))
+        lines = [x for x in inp.read().split(b'\n') if x.strip()]
+        if len(lines) > 1 or block >= size :
+            return jsonBackend.loads(lines[-1])['id'] if lines else None
+        block *= 4
+
+
+def _readJSONLinesRange(filename, low, high) :
+    """Binary search an ID-ordered JSON Lines file for the first line in
+    [low, high), then read lines until the range ends"""
+
+    with open(filename, 'rb') as inp :
+        inp.seek(0, os.SEEK_END)
+        size = inp.tell()
+        first = _lineID(inp, 0)[1]
+        descending = first is not None and _lastID(inp, size) < first
+
+        # The lines from the start of the range on are those whose IDs have
+        # reached its near end, low going up or high going down.
+        if descending :
+            reached = lambda x: x is None or (high is None or x < high)
+            passed  = lambda x: low is not None and x < low
+        else :
+            reached = lambda x: x is None or (low is None or x >= low)
+            passed  = lambda x: high is not None and x >= high
+
+        lo, hi = 0, size
+        while lo < hi :
+            mid = (lo + hi) // 2
+            if reached(_lineID(inp, mid)[1]) :
+                hi = mid
+            else :
+                lo = mid + 1
+        inp.seek(_lineID(inp, lo)[0])
+
+        for line in inp :
+            if not line.strip() :
+                continue
+            tweet = jsonBackend.loads(line)
+            if passed(tweet['id']) :
+                return
+            yield tweet
+
+
+def _readJSONArray(filename) :
+    """Scan a JSON array of tweets, decoding one element at a time from a
+    sliding buffer so the whole array is never held in memory"""
+
+    decoder = json.JSONDecoder()
+    with codecs.getreader('utf-8')(openArchive(filename)) as inp :
+        buf = inp.read(chunkSize)
+        pos = _skipSpace(buf, 0)
+        if buf[pos:pos+1] != u'[' :
+            raise ValueError('{} does not hold a JSON array'.format(filename))
+        pos += 1
+        eof = False
+
+        while True :
+
+            # Skip the separator before the next element, refilling the
+            # buffer if it runs out partway through the whitespace.
+            pos = _skipSpace(buf, pos)
+            while pos < len(buf) and buf[pos] == u',' :
+                pos = _skipSpace(buf, pos + 1)
+            if pos >= len(buf) :
+                if eof :
+                    raise ValueError('{}: unterminated JSON array'.format(filename))
+                buf, pos = buf[pos:] + inp.read(chunkSize), 0
+                eof = len(buf) == 0
+                continue
+            if buf[pos] == u']' :
+                return
+
+            # Decode the next element. A failure with more input left just
+            # means the element straddles the end of the buffer.
+            try :
+                tweet, end = decoder.raw_decode(buf, pos)
+            except ValueError :
+                if eof :
+                    raise
+                more = inp.read(chunkSize)
+                eof = len(more) == 0
+                buf, pos = buf[pos:] + more, 0
+                continue
+
+            yield tweet
+            pos = end
+            if pos > chunkSize :
+                buf, pos = buf[pos:], 0
+
+
+def _skipSpace(buf, pos) :
+    while pos < len(buf) and buf[pos] in u' \t\r\n' :
+        pos += 1
+    return pos
+
+
+def _readPickle(filename) :
+    # The unpickler reads a few bytes at a time, which is slow through a
+    # decompressor, so a compressed pickle is decompressed in one piece.
+    # Unpickling makes millions of containers at once, which the cyclic
+    # garbage collector would otherwise scan over and over.
+    enabled = gc.isenabled()
+    gc.disable()
+    try :
+        with openArchive(filename) as inp :
+            if splitCompression(filename)[1] :
+                tweets = cPickle.loads(inp.read())
+            else :
+                tweets = cPickle.load(inp)
+    finally :
+        if enabled :
+            gc.enable()
+    for tweet in tweets :
+        yield tweet
+
+
+class tweetWriter(object) :
+    """Write tweets one at a time to an archive file. The count attribute
+    holds the number of tweets written so far. Only JSON Lines (plain or
+    gzipped) and SQLite archives can be opened to append to what they
+    already hold. Records are written as the tweets they hold. A compact
+    .json archive has a tweet per line rather than the indent=4 layout.
+    The pickle protocol defaults to pickleProtocol."""
+
+    def __init__(self, filename, protocol=None, append=False, compact=False) :
+        self.filename = filename
+        self.format = formatOf(filename)
+        self.compact = compact
+        self.dumps = jsonBackend.current.dumps
+        self.count = 0
+        if self.format == 'sqlite' :
+            self.out = tweetArchive.archive(filename, fresh=not append)
+        elif append :
+            if self.format != 'jsonl' or splitCompression(filename)[1] not in (None, 'gzip') :
+                raise ValueError('Only .jsonl, .jsonl.gz and .db archives can be appended to')
+            self.out = codecs.getwriter('utf-8')(openArchive(filename, 'ab'))
+        elif self.format == 'pickle' :
+            self.out = openArchive(filename, 'wb')
+            self.pickler = _listPickler(self.out, protocol)
+        elif self.format == 'ijsonl' :
+            self.out = codecs.getwriter('utf-8')(openArchive(filename, 'wb'))
+            self.users = tweetRecord.userTable()
+        else :
+            self.out = codecs.getwriter('utf-8')(openArchive(filename, 'wb'))
+            if self.format == 'json' :
+                self.out.write('[')
+        self.write = tweetProfile.current.function('write', self.write)
+
+    def write(self, tweet) :
+        """Append a single tweet to the archive"""
+        if self.format == 'ijsonl' :
+            saved, added = tweetRecord.savedTweet(tweet, self.users)
+            for number in added :
+                self.out.write(self.dumps([number, self.users.users[number]]) + u'\n')
+            self.out.write(self.dumps(saved) + u'\n')
+            self.count += 1
+            return
+        tweet = tweetRecord.plain(tweet)
+        if self.format == 'jsonl' :
+            self.out.write(self.dumps(tweet) + u'\n')
+        elif self.format == 'json' and self.compact :
+            self.out.write(u'\n' if self.count == 0 else u',\n')
+            self.out.write(self.dumps(tweet))
+        elif self.format == 'json' :
+            # Match the layout of json.dump(tweets, out, indent=4)
+            text = json.dumps(tweet, indent=4)
+            self.out.write('\n    ' if self.count == 0 else ',\n    ')
+            self.out.write(text.replace('\n', '\n    '))
+        elif self.format == 'sqlite' :
+            self.out.add(tweet)
+        else :
+            self.pickler.append(tweet)
+        self.count += 1
+
+    def writeAll(self, tweets) :
+        """Append every tweet from an iterable, returning the new count"""
+        for tweet in tweets :
+            self.write(tweet)
+        return self.count
+
+    def close(self) :
+        """Finish and close the archive file"""
+        if self.out is None :
+            return
+        if self.format == 'json' :
+            self.out.write('\n]' if self.count else ']')
+        elif self.format == 'pickle' :
+            self.pickler.finish()
+        self.out.close()
+        self.out = None
+
+    def __enter__(self) :
+        return self
+
+    def __exit__(self, *exc) :
+        self.close()
+        return False
+
+
+def writeTweets(filename, tweets, protocol=None, compact=False) :
+    """Write an iterable of tweets to an archive file, returning the count"""
+    with tweetWriter(filename, protocol, compact=compact) as out :
+        return out.writeAll(tweets)
+
+
+def dedupe(tweets) :
+    """Generate the tweets whose IDs haven't been seen earlier in the stream.
+    Only the IDs are kept."""
+    return tweetProfile.current.timed('transform', _dedupe(tweets))
+
+
+def _dedupe(tweets) :
+    ids = set()
+    for tweet in tweets :
+        id = tweet['id']
+        if id not in ids :
+            ids.add(id)
+            yield tweet
+
+
+def writeTweetFiles(filenames, tweets, protocol=None, compact=False) :
+    """Write one stream of tweets to several archive files in the same pass,
+    returning the count"""
+    writers = []
+    try :
+        for filename in filenames :
+            writers.append(tweetWriter(filename, protocol, compact=compact))
+        total = 0
+        for tweet in tweets :
+            for out in writers :
+                out.write(tweet)
+            total += 1
+    finally :
+        for out in writers :
+            out.close()
+    return total
+
+
+class counter(object) :
+    """Iterator wrapper that counts the tweets passing through it and notes
+    the highest tweet ID seen"""
+
+    def __init__(self, tweets) :
+        self.tweets = iter(tweets)
+        self.count = 0
+        self.maxID = None
+
+    def __iter__(self) :
+        return self
+
+    def next(self) :
+        tweet = next(self.tweets)
+        self.count += 1
+        self.maxID = max(self.maxID, tweet['id'])
+        return tweet
+
+    __next__ = next
+
+
+class _listPickler(object) :
+    """Pickle a list one element at a time. The elements are pickled by
+    cPickle in batches, each with a memo of its own so that memory doesn't
+    grow with the archive, and the opcodes of each batch are appended to
+    the one list; the result still loads with pickle.load as an ordinary
+    list."""
+
+    def __init__(self, out, protocol=None) :
+        self.out = out
+        self.protocol = pickleProtocol if protocol is None or protocol < 0 else protocol
+
+        # Every pickled list starts the same way, up to its first element
+        head = cPickle.dumps([None], self.protocol)
+        self.head = head[:-len(pickle.NONE + pickle.APPEND + pickle.STOP)]
+        self.out.write(self.head)
+        self.pending = []
+
+    def append(self, tweet) :
+        self.pending.append(tweet)
+        if len(self.pending) >= pickleBatch :
+            self._flush()
+
+    def _flush(self) :
+        if self.pending :
+            data = cPickle.dumps(self.pending, self.protocol)
+            self.out.write(data[len(self.head):-len(pickle.STOP)])
+        self.pending = []
+
+    def finish(self) :
+        self._flush()
+        self.out.write(pickle.STOP)
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+# ******************************************************************************
+#   Tweet times without parsing created_at.
+#
+#   Since November 2010 tweet IDs have been Twitter "Snowflake" IDs, whose
+#   high bits are the milliseconds since Twitter's epoch when the tweet was
+#   made. The time of a tweet is read straight from its ID, and a time turns
+#   into the lowest ID that could have been made then, so a time range is an
+#   ID range: a primary-key range in an SQLite archive, a binary search in a
+#   sorted file, and since_id for a search. Older IDs fall back to created_at,
+#   read by a fixed-layout parser with a cache, as tweets posted in the same
+#   second share the same text.
+#
+#   Times given on the command line are read in a time zone: UTC by default,
+#   "local", a fixed offset such as +05:30 or -0700, or, with pytz installed,
+#   a named zone such as America/Los_Angeles.
+#
+#   18 Oct 2026
+#
+# ******************************************************************************
+
+import re
+import time
+import calendar
+import datetime
+
+try :
+    import pytz
+except ImportError :
+    pytz = None
+
+
+# Milliseconds since the Unix epoch of Twitter's Snowflake epoch
+twitterEpoch = 1288834974657
+
+# Bits below the timestamp in a Snowflake ID (worker, datacenter, sequence)
+timestampShift = 22
+
+# Highest of the sequential IDs used before Snowflake
+lastSequentialID = 29700859247
+
+# Layouts accepted for the --since and --until options
+timeFormats = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M',
+    '%Y-%m-%dT%H:%M', '%Y-%m-%d')
+
+# Month numbers by the abbreviations in created_at
+months = dict((x, ix + 1) for ix, x in enumerate(
+    ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')))
+
+# created_at texts remembered by createdTime
+cacheSize = 10000
+
+re_offset = re.compile(r'^([+-])(\d\d):?(\d\d)$')
+
+_created = {}
+
+
+def isSnowflake(id) :
+    return id > lastSequentialID
+
+
+def idTime(id) :
+    """Seconds since the epoch, with milliseconds, when a Snowflake ID was
+    made"""
+    return ((id >> timestampShift) + twitterEpoch) / 1000.0
+
+
+def timeID(seconds) :
+    """The lowest Snowflake ID made at or after a time in seconds since the
+    epoch, so the tweets made in [since, until) have IDs in [timeID(since),
+    timeID(until))"""
+    millis = int(round(seconds * 1000)) - twitterEpoch
+    return max(millis, 0) << timestampShift
+
+
+def createdTime(created) :
+    """Seconds since the epoch of a created_at text, e.g. "Sun Oct 18
+    14:02:11 +0000 2015", read by position and remembered"""
+    seconds = _created.get(created)
+    if seconds is None :
+        try :
+            seconds = calendar.timegm((int(created[-4:]), months[created[4:7]],
+                int(created[8:10]), int(created[11:13]), int(created[14:16]),
+                int(created[17:19]), 0, 0, 0))
+        except (KeyError, ValueError) :
+            seconds = calendar.timegm(time.strptime(created, '%a %b %d %H:%M:%S +0000 %Y'))
+        if len(_created) >= cacheSize :
+            _created.clear()
+        _created[created] = seconds
+    return seconds
+
+
+def hourOf(created) :
+    """The UTC hour of a created_at text as YYYY-MM-DD HH, which sorts in
+    time order, read by position without working out the time"""
+    return u'{}-{:02d}-{} {}'.format(created[-4:], months[created[4:7]], created[8:10], created[11:13])
+
+
+def tweetTime(tweet) :
+    """Whole seconds since the epoch when a tweet was posted, as in its
+    created_at, read from its ID when that's a Snowflake ID"""
+    id = tweet['id']
+    if id > lastSequentialID :
+        return ((id >> timestampShift) + twitterEpoch) // 1000
+    return createdTime(tweet['created_at'])
+
+
+def zoneOffset(zone, when) :
+    """Seconds east of UTC of a time zone at a naive local datetime, raising
+    ValueError for a zone that isn't known"""
+
+    if not zone or zone.upper() in ('UTC', 'GMT', 'Z') :
+        return 0
+    match = re_offset.match(zone)
+    if match :
+        offset = 3600 * int(match.group(2)) + 60 * int(match.group(3))
+        return -offset if match.group(1) == '-' else offset
+    if zone.lower() == 'local' :
+        local = time.mktime(when.timetuple()[:8] + (-1,))
+        return calendar.timegm(when.timetuple()) - int(local)
+    if pytz is None :
+        raise ValueError('Unknown time zone {} (named zones need pytz)'.format(zone))
+    try :
+        tz = pytz.timezone(zone)
+    except pytz.UnknownTimeZoneError :
+        raise ValueError('Unknown time zone {}'.format(zone))
+    return int(tz.utcoffset(when, is_dst=False).total_seconds())
+
+
+def parseTime(text, zone=None) :
+    """Seconds since the epoch for a date and time given on the command line
+    in a time zone (UTC by default), raising ValueError if it's in none of
+    the timeFormats"""
+    for fmt in timeFormats :
+        try :
+            when = datetime.datetime.strptime(text, fmt)
+        except ValueError :
+            continue
+        return calendar.timegm(when.timetuple()) - zoneOffset(zone, when)
+    raise ValueError('Unrecognized time {}'.format(text))
+
+
+def idBound(seconds) :
+    """timeID of a time, or None if the time is open or before Snowflake IDs
+    so that the ID can't stand for it"""
+    if seconds is None :
+        return None
+    id = timeID(seconds)
+    return id if id > lastSequentialID else None
+
+
+def idBounds(since=None, until=None) :
+    """The ID range [low, high) of the tweets made in [since, until), with
+    None for an end that's open or has to be found from created_at"""
+    return idBound(since), idBound(until)
@@ -0,0 +1,369 @@
+# -*- coding: utf-8 -*-
+# *****************************************************************************
+#   This routine counts the words, word pairs (bigrams) and hashtags in the
+#   text of an archive of tweets, overall and by hour, and writes the most
+#   frequent of each along with a table of how the top words rise and fall
+#   through the hours of an event.
+#
+#   URLs, mentions, the RT of manual retweets and common English stop-words
+#   are dropped from the words. The archive is read as a stream and handed
+#   out in chunks to a pool of processes, each of which returns partial
+#   counts for its chunk that are merged as they come back.
+#
+#   With --counts, the merged counts are saved to a JSON file along with the
+#   IDs of the tweets counted, packed in a sorted array. Run again with the
+#   same file on a later capture, another hashtag's capture or a merge that
+#   fills a gap, and only the tweets not counted before are counted and
+#   added to it, so the counts for a whole event build up without
+#   recounting. The tweets skipped as counted before are reported.
+#
+#   Simplest usage: python wordFrequency.py INPUT-FILENAME
+#
+#   options:
+#       -h | --help      Print help information
+#       -c | --csv       CSV-FILENAME for the top words, bigrams and hashtags
+#       --hours          CSV-FILENAME for the hourly counts of the top words
+#       -k | --top       Number of each kind of term to list (default 25)
+#       --hourwords      Number of top words in the hourly table (default 10)
+#       --counts         COUNTS-FILENAME (.json) of partial counts to add to
+#                        and save
+#       --noretweets     Skip native retweets
+#       --stopwords      FILENAME of more stop-words, one per line
+#       --jobs           Number of counting processes (default one per CPU)
+#       --chunk          Tweets per chunk handed to a process (default 5000)
+#       --user, --since, --until, --tz, --match, --limit, --sorted, --columns
+#                        Select tweets by poster, time, text or count
+#       --profile, --cprofile
+#                        Save the time and memory of each phase as JSON, or
+#                        cProfile statistics (see tweetProfile.py)
+#
+#   Keith Eric Grant (keg@ramblemuse.com)
+#   18 Oct 2026
+#
+# *****************************************************************************
+
+import sys
+import os
+import argparse
+import array
+import base64
+import bisect
+import codecs
+import collections
+import heapq
+import io
+import itertools
+import multiprocessing
+import re
+import simplejson as json
+import zlib
+import tweetStore
+import tweetArchive
+import tweetTime
+import tweetProfile
+
+
+myName  = 'wordFrequency.py'
+version = '1.1.0'
+
+# Version of the saved counts, changed whenever tokenizing or what's saved
+# changes
+countsVersion = 2
+
+# Tweets counted per chunk
+chunkSize = 5000
+
+stopWords = set(u'''
+a about above after again against all am an and any are aren't as at be
+because been before being below between both but by can can't cannot could
+couldn't did didn't do does doesn't doing don't down during each few for from
+further had hadn't has hasn't have haven't having he he'd he'll he's her here
+here's hers herself him himself his how how's i i'd i'll i'm i've if in into
+is isn't it it's its itself let's me more most mustn't my myself no nor not of
+off on once only or other ought our ours ourselves out over own same shan't
+she she'd she'll she's should shouldn't so some such than that that's the
+their theirs them themselves then there there's these they they'd they'll
+they're they've this those through to too under until up very was wasn't we
+we'd we'll we're we've were weren't what what's when when's where where's
+which while who who's whom why why's will with won't would wouldn't you you'd
+you'll you're you've your yours yourself yourselves
+rt mt via amp just get got one also us now
+'''.split())
+
+re_url     = re.compile(r'(?:https?|ftp)://\S+', re.IGNORECASE)
+re_mention = re.compile(r'@\w+', re.UNICODE)
+re_hashtag = re.compile(r'#(\w+)', re.UNICODE)
+re_word    = re.compile(r"[^\W\d_](?:[\w']*\w)?", re.UNICODE)
+
+
+def tokenize(text, stop=None) :
+    """Split tweet text into its words and hashtags, lowercased, with URLs,
+    mentions and stop-words dropped"""
+    stop = stop if stop is not None else stopWords
+    text = text.replace(u'&amp;', u'&').replace(u'&lt;', u'<').replace(u'&gt;', u'>').lower()
+    text = re_mention.sub(u' ', re_url.sub(u' ', text))
+    hashtags = re_hashtag.findall(text)
+    text = re_hashtag.sub(u' ', text)
+    words = [x for x in re_word.findall(text) if x not in stop]
+    return words, hashtags
+
+
+def _idArray(ids=()) :
+    """A flat array of tweet IDs, or a list where longs are too short"""
+    packed = array.array('L')
+    if packed.itemsize < 8 :
+        return list(ids)
+    packed.extend(ids)
+    return packed
+
+
+def mergeIDs(saved, added) :
+    """The sorted IDs of saved and the IDs of added in one sorted array.
+    added is usually in ID order one way or the other, and then isn't
+    sorted."""
+    pairs = itertools.izip(added, itertools.islice(added, 1, None))
+    if all(x < y for x, y in pairs) :
+        run = added
+    else :
+        pairs = itertools.izip(added, itertools.islice(added, 1, None))
+        run = reversed(added) if all(x > y for x, y in pairs) else sorted(added)
+    return _idArray(heapq.merge(saved, run))
+
+
+class wordCounts(object) :
+    """Counts of words, bigrams and hashtags, overall and by hour, for some
+    tweets. Counts for separate sets of tweets combine with merge. The IDs
+    of the tweets counted are kept: saved, those of loaded counts in ID
+    order, and ids, those added since in the order they came."""
+
+    def __init__(self) :
+        self.tweets   = 0
+        self.maxID    = None
+        self.saved    = _idArray()
+        self.ids      = _idArray()
+        self.words    = collections.Counter()
+        self.bigrams  = collections.Counter()
+        self.hashtags = collections.Counter()
+        self.hours    = collections.defaultdict(collections.Counter)
+        self.perHour  = collections.Counter()
+
+    def add(self, id, text, created, stop=None) :
+        words, hashtags = tokenize(text, stop)
+        hour = tweetTime.hourOf(created)
+        self.tweets += 1
+        self.maxID = max(self.maxID, id)
+        self.ids.append(id)
+        self.words.update(words)
+        self.bigrams.update(u' '.join(x) for x in itertools.izip(words, words[1:]))
+        self.hashtags.update(hashtags)
+        self.hours[hour].update(words)
+        self.perHour[hour] += 1
+
+    def merge(self, other) :
+        self.tweets += other.tweets
+        self.maxID = max(self.maxID, other.maxID)
+        self.ids.extend(other.ids)
+        self.words.update(other.words)
+        self.bigrams.update(other.bigrams)
+        self.hashtags.update(other.hashtags)
+        for hour, counts in other.hours.iteritems() :
+            self.hours[hour].update(counts)
+        self.perHour.update(other.perHour)
+        return self
+
+    def counted(self, id) :
+        """True if the tweet with this ID is in the loaded counts"""
+        ix = bisect.bisect_left(self.saved, id)
+        return ix < len(self.saved) and self.saved[ix] == id
+
+    def save(self, filename) :
+        ids = mergeIDs(self.saved, self.ids)
+        if isinstance(ids, array.array) :
+            ids = base64.b64encode(zlib.compress(ids.tostring()))
+        state = {'version' : countsVersion, 'tweets' : self.tweets,
+                 'maxID' : self.maxID, 'ids' : ids, 'words' : self.words,
+                 'bigrams' : self.bigrams, 'hashtags' : self.hashtags,
+                 'hours' : self.hours, 'perHour' : self.perHour}
+        tmp = filename + '.part'
+        with open(tmp, 'wb') as out :
+            json.dump(state, out, separators=(',', ':'))
+        os.rename(tmp, filename)
+
+    @classmethod
+    def load(cls, filename) :
+        """Counts saved by save, raising ValueError if they were made by
+        another version of the tokenizer"""
+        with open(filename, 'rb') as inp :
+            state = json.load(inp)
+        if state.get('version') != countsVersion :
+            raise ValueError('{} holds counts from another version'.format(filename))
+        counts = cls()
+        counts.tweets = state['tweets']
+        counts.maxID = state['maxID']
+        ids = state['ids']
+        if isinstance(ids, list) :
+            counts.saved = _idArray(ids)
+        elif isinstance(counts.saved, list) :
+            raise ValueError('{} holds tweet IDs packed on another platform'.format(filename))
+        else :
+            counts.saved.fromstring(zlib.decompress(base64.b64decode(ids)))
+        counts.words.update(state['words'])
+        counts.bigrams.update(state['bigrams'])
+        counts.hashtags.update(state['hashtags'])
+        for hour, words in state['hours'].iteritems() :
+            counts.hours[hour].update(words)
+        counts.perHour.update(state['perHour'])
+        return counts
+
+
+def countChunk(job) :
+    """Counts for a chunk of (id, text, created_at) tuples. Runs in the pool
+    processes."""
+    items, stop = job
+    counts = wordCounts()
+    for id, text, created in items :
+        counts.add(id, text, created, stop)
+    return counts
+
+
+def countTweets(tweets, processes=None, size=None, stop=None) :
+    """Counts for a stream of tweets, chunked out to a pool of processes
+    with a few chunks queued for each"""
+
+    processes = processes if processes else multiprocessing.cpu_count()
+    size = size if size else chunkSize
+    pool = multiprocessing.Pool(processes) if processes > 1 else None
+    total = wordCounts()
+    queued = []
+
+    def submit(job) :
+        if pool is None :
+            total.merge(countChunk(job))
+            return
+        queued.append(pool.apply_async(countChunk, (job,)))
+        while len(queued) > 2 * processes :
+            total.merge(queued.pop(0).get())
+
+    try :
+        items = ((x['id'], x['text'], x['created_at']) for x in tweets)
+        while True :
+            chunk = list(itertools.islice(items, size))
+            if not chunk :
+                break
+            submit((chunk, stop))
+        while queued :
+            total.merge(queued.pop(0).get())
+    finally :
+        if pool :
+            pool.close()
+            pool.join()
+    return total
+
+
+def topTerms(counter, top) :
+    """The top terms of a counter with their counts, ties broken by term so
+    that the same counts always list the same way"""
+    return heapq.nsmallest(top, counter.iteritems(), key=lambda x: (-x[1], x[0]))
+
+
+def csvField(text) :
+    return u'"' + text.replace(u'"', u'""') + u'"'
+
+
+def writeTop(filename, counts, top) :
+    """CSV of the top words, bigrams and hashtags"""
+    with codecs.open(filename, mode='w', encoding='utf-8') as out :
+        out.write(u'Kind,Rank,Term,Count\n')
+        for kind, counter in (('word', counts.words), ('bigram', counts.bigrams),
+                              ('hashtag', counts.hashtags)) :
+            for rank, (term, count) in enumerate(topTerms(counter, top)) :
+                out.write(u'{},{},{},{}\n'.format(kind, rank + 1, csvField(term), count))
+
+
+def writeHours(filename, counts, top) :
+    """CSV with a row for each hour: its tweets and the counts of the top
+    words overall"""
+    words = [x for x, _ in topTerms(counts.words, top)]
+    with codecs.open(filename, mode='w', encoding='utf-8') as out :
+        out.write(u','.join([u'Hour', u'Tweets'] + [csvField(x) for x in words]) + u'\n')
+        for hour in sorted(counts.perHour) :
+            row = counts.hours[hour]
+            out.write(u','.join([hour, unicode(counts.perHour[hour])] +
+                [unicode(row[x]) for x in words]) + u'\n')
+
+
+def readStopWords(filename) :
+    with io.open(filename, 'r', encoding='utf-8') as inp :
+        return set(x.strip().lower() for x in inp if x.strip())
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+
+    parser = argparse.ArgumentParser(
+        prog=myName,
+        description='Count the words, bigrams and hashtags of tweets',
+        version=version)
+    parser.add_argument('inpfile', action='store', help='Input tweet filename (.json, .jsonl, .pickle or .db)')
+    parser.add_argument('--csv', '-c', action='store', dest='csv', help='CSV output file for the top terms')
+    parser.add_argument('--hours', action='store', dest='hours', help='CSV output file for the hourly counts of the top words')
+    parser.add_argument('--top', '-k', action='store', type=int, default=25, help='Number of each kind of term to list')
+    parser.add_argument('--hourwords', action='store', type=int, default=10, help='Number of top words in the hourly table')
+    parser.add_argument('--counts', action='store', dest='counts', help='JSON file of counts to add to and save')
+    parser.add_argument('--noretweets', action='store_true', default=False, help='Skip native retweets')
+    parser.add_argument('--stopwords', action='store', dest='stopwords', help='File of more stop-words, one per line')
+    parser.add_argument('--jobs', action='store', type=int, help='Counting processes (default: one per CPU)')
+    parser.add_argument('--chunk', action='store', type=int, default=chunkSize, help='Tweets per chunk')
+    tweetArchive.addQueryArguments(parser)
+    tweetProfile.addProfileArguments(parser)
+    args = parser.parse_args(argv[1:])
+    tweetProfile.start(myName, args)
+
+    try :
+        query = tweetArchive.queryArguments(args)
+        stop = stopWords | readStopWords(args.stopwords) if args.stopwords else stopWords
+        counts = wordCounts()
+        if args.counts and os.path.exists(args.counts) :
+            counts = wordCounts.load(args.counts)
+            print '{}: {} tweets counted up to ID {}'.format(args.counts, counts.tweets, counts.maxID)
+    except (ValueError, IOError) as err :
+        print err
+        return 1
+
+    try :
+        if args.noretweets :
+            query['retweets'] = False
+        inp = tweetStore.counter(tweetStore.selectTweets(args.inpfile, **query))
+    except ValueError as err :
+        print 'Unknown extension {}'.format(err)
+        return 1
+
+    # Tweets already in the saved counts are skipped
+    tweets = (x for x in inp if not counts.counted(x['id'])) if counts.saved else inp
+    with tweetProfile.current.phase('transform') :
+        added = countTweets(tweets, args.jobs, args.chunk, stop)
+        counts.merge(added)
+    print '{}: {} tweets, {} counted'.format(args.inpfile, inp.count, added.tweets)
+    if inp.count > added.tweets :
+        print '{} tweets skipped as counted before in {}'.format(inp.count - added.tweets, args.counts)
+
+    for title, counter in (('Words', counts.words), ('Bigrams', counts.bigrams),
+                           ('Hashtags', counts.hashtags)) :
+        print '\n{} ({} distinct)'.format(title, len(counter))
+        for term, count in topTerms(counter, args.top) :
+            print u'{:8d}  {}'.format(count, term).encode('utf-8')
+
+    if args.csv :
+        writeTop(args.csv, counts, args.top)
+        print '\nWrote the top terms to {}'.format(args.csv)
+    if args.hours :
+        writeHours(args.hours, counts, args.hourwords)
+        print 'Wrote {} hours to {}'.format(len(counts.perHour), args.hours)
+    if args.counts :
+        counts.save(args.counts)
+        print 'Saved the counts of {} tweets to {}'.format(counts.tweets, args.counts)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,8 +13,25 @@
 #       -c | --csv    CSV-FILENAME
 #       -s | --sort   Sort the tweets in descending tweet ID
 #       -a | --ascend Use ascending order if sort  is selected
+#       --user, --since, --until, --tz, --match, --limit, --sorted, --columns
+#                     Select tweets by poster, time, text or count
+#       --profile, --cprofile
+#                     Save the time and memory of each phase as JSON, or
+#                     cProfile statistics (see tweetProfile.py)
 #
 #   Keith Eric Grant (keg@ramblemuse.com)
+#   18 Oct 2026
+#       Stream tweets through tweetStore. Also accepts .jsonl files.
+#       Select tweets with the query options, read from the indexes of an
+#       SQLite (.db) archive.
+#       Split out csvRow and appendCSV so getConfHashtag can add rows to
+#       the CSV file as new tweets arrive.
+#       Read tweets as tweetRecord records sharing their users.
+#       --tz gives the zone of --since and --until, and --sorted finds them
+#       by binary search in an input already in ID order.
+#       --columns selects and sorts a .jsonl input from its columnar sidecar
+#       and reads only the tweets selected.
+#       --profile saves the time and memory of each phase.
 #   13 Mar 2015
 #
 # *****************************************************************************
@@ -22,15 +39,73 @@
 import sys
 import os
 import argparse
-import simplejson as json
 import codecs
-import pickle
 import re
+import tweetStore
+import tweetArchive
+import tweetProfile
 
 
 myName  = 'writeCSV.py'
 version = '1.0.0'
 
+re_crlf  = re.compile("\n|\r+")
+re_dquo  = re.compile(r'"')
+
+csvHeader = '%s,%s,%s,%s,%s,%s,%s\n' % ('Tweet ID', 'Screen Name', 'Name',
+    'Time-Stamp', 'Retweets', 'Favorites', 'Text')
+
+
+def csvRow(tweet) :
+    """Return the CSV line for a tweet"""
+
+    id     = tweet['id_str']
+    when   = tweet['created_at']
+
+    # User is a structure within a tweet that contains the poster's
+    # screen name and full name. Convert the name to a Unicode string,
+    # protect any internal double quotes, and enclose in double quotes
+    # to protect any internal commas.
+
+    user   = tweet['user']
+    name   = unicode(user['name'])
+    name   = re_dquo.sub(r'""', name)
+    name   = '"' + name + '"'
+    screen = user['screen_name']
+
+    # The retweet and favorite counts aren't always present, so
+    # they need a check and a default.
+    rts  = tweet['retweet_count']  if 'retweet_count'  in tweet else 0
+    favs = tweet['favorite_count'] if 'favorite_count' in tweet else 0
+
+    # Convert the text string to a Unicode string, protect any
+    # internal double quotes, remove any contained newlines,
+    # and enclose in double quotes to protect any internal commas.
+
+    text = unicode(tweet['text'])
+    text = re_dquo.sub(r'""', text)
+    text = re_crlf.sub(r' ', text)
+    text = '"' + text + '"'
+
+    return '%s,%s,%s,%s,%d,%d,%s\n' % (id, screen, name, when, rts, favs, text)
+
+
+def appendCSV(csvFilename, tweets) :
+    """Add the rows for some tweets to the end of a CSV file, starting the
+    file with its header line if it's new. Returns the number of rows added."""
+
+    count = 0
+    fresh = not os.path.exists(csvFilename) or os.path.getsize(csvFilename) == 0
+    row = tweetProfile.current.function('render', csvRow)
+    with codecs.open(csvFilename, mode='a', encoding='utf-8') as out :
+        out = tweetProfile.current.writer(out)
+        if fresh :
+            out.write(csvHeader)
+        for tweet in tweets :
+            out.write(row(tweet))
+            count += 1
+    return count
+
 
 def main(argv=None):
     if argv is None:
@@ -44,7 +119,10 @@ def main(argv=None):
     parser.add_argument('--csv', '-c', action='store', dest='csv', help='CSV output file name')
     parser.add_argument('--sort', '-s', action='store_true', dest='sort', default=False, help='Sort by decreasing ID')
     parser.add_argument('--ascend', '-a', action='store_true', dest='ascend', default=False, help='Use ascending sort')
+    tweetArchive.addQueryArguments(parser)
+    tweetProfile.addProfileArguments(parser)
     args = parser.parse_args(argv[1:])
+    tweetProfile.start(myName, args)
 
     inpfile  = args.inpfile
     sortem   = args.sort
@@ -52,63 +130,37 @@ def main(argv=None):
 
     csvFilename = args.csv if args.csv else 'tweets.csv'
 
-    # Load tweets from the input file, whether JSON or pickle.
-    ext = os.path.splitext(inpfile)[1].lower()
-    if ext == '.json' :
-        with codecs.open(inpfile, 'rb', 'utf-8') as inp :
-            tweets = json.load(inp)
-    elif ext == '.pickle' :
-        with open(inpfile, 'rb') as inp :
-            tweets = pickle.load(inp)
-    else :
-        print 'Unknown extension {}'.format(ext)
+    try :
+        query = tweetArchive.queryArguments(args)
+    except ValueError as err :
+        print err
         return 1
 
-    print '{}: {} tweets'.format(inpfile, len(tweets))
+    # Stream the selected tweets from the input file, whether JSON, JSON
+    # Lines, pickle or an SQLite archive, which returns them already sorted.
+    # They're read as records sharing their users, so tweets held for
+    # sorting or for a page take less memory.
+    try :
+        indexed = tweetStore.formatOf(inpfile) == 'sqlite'
+        tweets = inp = tweetStore.counter(tweetStore.selectTweets(inpfile, descSort,
+            sortem, intern=True, **query))
+    except ValueError as err :
+        print 'Unknown extension {}'.format(err)
+        return 1
 
-    if sortem :
+    if sortem and not indexed :
         print 'Sorting tweets'
-        tweets.sort(key=lambda x: x['id'], reverse=descSort)
 
 
     print 'Writing CSV file {}'.format(csvFilename)
-
-    re_crlf  = re.compile("\n|\r+")
-    re_dquo  = re.compile(r'"')
-
+    row = tweetProfile.current.function('render', csvRow)
     with codecs.open(csvFilename, mode='w', encoding='utf-8') as out :
-        out.write('%s,%s,%s,%s,%s,%s,%s\n' % ('Tweet ID', 'Screen Name', 'Name',
-           'Time-Stamp', 'Retweets', 'Favorites', 'Text'))
+        out = tweetProfile.current.writer(out)
+        out.write(csvHeader)
         for tweet in tweets :
-            id     = tweet['id_str']
-            when   = tweet['created_at']
-
-            # User is a structure within a tweet that contains the poster's
-            # screen name and full name. Convert the name to a Unicode string,
-            # protect any internal double quotes, and enclose in double quotes
-            # to protect any internal commas.
-
-            user   = tweet['user']
-            name   = unicode(user['name'])
-            name   = re_dquo.sub(r'""', name)
-            name   = '"' + name + '"'
-            screen = user['screen_name']
-
-            # The retweet and favorite counts aren't always present, so
-            # they need a check and a default.
-            rts  = tweet['retweet_count']  if 'retweet_count'  in tweet else 0
-            favs = tweet['favorite_count'] if 'favorite_count' in tweet else 0
-
-            # Convert the text string to a Unicode string, protect any
-            # internal double quotes, remove any contained newlines,
-            # and enclose in double quotes to protect any internal commas.
-
-            text = unicode(tweet['text'])
-            text = re_dquo.sub(r'""', text)
-            text = re_crlf.sub(r' ', text)
-            text = '"' + text + '"'
-
-            out.write('%s,%s,%s,%s,%d,%d,%s\n' % (id, screen, name, when, rts, favs, text))
+            out.write(row(tweet))
+
+    print '{}: {} tweets'.format(inpfile, inp.count)
 
 if __name__ == "__main__":
     sys.exit(main())
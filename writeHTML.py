@@ -7,6 +7,37 @@
 #   file 'imageHandler.js'. The HTML produced is screen-size responsive.
 #
 #   Keith Eric Grant (keg@ramblemuse.com
+#   18 Oct 2026
+#      Stream tweets through tweetStore. Also accepts .jsonl files.
+#      Select tweets with --user, --since, --until, --match and --limit,
+#      read from the indexes of an SQLite (.db) archive.
+#      The page is now written a tweet at a time through htmlWrapper's
+#      streaming document, and appendHTML can add tweets to an existing
+#      page without rendering it again.
+#      With --pagesize or --per hour/day, large captures are split into
+#      numbered pages with previous/next links and an index page listing
+#      them; the pages are rendered in parallel by a process pool.
+#      With --cache, rendered tweets are kept in a fragment cache so that a
+#      rebuild renders only the tweets that are new or have changed.
+#      Tweet text is now rendered from its entities in one pass: links show
+#      the expanded URLs instead of t.co, mentions and hashtags are linked,
+#      and the rest of the text is HTML-escaped. Tweets whose entities don't
+#      fit their text still go through the URL regular expression.
+#      With --summary, the report section written by summarizeTweets.py is
+#      placed above the tweets, or above the list of pages on an index.
+#      Read tweets as tweetRecord records sharing their users.
+#      --tz gives the zone of --since and --until, and --sorted finds them
+#      by binary search in an input already in ID order.
+#      --columns selects and sorts a .jsonl input from its columnar sidecar
+#      and reads only the tweets selected.
+#      pageShell takes the summary, so tweetPipeline.py can write a page
+#      a tweet at a time alongside its other outputs.
+#      --profile saves the time and memory of each phase, rendering apart
+#      from writing.
+#      Entity rendering does less work per tweet: the links are filled into
+#      templates, hashtag and mention links are remembered, only the
+#      characters a URL holds are escaped, and a text with one or two links
+#      is put together without a join.
 #   10 Oct 2015
 #      Added support for quoted tweets, motivating the new 
 #      routine 'tweetContents'
@@ -21,23 +52,191 @@
 import sys
 import os
 import argparse
-import simplejson as json
 import io
-import pickle
 import re
+import cgi
+import time
+import multiprocessing
 import htmlWrapper
+import fragmentCache
+import tweetStore
+import tweetArchive
+import tweetTime
+import tweetProfile
 
 
 myName  = 'writeHTML.py'
 version = '1.0.1'
 
 
+# Version of the rendered form of a tweet. Change it whenever addTweet or
+# tweetContents changes what they write, so cached fragments are dropped.
+renderVersion = u'{}/{}/{}'.format(2, len(htmlWrapper.element.indent),
+    htmlWrapper.element.threshold)
+
 # Set up a regular expression to catch retweets and avoid possible truncation
-re_text = re.compile(r'RT\s+@[_a-zA-Z0-9]+:\s')
+re_text = re.compile(r'RT\s+@([_a-zA-Z0-9]+):\s')
 
 # Set up a regular expression to catch URLs in the text
 urlre = re.compile(r'((?:https?|ftp|file):\/\/(?:[^\s"]+))')
 
+# Characters outside the Basic Multilingual Plane. Entity indices count
+# them as one character, but a narrow Python build holds them as two.
+if sys.maxunicode < 0x10FFFF :
+    re_astral = re.compile(u'[\ud800-\udbff][\udc00-\udfff]')
+else :
+    re_astral = None
+
+# Links made of entities, filled in with %
+urlLink     = u'<a href="%s">%s</a>'
+mentionLink = u'<a href="https://twitter.com/%s">@%s</a>'
+hashtagLink = u'<a href="https://twitter.com/hashtag/%s">%s</a>'
+
+# Hashtag and mention links remembered by the text they replace, as a
+# capture repeats the same few over and over
+linkCacheSize = 10000
+
+_links = {}
+
+def regexText (tweet) :
+    """Return the text of a tweet with its URLs linked by the urlre regular
+    expression, as for tweets without usable entities"""
+
+    text = tweet['text']
+    isrt = re_text.match(text)
+    if isrt and 'retweeted_status' in tweet :
+        text = isrt.group() + tweet['retweeted_status']['text']
+    return re.sub(urlre, r'<a href="\1">\1</a>', text)
+
+
+def htmlEscape (text) :
+    """Escape text for a quoted attribute, replacing only the characters
+    it holds"""
+    if u'&' in text :
+        text = text.replace(u'&', u'&amp;')
+    if u'<' in text :
+        text = text.replace(u'<', u'&lt;')
+    if u'>' in text :
+        text = text.replace(u'>', u'&gt;')
+    if u'"' in text :
+        text = text.replace(u'"', u'&quot;')
+    return text
+
+
+def entityText (text, entities) :
+    """Return tweet text as HTML, linking its URLs, media, mentions and
+    hashtags in one left-to-right pass over the index ranges of its
+    entities and escaping the rest. Returns None if the entities don't fit
+    the text."""
+
+    # The text comes with &, < and > escaped, but the indices count them
+    # as single characters.
+    if u'&' in text :
+        text = text.replace(u'&lt;', u'<').replace(u'&gt;', u'>').replace(u'&amp;', u'&')
+        escape = u'&' in text or u'<' in text or u'>' in text
+    else :
+        escape = u'<' in text or u'>' in text
+    if re_astral and re_astral.search(text) :
+        return None
+
+    # Collect the links with the ranges of text they replace
+    links = _links
+    if len(links) >= linkCacheSize :
+        links.clear()
+    spans = []
+    append = spans.append
+    for kind, items in entities.iteritems() :
+        if not items :
+            continue
+        if kind == 'hashtags' :
+            for tag in items :
+                start, end = tag['indices']
+                shown = text[start:end]
+                if shown[1:] != tag['text'] :
+                    return None
+                link = links.get(shown)
+                if link is None :
+                    link = links[shown] = hashtagLink % (shown[1:], shown)
+                append((start, end, link))
+        elif kind == 'user_mentions' :
+            for mention in items :
+                start, end = mention['indices']
+                shown = text[start:end]
+                name = shown[1:]
+                if name != mention['screen_name'] and name.lower() != mention['screen_name'].lower() :
+                    return None
+                link = links.get(shown)
+                if link is None :
+                    link = links[shown] = mentionLink % (name, name)
+                append((start, end, link))
+        elif kind == 'urls' or kind == 'media' :
+            for url in items :
+                start, end = url['indices']
+                short = url['url']
+                if text[start:end] != short :
+                    return None
+                href = url.get('expanded_url') or short
+                if u'&' in href or u'"' in href or u'<' in href or u'>' in href :
+                    href = htmlEscape(href)
+                shown = url.get('display_url') or short
+                if u'&' in shown or u'"' in shown or u'<' in shown or u'>' in shown :
+                    shown = htmlEscape(shown)
+                append((start, end, urlLink % (href, shown)))
+
+    # Stitch the links between the runs of plain text. Most tweets have
+    # one or two links, which are joined by concatenation.
+    if not spans :
+        return cgi.escape(text) if escape else text
+    if len(spans) == 1 and not escape :
+        start, end, link = spans[0]
+        return text[:start] + link + text[end:]
+    if len(spans) == 2 :
+        if spans[0][0] > spans[1][0] :
+            spans.reverse()
+        (start, end, link), (after, last, more) = spans
+        if not escape and end <= after :
+            return text[:start] + link + text[end:after] + more + text[last:]
+    elif len(spans) > 2 :
+        spans.sort()
+    html = []
+    add = html.append
+    pos = 0
+    for start, end, link in spans :
+        if start < pos :
+            return None
+        add(text[pos:start])
+        add(link)
+        pos = end
+    add(text[pos:])
+    if escape :
+        html[0::2] = [cgi.escape(x) for x in html[0::2]]
+    return u''.join(html)
+
+
+def tweetText (tweet) :
+    """Return the text of a tweet as HTML. If it's a retweet, the full text
+    comes from the RT status, after the RT and poster screen_name. This
+    avoids truncated RTs."""
+
+    text, entities, poster = tweet['text'], tweet.get('entities'), None
+    if 'retweeted_status' in tweet :
+        isrt = re_text.match(text)
+        if isrt :
+            retweeted = tweet['retweeted_status']
+            text, entities = retweeted['text'], retweeted.get('entities')
+            poster = isrt.group(1)
+
+    try :
+        html = entityText(text, entities) if entities else None
+    except (AttributeError, KeyError, TypeError, ValueError) :
+        # Entities missing their indices or other fields
+        html = None
+    if html is None :
+        return regexText(tweet)
+    if poster :
+        return u'RT %s: %s' % (mentionLink % (poster, poster), html)
+    return html
+
 
 def tweetContents (doc_tweet, tweet) :
 
@@ -61,61 +260,46 @@ def tweetContents (doc_tweet, tweet) :
 	   tweet['created_at'],tweet['source']))
 	doc_timestamp.close()
 
-	# Get the text of the tweet. If it's a retweet, get the full text from
-	# the RT status and prepend the RT and poster screen_name. This avoids
-	# truncated RTs.
-
+	# Add the text of the tweet with its links, and close the tweet text
 	doc_divtxt = doc_tweet.add_element('div', ('class="tweettxt"',))
-	text = tweet['text']
-	isrt = re_text.match(text)
-	if isrt and 'retweeted_status' in tweet :
-		text = isrt.group() + tweet['retweeted_status']['text']
-
-	# Place URLs within a link, add the text, and close the tweet text
-	text = re.sub(urlre, r'<a href="\1">\1</a>', text)
-	doc_divtxt.add_text(text)
+	doc_divtxt.add_text(tweetText(tweet))
 	doc_divtxt.close()
 
 
-def main(argv=None):
-    if argv is None:
-        argv = sys.argv
+def addTweet (doc_tweets, tweet) :
 
-    # Build the command line parser.
-    parser = argparse.ArgumentParser(
-        prog=myName,
-        description='Display tweets as HTML',
-        version=version)
-    parser.add_argument('inpfile', action='store', help='Input tweet filename (.json or .pickle)')
-    parser.add_argument('--html', '-m', action='store', dest='html', help='HTML output file name')
-    parser.add_argument('--sort', '-s', action='store_true', dest='sort', default=False, help='Sort by decreasing ID')
-    parser.add_argument('--ascend', '-a', action='store_true', dest='ascend', default=False, help='Use ascending sort')
-    args = parser.parse_args(argv[1:])
+    doc_tweet = doc_tweets.add_element('div', ('class="tweet"',))
 
-    inpfile  = args.inpfile
-    htmlfile = args.html if args.html else 'output.html'
-    sortem   = args.sort
-    descSort = not args.ascend
+    # Handle the user icon as with the image above, so that loading of
+    # the real icons is delayed until after page-load.
 
-    # Load tweets from the input file, whether JSON or pickle.
-    ext = os.path.splitext(inpfile)[1].lower()
-    if ext == '.json' :
-        with io.open(inpfile, 'r') as inp :
-            tweets = json.load(inp)
-    elif ext == '.pickle' :
-        with open(inpfile, 'rb') as inp :
-            tweets = pickle.load(inp)
-    else :
-        print 'Unknown extension {}'.format(ext)
-        return 1
+    doc_icon = doc_tweet.add_element('div', ('class="posterimg"',))
+    doc_icon.add_selfclose('img', ('src="../images/tempload_icon.png"', \
+        'data-src="{}"'.format(tweet['user']['profile_image_url']), 'alt="user\'s icon"'))
+    doc_icon.close()
 
-    print '{}: {} tweets'.format(inpfile, len(tweets))
+    tweetContents (doc_tweet, tweet)
 
-    if sortem :
-        print 'Sorting tweets'
-        tweets.sort(key=lambda x: x['id'], reverse=descSort)
+    # Handle a quoted tweet if present
+    if 'quoted_status' in tweet :
+        quoted = tweet['quoted_status']
+        doc_quote = doc_tweet.add_element('div', ('class="quote"',))
+        tweetContents (doc_quote, quoted)
+        doc_quote.close()
+
+    # Close the entire tweet
+    doc_tweet.close()
+
+
+def pageDocument (fill=None, doc=None, nav=None, summary=None) :
+    """Build the page around the tweets container, calling fill to add
+    the contents of the container. The page is built in an in-memory
+    htmlWrapper document unless another one, such as a streamDocument,
+    is given. If there's a nav function, it adds the navigation above and
+    below the tweets. A summary, an HTML section from summarizeTweets, goes
+    at the top of the container."""
 
-    doc   = htmlWrapper.document()
+    doc   = doc if doc else htmlWrapper.document()
 
     # HTML Head Element
     doc_head  = doc.add_element('head')
@@ -145,41 +329,361 @@ def main(argv=None):
 
     # Create the main container, and within that the container for all tweets
     doc_cont = doc_body.add_element('div', ('id="container"',))
+    if summary :
+        doc_cont.add_fragment(summary)
+    if nav :
+        nav(doc_cont)
     doc_tweets = doc_cont.add_element('div', ('id="tweets"',))
-
-    # Run through the individual tweets
-    for tweet in tweets :
-        doc_tweet = doc_tweets.add_element('div', ('class="tweet"',))
-
-        # Handle the user icon as with the image above, so that loading of
-        # the real icons is delayed until after page-load.
-
-        doc_icon = doc_tweet.add_element('div', ('class="posterimg"',))
-        doc_icon.add_selfclose('img', ('src="../images/tempload_icon.png"', \
-            'data-src="{}"'.format(tweet['user']['profile_image_url']), 'alt="user\'s icon"'))
-        doc_icon.close()
-		
-        tweetContents (doc_tweet, tweet)
-
-		# Handle a quoted tweet if present
-        if 'quoted_status' in tweet :
-            quoted = tweet['quoted_status']
-            doc_quote = doc_tweet.add_element('div', ('class="quote"',))			
-            tweetContents (doc_quote, quoted)
-            doc_quote.close()
-			
-        # Close the entire tweet
-        doc_tweet.close()
+    if fill :
+        fill(doc_tweets)
 
     # Close-up the document elements
     doc_tweets.close()
+    if nav :
+        nav(doc_cont)
     doc_cont.close()
     doc_body.close()
     doc.close()
 
-    # Write it
+    return doc
+
+
+# Each tweet sits inside the html, body, container and tweets elements
+tweetIndent = htmlWrapper.element.indent * 4
+
+# Stand-in for the tweets while laying out the rest of the page. It's longer
+# than the one-line threshold, as every real tweet is.
+placeholder = u'<!--{}-->'.format(u'-' * htmlWrapper.element.threshold)
+
+
+def pageShell (summary=None) :
+    """Return the text of the page before and after its tweets"""
+    buf = io.StringIO()
+    pageDocument(lambda doc_tweets : doc_tweets.add_text(placeholder),
+        htmlWrapper.streamDocument(buf), summary=summary)
+    head, tail = buf.getvalue().split(tweetIndent + placeholder + u'\n')
+    return head, tail
+
+
+def renderTweet (tweet) :
+    """Return the text of one tweet as it appears within the page"""
+    buf = io.StringIO()
+    addTweet(htmlWrapper.streamFragment(buf, 4), tweet)
+    return buf.getvalue()
+
+
+def renderedFields (tweet) :
+    """The parts of a tweet that addTweet and tweetContents read, which
+    key the fragment cache"""
+
+    def contents (tweet) :
+        media = tweet['entities'].get('media')
+        retweeted = tweet.get('retweeted_status')
+        return (media[0]['media_url'] if media else None,
+            tweet['user']['screen_name'], tweet['created_at'], tweet['source'],
+            tweet['text'], tweet['entities'],
+            retweeted['text'] if retweeted else None,
+            retweeted.get('entities') if retweeted else None)
+
+    quoted = tweet.get('quoted_status')
+    return (tweet['user']['profile_image_url'], contents(tweet),
+        contents(quoted) if quoted else None)
+
+
+def cachedTweet (cache, tweet) :
+    """Return the text of a tweet from the fragment cache, rendering and
+    storing it if it's new or has changed"""
+    return cache.fetch(tweet['id'], fragmentCache.contentHash(renderedFields(tweet)),
+        lambda : renderTweet(tweet))
+
+
+def writePage (out, tweets, nav=None, cache=None, summary=None) :
+    """Write the page for a sequence of tweets, one tweet at a time. Items
+    that are already rendered fragments, rather than tweets, are written
+    as they are."""
+
+    count = [0]
+    profile = tweetProfile.current
+
+    def fill (doc_tweets) :
+        for tweet in tweets :
+            with profile.phase('render') :
+                if isinstance(tweet, unicode) :
+                    doc_tweets.add_fragment(tweet)
+                elif cache :
+                    doc_tweets.add_fragment(cachedTweet(cache, tweet))
+                else :
+                    addTweet(doc_tweets, tweet)
+            count[0] += 1
+
+    pageDocument(fill, htmlWrapper.streamDocument(profile.writer(out)), nav, summary)
+    return count[0]
+
+
+def pageNav (prevPage, indexPage, nextPage) :
+    """Return a nav function for pageDocument that adds a sequencer row
+    linking to the previous page, the index and the next page"""
+
+    def nav (doc_cont) :
+        doc_table = doc_cont.add_element('table', ('class="sequencer"',))
+        doc_row = doc_table.add_element('tr')
+        doc_cell = doc_row.add_element('td')
+        if prevPage :
+            doc_cell.add_text(u'<a href="{}"><span>&larr;</span> Previous</a>'.format(prevPage))
+        doc_cell.close()
+        doc_cell = doc_row.add_element('td')
+        doc_cell.add_text(u'<a href="{}">Index</a>'.format(indexPage))
+        doc_cell.close()
+        doc_cell = doc_row.add_element('td')
+        if nextPage :
+            doc_cell.add_text(u'<a href="{}">Next <span>&rarr;</span></a>'.format(nextPage))
+        doc_cell.close()
+        doc_row.close()
+        doc_table.close()
+
+    return nav
+
+
+# strftime layouts naming the pages of tweets split by time
+pagePeriods = {'hour' : '%Y-%m-%d %H:00 UTC', 'day' : '%Y-%m-%d'}
+
+
+def splitPages (tweets, size=None, per=None) :
+    """Generate (label, tweets) for each page, either size tweets long or
+    covering one period of pagePeriods. Splitting by time expects the
+    tweets in time order."""
+
+    page = []
+    label = None
+    for tweet in tweets :
+        if per :
+            key = time.strftime(pagePeriods[per], time.gmtime(tweetTime.tweetTime(tweet)))
+            if page and key != label :
+                yield label, page
+                page = []
+            label = key
+        elif len(page) >= size :
+            yield label, page
+            page = []
+        page.append(tweet)
+    if page :
+        yield label, page
+
+
+def pageFilename (htmlfile, number) :
+    root, ext = os.path.splitext(htmlfile)
+    return u'{}_{:03d}{}'.format(root, number, ext)
+
+
+class fragmentRecorder(object) :
+    """Stands in for the fragment cache in a worker process, rendering
+    every tweet it's given and noting the fragments for the real cache"""
+
+    def __init__(self) :
+        self.added = []
+
+    def fetch(self, id, hash, render) :
+        html = render()
+        self.added.append((id, hash, html))
+        return html
+
+
+def renderPage (job) :
+    """Write one page of a split capture. This runs in the worker
+    processes, and returns any fragments rendered for the cache."""
+
+    filename, items, prevPage, indexPage, nextPage, caching = job
+    recorder = fragmentRecorder() if caching else None
+    with io.open(filename, 'w', encoding='utf-8') as out :
+        writePage(out, items, pageNav(prevPage, indexPage, nextPage), recorder)
+    return recorder.added if recorder else []
+
+
+def writePages (htmlfile, tweets, size=None, per=None, processes=None, cache=None, summary=None) :
+    """Split tweets into pages written alongside htmlfile, which becomes
+    the index page. The pages are rendered by a pool of processes while
+    the tweets are read, with a few pages queued for each. Tweets found in
+    the fragment cache are sent as their fragments. Returns the index
+    entries of (filename, label, count, first time, last time)."""
+
+    processes = processes if processes else multiprocessing.cpu_count()
+    indexPage = os.path.basename(htmlfile)
+    pool = multiprocessing.Pool(processes) if processes > 1 else None
+    queued = []
+    entries = []
+
+    def store (fragments) :
+        for id, hash, html in fragments :
+            cache.put(id, hash, html)
+
+    def collect () :
+        # Waiting for the workers counts as rendering
+        with tweetProfile.current.phase('render') :
+            return queued.pop(0).get()
+
+    def submit (job) :
+        if pool is None :
+            store(renderPage(job))
+            return
+        queued.append(pool.apply_async(renderPage, (job,)))
+        while len(queued) > 2 * processes :
+            store(collect())
+
+    def cached (tweet) :
+        html = cache.get(tweet['id'], fragmentCache.contentHash(renderedFields(tweet)))
+        return html if html is not None else tweet
+
+    # Each page is held back until the next one starts, so that it can
+    # link to it or know it's the last.
+    try :
+        number = 0
+        held = None
+        for label, page in splitPages(tweets, size, per) :
+            number += 1
+            filename = pageFilename(htmlfile, number)
+            if held :
+                submit(held + (os.path.basename(filename), cache is not None))
+            entries.append((os.path.basename(filename),
+                label if label else u'Page {}'.format(number),
+                len(page), page[0]['created_at'], page[-1]['created_at']))
+            prevPage = os.path.basename(pageFilename(htmlfile, number-1)) if number > 1 else None
+            items = [cached(x) for x in page] if cache else page
+            held = (filename, items, prevPage, indexPage)
+        if held :
+            submit(held + (None, cache is not None))
+        held = None
+        while queued :
+            store(collect())
+    finally :
+        if pool :
+            pool.close()
+            pool.join()
+
     with io.open(htmlfile, 'w', encoding='utf-8') as out :
-        doc.write(out)
+        writeIndex(out, entries, summary)
+    return entries
+
+
+def writeIndex (out, entries, summary=None) :
+    """Write the index page of a split capture, one line per page"""
+
+    def fill (doc_tweets) :
+        for filename, label, count, first, last in entries :
+            doc_entry = doc_tweets.add_element('div', ('class="remark"',))
+            doc_entry.add_text(u'<a href="{}">{}</a>: {} tweets, {} to {}'.format(
+                filename, label, count, first, last))
+            doc_entry.close()
+
+    pageDocument(fill, htmlWrapper.streamDocument(out), summary=summary)
+
+
+def appendHTML (htmlfile, tweets) :
+    """Add tweets to the end of an existing page in place, rewriting only
+    the closing tags. Returns the number added, or None if the file isn't
+    a page with tweets that can be extended."""
+
+    if not os.path.exists(htmlfile) :
+        return None
+    head, tail = pageShell()
+    tail = tail.encode('utf-8')
+
+    with open(htmlfile, 'r+b') as out :
+        out.seek(0, os.SEEK_END)
+        end = out.tell() - len(tail)
+        if end < len(head) :
+            return None
+        out.seek(end)
+        if out.read() != tail :
+            return None
+
+        out.seek(end)
+        out.truncate()
+        count = 0
+        profile = tweetProfile.current
+        out = profile.writer(out)
+        for tweet in tweets :
+            with profile.phase('render') :
+                html = renderTweet(tweet).encode('utf-8')
+            out.write(html)
+            count += 1
+        out.write(tail)
+    return count
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+
+    # Build the command line parser.
+    parser = argparse.ArgumentParser(
+        prog=myName,
+        description='Display tweets as HTML',
+        version=version)
+    parser.add_argument('inpfile', action='store', help='Input tweet filename (.json or .pickle)')
+    parser.add_argument('--html', '-m', action='store', dest='html', help='HTML output file name')
+    parser.add_argument('--sort', '-s', action='store_true', dest='sort', default=False, help='Sort by decreasing ID')
+    parser.add_argument('--ascend', '-a', action='store_true', dest='ascend', default=False, help='Use ascending sort')
+    parser.add_argument('--pagesize', action='store', type=int, help='Split into pages of this many tweets, with the HTML file as their index')
+    parser.add_argument('--per', action='store', choices=sorted(pagePeriods), help='Split into a page per hour or day (use with --sort)')
+    parser.add_argument('--jobs', action='store', type=int, help='Processes rendering pages (default: one per CPU)')
+    parser.add_argument('--cache', action='store', nargs='?', const='', help='Reuse tweets rendered by earlier runs, kept in this file (default: HTML-NAME.fragments.db)')
+    parser.add_argument('--cachesize', action='store', type=int, default=fragmentCache.defaultLimit, help='Most fragments kept in the cache')
+    parser.add_argument('--summary', action='store', help='HTML section from summarizeTweets.py to put above the tweets (or the index)')
+    tweetArchive.addQueryArguments(parser)
+    tweetProfile.addProfileArguments(parser)
+    args = parser.parse_args(argv[1:])
+    tweetProfile.start(myName, args)
+
+    inpfile  = args.inpfile
+    htmlfile = args.html if args.html else 'output.html'
+    sortem   = args.sort
+    descSort = not args.ascend
+
+    try :
+        query = tweetArchive.queryArguments(args)
+    except ValueError as err :
+        print err
+        return 1
+
+    # Stream the selected tweets from the input file, whether JSON, JSON
+    # Lines, pickle or an SQLite archive, which returns them already sorted.
+    # They're read as records sharing their users, so tweets held for
+    # sorting or for a page take less memory.
+    try :
+        indexed = tweetStore.formatOf(inpfile) == 'sqlite'
+        tweets = inp = tweetStore.counter(tweetStore.selectTweets(inpfile, descSort,
+            sortem, intern=True, **query))
+    except ValueError as err :
+        print 'Unknown extension {}'.format(err)
+        return 1
+
+    if sortem and not indexed :
+        print 'Sorting tweets'
+
+    summary = None
+    if args.summary :
+        with io.open(args.summary, 'r', encoding='utf-8') as section :
+            summary = section.read()
+
+    cache = None
+    if args.cache is not None :
+        cacheFile = args.cache if args.cache else os.path.splitext(htmlfile)[0] + '.fragments.db'
+        cache = fragmentCache.fragmentCache(cacheFile, renderVersion, args.cachesize)
+
+    # Write it, as one page or split into several with an index
+    try :
+        if args.pagesize or args.per :
+            entries = writePages(htmlfile, tweets, args.pagesize, args.per, args.jobs, cache, summary)
+            print 'Wrote {} pages indexed by {}'.format(len(entries), htmlfile)
+        else :
+            with io.open(htmlfile, 'w', encoding='utf-8') as out :
+                writePage(out, tweets, cache=cache, summary=summary)
+    finally :
+        if cache :
+            cache.close()
+            print cache.report()
+
+    print '{}: {} tweets'.format(inpfile, inp.count)
 
 
 if __name__ == "__main__":